@@ -0,0 +1,189 @@
+import numpy as np
+import time as tm
+
+from complex_bot_demo import (
+    EMA_PARAMS, DEFAULT_BALANCE, RISK_PER_TRADE_USDT, TRADING_MODE,
+    TAKER_FEE_PERCENT, MAKER_FEE_PERCENT, ENTRY_FEE_TYPE,
+    calculate_volume_from_risk
+)
+from indicators.kline_store import KlineStore
+from indicators import kernels
+
+# =========================================================================
+# === VECTORIZED BACKTEST OF THE EMA STRATEGY (SAME RULES AS THE LIVE BOT) ===
+# -------------------------------------------------------------------------
+# Entries: EmaIndicator crossover rules evaluated on closed candles, filled
+# at the close of the signal candle. Exits: TradingBot.stop_levels SL/TP
+# levels, detected intrabar with high/low (SL wins if both are hit in
+# the same candle, gaps fill at the open). Fees and volume: TradingSimulator
+# and calculate_volume_from_risk. One position at a time per symbol.
+# =========================================================================
+
+# Trade record layout returned by the backtest functions
+TRADE_DTYPE = np.dtype([
+    ('symbol', 'U32'), ('side', 'i1'),
+    ('entry_time', 'i8'), ('exit_time', 'i8'),
+    ('entry_price', 'f8'), ('exit_price', 'f8'), ('volume', 'f8'),
+    ('pnl', 'f8'), ('fees', 'f8'), ('net_pnl', 'f8'),
+    ('exit_reason', 'U3')
+])
+
+# exit_reason values
+EXIT_TP, EXIT_SL, EXIT_END = 'TP', 'SL', 'END'
+
+
+def ema_crossover_signals(close, fast_length, slow_length):
+    """Returns +1 (fast crosses slow upwards), -1 (downwards) or 0 for every candle."""
+    close = np.asarray(close, dtype=np.float64)
+    f = kernels.ema(close, fast_length)
+    s = kernels.ema(close, slow_length)
+    signals = np.zeros(len(close), dtype=np.int8)
+
+    # NaN comparisons are False, so warm-up candles never signal
+    up = (f[1:] > s[1:]) & (f[:-1] <= s[:-1])
+    down = (f[1:] < s[1:]) & (f[:-1] >= s[:-1])
+    signals[1:][up] = 1
+    signals[1:][down] = -1
+    return signals
+
+
+def backtest_arrays(open_time, open_, high, low, close, fast_length, slow_length, sl_percent, tp_percent,
+                    symbol='', risk_usdt=RISK_PER_TRADE_USDT, trading_mode=TRADING_MODE, signals=None):
+    """
+    Backtests one symbol's candle arrays and returns a TRADE_DTYPE array.
+    Precomputed `signals` (from ema_crossover_signals) can be passed to reuse them across SL/TP values.
+    """
+    # Plain ndarray views: slicing np.memmap objects is several times slower
+    open_time, open_, high, low, close = (np.asarray(a) for a in (open_time, open_, high, low, close))
+    if signals is None:
+        signals = ema_crossover_signals(close, fast_length, slow_length)
+    else:
+        signals = signals.copy()
+    if trading_mode == 0:
+        signals[signals < 0] = 0
+    elif trading_mode == 1:
+        signals[signals > 0] = 0
+    entry_indexes = np.flatnonzero(signals)
+
+    entry_fee_rate = (TAKER_FEE_PERCENT if ENTRY_FEE_TYPE == 'TAKER' else MAKER_FEE_PERCENT) / 100
+    exit_fee_rate = TAKER_FEE_PERCENT / 100
+    n = len(close)
+
+    trades = []
+    next_free = 0 # First candle at which a new position may be opened
+    for i in entry_indexes:
+        if i < next_free or i >= n - 1:
+            continue
+        side = int(signals[i])
+        entry_price = float(close[i])
+
+        if side == 1:
+            sl_price = entry_price * (1 - sl_percent / 100)
+            tp_price = entry_price * (1 + tp_percent / 100)
+        else:
+            sl_price = entry_price * (1 + sl_percent / 100)
+            tp_price = entry_price * (1 - tp_percent / 100)
+
+        # Scan forward in doubling windows so short trades don't touch the whole history
+        k, reason = None, EXIT_END
+        lo, width = i + 1, 64
+        while lo < n:
+            hi = min(n, lo + width)
+            if side == 1:
+                sl_hit = low[lo:hi] <= sl_price
+                tp_hit = high[lo:hi] >= tp_price
+            else:
+                sl_hit = high[lo:hi] >= sl_price
+                tp_hit = low[lo:hi] <= tp_price
+            hits = sl_hit | tp_hit
+            if hits.any():
+                j = int(np.argmax(hits))
+                k = lo + j
+                reason = EXIT_SL if sl_hit[j] else EXIT_TP
+                break
+            lo, width = hi, width * 2
+
+        if reason == EXIT_SL:
+            exit_price = min(open_[k], sl_price) if side == 1 else max(open_[k], sl_price)
+        elif reason == EXIT_TP:
+            exit_price = max(open_[k], tp_price) if side == 1 else min(open_[k], tp_price)
+        else:
+            k = n - 1
+            exit_price = float(close[k])
+
+        volume = calculate_volume_from_risk(risk_usdt, entry_price, sl_percent)
+        pnl = (exit_price - entry_price) * volume * side
+        fees = entry_price * volume * entry_fee_rate + exit_price * volume * exit_fee_rate
+        trades.append((symbol, side, open_time[i], open_time[k], entry_price, exit_price, volume, pnl, fees, pnl - fees, reason))
+        next_free = k + 1
+
+    return np.array(trades, dtype=TRADE_DTYPE)
+
+
+def summarize(trades, start_balance=DEFAULT_BALANCE):
+    """Net PnL after fees, win rate, max drawdown (USDT) and trade count of a TRADE_DTYPE array."""
+    if len(trades) == 0:
+        return {'net_pnl': 0.0, 'fees': 0.0, 'win_rate': 0.0, 'max_drawdown': 0.0, 'trades': 0}
+    ordered = trades[np.argsort(trades['exit_time'], kind='stable')]
+    equity = start_balance + np.cumsum(ordered['net_pnl'])
+    peak = np.maximum.accumulate(np.concatenate([[start_balance], equity]))[1:]
+    return {
+        'net_pnl': float(ordered['net_pnl'].sum()),
+        'fees': float(ordered['fees'].sum()),
+        'win_rate': float((ordered['net_pnl'] > 0).mean() * 100),
+        'max_drawdown': float((peak - equity).max()),
+        'trades': int(len(ordered)),
+    }
+
+
+def run_backtest(store, symbols, category, interval, params, start=None, end=None, **kwargs):
+    """Backtests every symbol in the store with EMA_PARAMS-style `params` and returns all trades."""
+    results = []
+    for symbol in symbols:
+        data = store.read(category, symbol, interval, start=start, end=end)
+        if len(data['close']) < params['EMA_SLOW_LENGTH'] + 2:
+            continue
+        results.append(backtest_arrays(
+            data['open_time'], data['open'], data['high'], data['low'], data['close'],
+            params['EMA_FAST_LENGTH'], params['EMA_SLOW_LENGTH'], params['SL_PERCENT'], params['TP_PERCENT'],
+            symbol=symbol, **kwargs
+        ))
+    if not results:
+        return np.empty(0, dtype=TRADE_DTYPE)
+    return np.concatenate(results)
+
+
+# =========================================================================
+# === ENTRY POINT: python backtest.py [SYMBOL ...] ===
+# =========================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backtest the EMA strategy over the local kline store.")
+    parser.add_argument('symbols', nargs='*', help="Symbols to test (default: every stored symbol)")
+    parser.add_argument('--category', default=EMA_PARAMS['CATEGORY'])
+    parser.add_argument('--interval', default=EMA_PARAMS['KLINE_INTERVAL'])
+    parser.add_argument('--days', type=float, default=None, help="Only the last N days of history")
+    parser.add_argument('--root', default=EMA_PARAMS.get('KLINE_STORE_DIR') or 'kline_store')
+    args = parser.parse_args()
+
+    store = KlineStore(args.root)
+    symbols = args.symbols or [key[1] for key in store.keys(args.category, args.interval)]
+    start = int((tm.time() - args.days * 86400) * 1000) if args.days else None
+
+    started = tm.perf_counter()
+    trades = run_backtest(store, symbols, args.category, args.interval, EMA_PARAMS, start=start)
+    elapsed = tm.perf_counter() - started
+
+    for symbol in symbols:
+        stats = summarize(trades[trades['symbol'] == symbol])
+        if stats['trades']:
+            print(f"{symbol:<16} trades: {stats['trades']:>5}  win rate: {stats['win_rate']:6.2f}%  net PnL: {stats['net_pnl']:10.2f} USDT")
+    total = summarize(trades)
+    print(f"\n--- BACKTEST ({len(symbols)} symbols, {elapsed:.2f}s) ---")
+    print(f"Trades: {total['trades']}")
+    print(f"Win rate: {total['win_rate']:.2f}%")
+    print(f"Net PnL (after fees): {total['net_pnl']:.2f} USDT")
+    print(f"Fees: {total['fees']:.2f} USDT")
+    print(f"Max drawdown: {total['max_drawdown']:.2f} USDT")
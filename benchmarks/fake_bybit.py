@@ -0,0 +1,170 @@
+import numpy as np
+import collections
+import threading
+import random
+import json
+import zlib
+import time as tm
+
+# =========================================================================
+# === OFFLINE BYBIT STAND-IN (SYNTHETIC OR RECORDED RESPONSES) ===
+# -------------------------------------------------------------------------
+# FakeBybitHTTP implements the pybit HTTP methods the bot uses
+# (get_tickers, get_kline) without network access. Responses are either
+# synthetic or replayed from a file written by `record`. Synthetic candles
+# of every interval are aggregated from one deterministic random walk per
+# symbol on `base_interval` candles, so e.g. an hourly close is the close
+# of the last minute in that hour, as on the exchange. `latency` (seconds per call) and `error_rate`
+# (share of calls raising ConnectionError) simulate the network.
+# With return_response_headers=True it can replace `BybitClient.http`.
+#
+#   python -m benchmarks.fake_bybit record --out responses.json --symbols 50
+# =========================================================================
+
+INTERVAL_MINUTES = {'D': 1440, 'W': 10080}
+WEEK_MS = 7 * 86400000
+HOURLY_VOLATILITY = 0.004 # std of hourly log returns of the synthetic walk
+
+
+def _interval_ms(interval):
+    interval = str(interval)
+    return (int(interval) if interval.isdigit() else INTERVAL_MINUTES[interval]) * 60000
+
+
+class FakeBybitHTTP:
+    def __init__(self, symbols=300, history=1000, latency=0.0, error_rate=0.0, seed=0,
+                 recorded=None, return_response_headers=False, testnet=False, base_interval='1'):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.return_response_headers = return_response_headers
+        self.testnet = testnet
+        self.history = history
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.calls = collections.Counter()
+        self.lock = threading.Lock()
+        self.series = {} # {(symbol, interval): (open_time, rows as strings, newest first)}
+        self.created_ms = int(tm.time() * 1000)
+        self.base_step = _interval_ms(base_interval)
+        # The base walks end here, after the last (future) candle of any interval
+        self.anchor_ms = (self.created_ms // WEEK_MS + 3) * WEEK_MS
+
+        if recorded is not None:
+            with open(recorded, 'r') as f:
+                data = json.load(f)
+            self.tickers = data['tickers']
+            for key, rows in data['klines'].items():
+                symbol, interval = key.split('|')
+                self.series[(symbol, interval)] = (np.array([int(row[0]) for row in rows], dtype=np.int64), rows)
+            self.synthetic = False
+        else:
+            # Liquid USDT perpetuals with turnover spread over the default liquidity filter
+            self.tickers = [{
+                'symbol': f"SYM{i:03d}USDT",
+                'lastPrice': f"{100 + i % 50:.4f}",
+                'turnover24h': f"{2e8 * (1 + i % 7):.2f}",
+            } for i in range(symbols)]
+            self.synthetic = True
+
+    # --- Network simulation ---
+
+    def _request(self, method, response):
+        with self.lock:
+            self.calls[method] += 1
+            failed = self.random.random() < self.error_rate
+        if self.latency:
+            tm.sleep(self.latency)
+        if failed:
+            raise ConnectionError(f"Simulated network error in {method}")
+        if self.return_response_headers:
+            return response, 0.0, {}
+        return response
+
+    # --- Synthetic data ---
+
+    def _base_candles(self, symbol, first_open):
+        """(open, high, low, close, volume) of the symbol's base candles from `first_open` to the anchor, ascending."""
+        count = (self.anchor_ms - first_open) // self.base_step
+        seed = [self.seed, zlib.crc32(symbol.encode())]
+        scale = self.base_step / 3600000
+        # Drawn from the anchor backwards: a longer history extends the walk without changing newer candles
+        steps = np.random.default_rng(seed + [0]).normal(0, HOURLY_VOLATILITY * np.sqrt(scale), count)
+        closes = 100 * np.exp(-np.concatenate([[0.0], np.cumsum(steps)])) # newest first, one extra for the open
+        close, open_ = closes[:-1], closes[1:]
+        wick = np.abs(np.random.default_rng(seed + [1]).normal(0, 0.002 * np.sqrt(scale), count))
+        volume = np.random.default_rng(seed + [2]).uniform(1e3, 1e4, count) * scale
+        return (open_[::-1], (np.maximum(open_, close) * (1 + wick))[::-1], (np.minimum(open_, close) * (1 - wick))[::-1],
+                close[::-1], volume[::-1])
+
+    def _synthetic_series(self, symbol, interval):
+        key = (symbol, str(interval))
+        if key not in self.series:
+            step = _interval_ms(interval)
+            # The history ends with the candle forming at creation time, plus a day of future candles
+            count = self.history + max(1, 86400000 // step)
+            last = self.created_ms // step * step + max(1, 86400000 // step) * step
+            open_time = last - np.arange(count)[::-1] * step
+            # Every candle aggregates the base candles it spans
+            per_candle = step // self.base_step
+            base_open, base_high, base_low, base_close, base_volume = (
+                series[:count * per_candle].reshape(count, per_candle) for series in self._base_candles(symbol, int(open_time[0])))
+            open_, high, low, close = base_open[:, 0], base_high.max(axis=1), base_low.min(axis=1), base_close[:, -1]
+            volume, turnover = base_volume.sum(axis=1), (base_volume * base_close).sum(axis=1)
+            rows = [[str(t), f"{o:.6f}", f"{h:.6f}", f"{l:.6f}", f"{c:.6f}", f"{v:.2f}", f"{q:.2f}"]
+                    for t, o, h, l, c, v, q in zip(open_time.tolist(), open_.tolist(), high.tolist(), low.tolist(),
+                                                   close.tolist(), volume.tolist(), turnover.tolist())]
+            self.series[key] = (open_time[::-1].copy(), rows[::-1])
+        return self.series[key]
+
+    # --- pybit HTTP methods ---
+
+    def get_tickers(self, category='linear', symbol=None, **kwargs):
+        tickers = self.tickers if isinstance(self.tickers, list) else self.tickers.get(category, [])
+        if symbol is not None:
+            tickers = [t for t in tickers if t['symbol'] == symbol]
+        return self._request('get_tickers', {'retCode': 0, 'retMsg': 'OK', 'result': {'category': category, 'list': tickers}})
+
+    def get_kline(self, category='linear', symbol=None, interval='60', limit=200, start=None, end=None, **kwargs):
+        if self.synthetic:
+            open_time, rows = self._synthetic_series(symbol, interval)
+        else:
+            open_time, rows = self.series.get((symbol, str(interval)), (np.empty(0, dtype=np.int64), []))
+        # Newest first, like Bybit; nothing after "now" (synthetic series run ahead)
+        now_ms = int(tm.time() * 1000)
+        mask = open_time <= (now_ms if end is None else min(int(end), now_ms))
+        if start is not None:
+            mask &= open_time >= int(start)
+        selected = np.flatnonzero(mask)[:int(limit)]
+        result = [rows[i] for i in selected.tolist()]
+        return self._request('get_kline', {'retCode': 0, 'retMsg': 'OK', 'result': {'category': category, 'symbol': symbol, 'list': result}})
+
+
+def record(client, path, category='linear', interval='60', limit=1000, max_symbols=None):
+    """Saves live get_tickers / get_kline responses to `path` for replay with FakeBybitHTTP(recorded=path)."""
+    tickers = client.get_tickers(category=category)['result']['list']
+    symbols = [t['symbol'] for t in tickers if t['symbol'].endswith('USDT')][:max_symbols]
+    klines = {}
+    for symbol in symbols:
+        response = client.get_kline(category=category, symbol=symbol, interval=interval, limit=limit)
+        if response['retCode'] == 0:
+            klines[f"{symbol}|{interval}"] = response['result']['list']
+    with open(path, 'w') as f:
+        json.dump({'tickers': {category: tickers}, 'klines': klines}, f)
+    return len(klines)
+
+
+if __name__ == "__main__":
+    import argparse
+    from bybit_client import get_shared_client
+
+    parser = argparse.ArgumentParser(description="Record live Bybit responses for offline benchmarks.")
+    parser.add_argument('command', choices=['record'])
+    parser.add_argument('--out', default='benchmarks/responses.json')
+    parser.add_argument('--category', default='linear')
+    parser.add_argument('--interval', default='60')
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--symbols', type=int, default=50, help="Record the first N USDT symbols")
+    args = parser.parse_args()
+
+    count = record(get_shared_client(), args.out, args.category, args.interval, args.limit, args.symbols)
+    print(f"Recorded {count} symbols to {args.out}")
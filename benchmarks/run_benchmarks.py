@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+import subprocess
+import tempfile
+import platform
+import timeit
+import json
+import logging
+import os
+import time as tm
+
+from bybit_client import BybitClient
+from indicators.candles import Candles, decode_kline_rows
+from indicators.features import FeatureCache, StreamingEma
+from indicators import kernels
+from indicators.ema_indicator import EmaIndicator
+from indicators.registry import IndicatorGroup
+from trade_journal import TradeJournal, JOURNAL_COLUMNS
+from complex_bot_demo import PositionTable, TradingSimulator, EMA_PARAMS
+from benchmarks.fake_bybit import FakeBybitHTTP
+
+# =========================================================================
+# === OFFLINE BENCHMARKS (python -m benchmarks.run_benchmarks) ===
+# -------------------------------------------------------------------------
+# Repeatable timings of the hot paths against FakeBybitHTTP, written as
+# JSON so runs on different commits can be compared:
+#   scan        - full-universe scan, cold (full history) and warm (delta)
+#   decode_ema  - kline decode and EMA cost per symbol, 2-D EMA per universe
+#   log_trade   - journal append cost at growing history sizes
+#   sl_tp       - SL/TP check latency per snapshot and per streamed tick
+#
+#   python -m benchmarks.run_benchmarks --out bench.json
+#   python -m benchmarks.run_benchmarks --compare bench.json
+# =========================================================================
+
+PARAMS = {**EMA_PARAMS, 'KLINE_STORE_DIR': None, 'MIN_VOLUME_24H': 0}
+
+
+def best_time(fn, number, repeat=5):
+    """Best-of-`repeat` seconds per call."""
+    return min(timeit.Timer(fn).repeat(repeat=repeat, number=number)) / number
+
+
+def fake_client(fake, rate=10000, pool_size=16):
+    """The real shared-client code path (limiter, retries) on top of the fake HTTP methods."""
+    client = BybitClient(rate=rate, pool_size=pool_size, retry_delay=0.01, max_retry_delay=0.05, retry_budget=1000)
+    client.http = fake
+    return client
+
+
+# --- Benchmarks ---
+
+def bench_scan(symbols, latency, error_rate, workers, ranking):
+    fake = FakeBybitHTTP(symbols=symbols, latency=latency, error_rate=error_rate, return_response_headers=True)
+    params = {**PARAMS, 'SCAN_WORKERS': workers, 'SIGNAL_RANKING': ranking}
+    group = IndicatorGroup([EmaIndicator(params, client=fake_client(fake, pool_size=workers))])
+    result = {'symbols': symbols, 'latency': latency, 'error_rate': error_rate, 'workers': workers, 'ranking': ranking}
+    for phase in ('cold', 'warm'):
+        before = sum(fake.calls.values())
+        start = tm.perf_counter()
+        group.get_first_coin_to_buy()
+        result[f'{phase}_seconds'] = tm.perf_counter() - start
+        result[f'{phase}_requests'] = sum(fake.calls.values()) - before
+    return result
+
+
+def bench_decode_ema(symbols, limit):
+    fake = FakeBybitHTTP(symbols=1)
+    rows = fake.get_kline(category='linear', symbol='SYM000USDT', interval='60', limit=limit)['result']['list']
+    candles = Candles.from_rows(decode_kline_rows(rows))
+    closed = candles[:-1]
+    fast, slow = EMA_PARAMS['EMA_FAST_LENGTH'], EMA_PARAMS['EMA_SLOW_LENGTH']
+
+    def full_ema():
+        # Cold feature cache: both EMAs from scratch
+        FeatureCache().get('SYM000USDT', '60', closed, [('ema', fast), ('ema', slow)])
+
+    ema = StreamingEma(fast)
+    ema.reset(closed.close, int(closed.open_time[-1]))
+    matrix = np.tile(candles.close, (symbols, 1))
+    return {
+        'candles': limit,
+        'decode_us': best_time(lambda: Candles.from_rows(decode_kline_rows(rows)), 200) * 1e6,
+        'to_frame_us': best_time(candles.to_frame, 200) * 1e6,
+        'ema_full_us': best_time(full_ema, 50) * 1e6,
+        # One closed candle (the streaming EMA converges to the repeated close, so the timing does not drift)
+        'ema_update_us': best_time(lambda: ema.update(100.0, int(closed.open_time[-1])), 10000) * 1e6,
+        'ema_peek_us': best_time(lambda: ema.peek(100.0), 10000) * 1e6,
+        'ema_matrix_symbols': symbols,
+        'ema_matrix_ms': best_time(lambda: (kernels.ema(matrix, fast), kernels.ema(matrix, slow)), 20) * 1e3,
+    }
+
+
+def bench_log_trade(sizes, calls=200):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        simulator = TradingSimulator.__new__(TradingSimulator)
+        simulator.journal = TradeJournal(os.path.join(directory, 'bench.db'))
+        trade = ('SYM000USDT', 'Buy', 100.0, 101.0, 1.0, 1.0, 10001.0, '2024-01-01T00:00:00', '2024-01-01T01:00:00')
+        for size in sizes:
+            # Grow the history in bulk, then time single appends on top of it
+            missing = size - len(simulator.journal)
+            if missing > 0:
+                simulator.journal.conn.executemany(
+                    f"INSERT INTO trades ({', '.join(JOURNAL_COLUMNS)}) VALUES ({', '.join('?' * len(JOURNAL_COLUMNS))})",
+                    [trade] * missing
+                )
+                simulator.journal.conn.commit()
+            start = tm.perf_counter()
+            for _ in range(calls):
+                simulator.log_trade('SYM000USDT', 'Buy', 100.0, 101.0, 1.0, 10001.0, 1.0, '2024-01-01T00:00:00', '2024-01-01T01:00:00')
+            results.append({'history': size, 'log_trade_us': (tm.perf_counter() - start) / calls * 1e6})
+        simulator.journal.close()
+    return results
+
+
+def bench_sl_tp(position_counts, universe=300):
+    results = []
+    prices = {f"SYM{i:03d}USDT": 100.0 for i in range(max(universe, max(position_counts)))}
+    for count in position_counts:
+        positions = PositionTable()
+        for i in range(count):
+            positions.add({'symbol': f"SYM{i:03d}USDT", 'side': 'Buy' if i % 2 else 'Sell', 'entry_price': 100.0,
+                           'volume': 1.0, 'stop_loss': 99.0 if i % 2 else 101.0, 'take_profit': 101.0 if i % 2 else 99.0})
+
+        def on_tick():
+            # What a streamed ticker update costs (no exit hit)
+            if 'SYM000USDT' in positions:
+                positions.find_exits({'SYM000USDT': 100.0})
+
+        results.append({
+            'positions': count,
+            'snapshot_check_us': best_time(lambda: positions.find_exits(prices), 200) * 1e6,
+            'tick_check_us': best_time(on_tick, 2000) * 1e6,
+        })
+    return results
+
+
+# --- Runner ---
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_all(quick=False, symbols=300, latency=0.02, error_rate=0.0, workers=8):
+    if quick:
+        symbols, latency = min(symbols, 50), min(latency, 0.005)
+    results = {}
+    results['scan'] = [bench_scan(symbols, latency, error_rate, workers, ranking) for ranking in (None, 'spread')]
+    results['decode_ema'] = bench_decode_ema(symbols, EMA_PARAMS['KLINE_LIMIT'])
+    results['log_trade'] = bench_log_trade([0, 1000] if quick else [0, 1000, 10000, 100000])
+    results['sl_tp'] = bench_sl_tp([10, 100] if quick else [10, 100, 1000], universe=symbols)
+    return {
+        'commit': git_commit(),
+        'timestamp': tm.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'quick': quick,
+        'results': results,
+    }
+
+
+def flatten(results, prefix=''):
+    """{'scan.0.cold_seconds': 1.2, ...} for numeric leaves."""
+    flat = {}
+    items = results.items() if isinstance(results, dict) else enumerate(results)
+    for key, value in items:
+        name = f"{prefix}{key}"
+        if isinstance(value, (dict, list)):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(base, current):
+    """Prints current / base for every timing metric (> 1 = slower)."""
+    base_flat, current_flat = flatten(base['results']), flatten(current['results'])
+    print(f"Comparing {current.get('commit')} against {base.get('commit')}:")
+    for name, value in current_flat.items():
+        if name.endswith(('_seconds', '_us', '_ms')) and base_flat.get(name):
+            ratio = value / base_flat[name]
+            marker = ' ⚠️' if ratio > 1.2 else ''
+            print(f"  {name}: {base_flat[name]:.6g} -> {value:.6g} ({ratio:.2f}x){marker}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a fake Bybit API.")
+    parser.add_argument('--out', help="Write results as JSON to this file (default: print)")
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    parser.add_argument('--quick', action='store_true', help="Smaller sizes for a fast check")
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.02, help="Simulated seconds per API call")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of API calls failing")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--log-level', default='WARNING', help="Bot log level during the runs (INFO shows scan progress)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+
+    report = run_all(args.quick, args.symbols, args.latency, args.error_rate, args.workers)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Benchmark results written to {args.out}")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(json.load(f), report)
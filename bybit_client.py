@@ -0,0 +1,158 @@
+from pybit.unified_trading import HTTP
+from pybit.exceptions import InvalidRequestError
+from requests.adapters import HTTPAdapter
+import threading
+import random
+import time as tm
+import os
+from metrics import METRICS
+
+# =========================================================================
+# === SHARED BYBIT HTTP CLIENT (POOLING, RATE LIMIT, RETRY BUDGET) ===
+# -------------------------------------------------------------------------
+# One client per process (get_shared_client) used by the simulator and by
+# every indicator:
+#   * one keep-alive requests.Session with a connection pool sized for
+#     the scan workers (no TLS handshake per call);
+#   * one token bucket for all requests, paused until the reset time when
+#     Bybit's X-Bapi-Limit-Status header says the window is exhausted or
+#     a request is rejected with retCode 10006 (rate limit);
+#   * retries with exponential backoff and jitter, drawn from a shared
+#     retry budget so a failing API cannot multiply the request load.
+# =========================================================================
+
+RATE_LIMIT_RET_CODE = 10006
+
+METRICS.describe('bybit_api_request_seconds', "Latency of single Bybit API attempts by endpoint")
+METRICS.describe('bybit_api_retries_total', "Retried Bybit API calls by endpoint")
+METRICS.describe('bybit_api_errors_total', "Failed Bybit API attempts by endpoint and kind (rate_limit, ret_code, exception)")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second with bursts up to `capacity`."""
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = tm.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Blocks until one token is available and consumes it."""
+        while True:
+            with self.lock:
+                now = tm.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            tm.sleep(wait)
+
+    def try_acquire(self):
+        """Consumes one token if available, without blocking."""
+        with self.lock:
+            self._refill(tm.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def pause(self, seconds):
+        """Holds every acquire() for `seconds` (e.g. until a rate-limit window resets)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, tm.monotonic() + seconds)
+
+
+class BybitClient:
+    """
+    Drop-in for the pybit HTTP methods used by the bot (get_tickers, get_kline, ...).
+    Non-zero retCodes are returned as response dicts, like the API itself does.
+    """
+    def __init__(self, api_key=None, api_secret=None, testnet=False, rate=20, pool_size=16,
+                 max_retries=3, retry_delay=1, max_retry_delay=8, retry_budget=10, retry_refill=0.5):
+        # Single attempt inside pybit: retries are handled (and budgeted) here
+        self.http = HTTP(api_key=api_key, api_secret=api_secret, testnet=testnet,
+                         max_retries=1, retry_codes={10002}, return_response_headers=True)
+        self.http.client.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=pool_size))
+        self.testnet = testnet
+        self.limiter = TokenBucket(rate)
+        self.retry_budget = TokenBucket(retry_refill, retry_budget)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+    def _apply_rate_limit_headers(self, headers):
+        if not headers:
+            return
+        remaining = headers.get('X-Bapi-Limit-Status')
+        reset_ms = headers.get('X-Bapi-Limit-Reset-Timestamp')
+        if remaining is not None and reset_ms is not None and int(remaining) <= 1:
+            self.limiter.pause(max(0.0, int(reset_ms) / 1000 - tm.time()))
+
+    def call(self, method, **kwargs):
+        """Calls an HTTP method by name through the shared limiter and retry budget."""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            start = tm.perf_counter()
+            try:
+                response, _, headers = getattr(self.http, method)(**kwargs)
+                METRICS.observe('bybit_api_request_seconds', tm.perf_counter() - start, endpoint=method)
+                self._apply_rate_limit_headers(headers)
+                return response
+            except InvalidRequestError as e:
+                METRICS.observe('bybit_api_request_seconds', tm.perf_counter() - start, endpoint=method)
+                if e.status_code != RATE_LIMIT_RET_CODE:
+                    METRICS.inc('bybit_api_errors_total', endpoint=method, kind='ret_code')
+                    return {'retCode': e.status_code, 'retMsg': e.message, 'result': {}}
+                # Rate limited: hold all requests until the window resets, then retry
+                METRICS.inc('bybit_api_errors_total', endpoint=method, kind='rate_limit')
+                reset_ms = (e.resp_headers or {}).get('X-Bapi-Limit-Reset-Timestamp')
+                self.limiter.pause(max(0.0, int(reset_ms) / 1000 - tm.time()) if reset_ms else 1.0)
+                error = e
+            except Exception as e:
+                METRICS.inc('bybit_api_errors_total', endpoint=method, kind='exception')
+                error = e
+
+            if attempt == self.max_retries or not self.retry_budget.try_acquire():
+                break
+            METRICS.inc('bybit_api_retries_total', endpoint=method)
+            delay = min(self.max_retry_delay, self.retry_delay * (2 ** attempt))
+            tm.sleep(delay * random.uniform(0.5, 1.0))
+        raise error
+
+    def get_tickers(self, **kwargs):
+        return self.call('get_tickers', **kwargs)
+
+    def get_kline(self, **kwargs):
+        return self.call('get_kline', **kwargs)
+
+    def __getattr__(self, name):
+        # Any other pybit endpoint goes through the same limiter and retries
+        if name.startswith('_') or not hasattr(HTTP, name):
+            raise AttributeError(name)
+        return lambda **kwargs: self.call(name, **kwargs)
+
+
+# --- Process-wide instances, one per network ---
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_client(testnet=False, **settings):
+    """Returns the process-wide BybitClient (settings apply when it is first created)."""
+    with _shared_lock:
+        if testnet not in _shared_clients:
+            _shared_clients[testnet] = BybitClient(
+                api_key=os.getenv('BYBIT_API_KEY'),
+                api_secret=os.getenv('BYBIT_API_SECRET'),
+                testnet=testnet,
+                **settings
+            )
+        return _shared_clients[testnet]
@@ -0,0 +1,80 @@
+import pandas as pd
+import time as tm
+
+# =========================================================================
+# === CLOCK (WALL CLOCK OR SIMULATED REPLAY TIME) ===
+# -------------------------------------------------------------------------
+# Everything in the bot that depends on "now" (candle boundaries, ticker
+# TTLs, loop pauses, trade timestamps) goes through this module, so a
+# replay can swap in a simulated clock with `set_clock`. Background
+# threads and I/O timeouts keep using real time.
+# =========================================================================
+
+class SystemClock:
+    def time(self):
+        return tm.time()
+
+    def monotonic(self):
+        return tm.monotonic()
+
+    def sleep(self, seconds):
+        tm.sleep(seconds)
+
+    def timestamp(self):
+        """Local wall time as a pd.Timestamp (as stored in the trade journal)."""
+        return pd.Timestamp.now()
+
+
+class ReplayFinished(BaseException):
+    """Raised by ReplayClock.sleep at the end of the replay (BaseException, so `except Exception` loops stop)."""
+
+
+class ReplayClock:
+    """Simulated time that only moves when the bot sleeps: a replay runs as fast as the CPU allows."""
+    def __init__(self, start, end=None):
+        self.now = float(start)
+        self.end = end
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+        if self.end is not None and self.now >= self.end:
+            raise ReplayFinished()
+
+    def timestamp(self):
+        return pd.Timestamp.fromtimestamp(self.now)
+
+
+_clock = SystemClock()
+
+
+def set_clock(clock):
+    """Replaces the process-wide clock (returns the previous one)."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def get_clock():
+    return _clock
+
+
+def time():
+    return _clock.time()
+
+
+def monotonic():
+    return _clock.monotonic()
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
+
+
+def timestamp():
+    return _clock.timestamp()
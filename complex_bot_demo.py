@@ -1,17 +1,32 @@
 import pandas as pd
-import pandas_ta as ta
-import time as tm
 import numpy as np
+import threading
 import os
+import logging
+import clock
 from dotenv import load_dotenv
-from pybit.unified_trading import HTTP
+from bybit_client import get_shared_client
+from trade_journal import TradeJournal
+from state_store import StateStore
+from price_stream import PriceStream
+from ticker_cache import TickerCache
+from scan_scheduler import ScanScheduler
+from metrics import METRICS, start_http_exporter, start_json_dump
 # import requests удален
 
 # =========================================================================
 # === INDICATOR IMPORTS BLOCK ===
 # -------------------------------------------------------------------------
 # =========================================================================
-from indicators.ema_indicator import EmaIndicator
+from indicators.registry import create_indicator, IndicatorGroup
+import indicators.ema_indicator # registers strategy type 1
+
+log = logging.getLogger('bot')
+
+METRICS.describe('signal_to_entry_seconds', "Time from a returned signal to the opened position")
+METRICS.describe('candle_close_to_entry_seconds', "Time from the candle close to the opened position",
+                 buckets=(1, 2, 5, 10, 30, 60, 300, 900, 3600))
+METRICS.describe('trade_log_write_seconds', "Duration of one trade journal append")
 
 
 # =========================================================================
@@ -23,6 +38,8 @@ from indicators.ema_indicator import EmaIndicator
 # Только EMA Indicator (ID 1)
 # -------------------------------------------------------------------------
 # 1 = EMA Indicator (Trend Following)
+# A list (e.g. [1, 2]) runs several registered strategies in one process,
+# sharing one kline fetch per symbol and one per-candle feature cache.
 STRATEGY_TYPE = 1 # ( EMA: 1)
 
 # Ensure you have openpyxl installed to work with Excel: pip install openpyxl
@@ -32,6 +49,8 @@ load_dotenv() # Load environment variables from .env
 DEFAULT_BALANCE = 10000 
 RISK_PER_TRADE_USDT = 1.0 # <--- Maximum risk in USDT per trade
 TRADING_MODE = 2 # <--- 0=LONG ONLY, 1=SHORT ONLY, 2=BOTH (LONG & SHORT)
+MAX_OPEN_POSITIONS = 10 # <--- Maximum number of concurrent positions
+MAX_TOTAL_RISK_USDT = 10.0 # <--- Maximum combined SL risk of all open positions
 
 # --- BYBIT FEES ---
 TAKER_FEE_PERCENT = 0.055
@@ -42,19 +61,60 @@ ENTRY_FEE_TYPE = 'TAKER'
 MIN_VOLUME_24H = 150000000  
 MAX_VOLUME_24H = 1000000000000 
 
-# --- RETRY MECHANISM ---
+# --- RETRY MECHANISM (SHARED BY ALL API CALLS) ---
 MAX_RETRIES = 3 
-RETRY_DELAY = 1 
+RETRY_DELAY = 1 # <--- Base backoff in seconds (doubled per attempt, with jitter)
+RETRY_BUDGET = 10 # <--- Retries available in a burst across the whole process (refills at 0.5/s)
+
+# --- API RATE LIMIT AND CONNECTION POOL ---
+API_RATE_LIMIT = 20 # <--- Max requests per second for the whole process (Bybit IP limit: 600 per 5s)
+HTTP_POOL_SIZE = 16 # <--- Keep-alive connections (at least SCAN_WORKERS)
+
+# --- UNIVERSE SCAN (CONCURRENCY AND SCHEDULE) ---
+SCAN_WORKERS = 8 # <--- Parallel kline requests during a scan (1 = sequential)
+SCAN_SETTLE_SECONDS = 2 # <--- Delay after a candle close before the scan (lets Bybit publish the new candle)
+PREVIEW_SCAN_SECONDS = None # <--- Intrabar rescan period between closes (None = scan on candle close only)
+POSITION_CHECK_SECONDS = 10 # <--- Max pause between SL/TP checks of open positions
+SIGNAL_RANKING = None # <--- Best signals of the whole universe by 'spread', 'turnover' or 'volatility' (None = first signals in ticker order)
+
+# --- LOGGING AND METRICS ---
+LOG_LEVEL = 'INFO' # <--- 'DEBUG', 'INFO', 'WARNING', 'ERROR' or None to turn console output off
+METRICS_PORT = None # <--- e.g. 9108 serves Prometheus metrics on http://127.0.0.1:9108/metrics (None = off)
+METRICS_JSON_FILE = 'bot_metrics.json' # <--- Snapshot of all metrics, rewritten every METRICS_JSON_EVERY seconds (None = off)
+METRICS_JSON_EVERY = 60
+
+# --- PRICE STREAM (SL/TP MONITORING) ---
+USE_PRICE_STREAM = True # <--- Check SL/TP on every WebSocket ticker update (REST polling as fallback)
+PRICE_STREAM_URL = None # <--- None = Bybit public stream; e.g. 'ws://localhost:8765' for a local stand-in server
+STREAM_STALE_SECONDS = 10 # <--- Without a ticker update for this long, fall back to REST polling
+
+# --- TICKER SNAPSHOT CACHE ---
+TICKER_CACHE_TTL = 5 # <--- Max age (seconds) of the shared get_tickers snapshot used for prices and the universe filter
+
+# --- SUPERVISOR MODE (python supervisor.py) ---
+SCAN_SHARDS = [('linear', '60')] # <--- (category, interval) pairs scanned by worker processes with the STRATEGY_TYPE strategies
+SCAN_PROCESSES = None # <--- Worker processes per pair, each scanning a share of the symbols (None = CPU cores / pairs)
+SIGNAL_QUEUE_SIZE = 1000 # <--- Max pending signals; workers drop new signals while the queue is full
+SIGNAL_MAX_AGE_SECONDS = 60 # <--- Signals waiting longer than this are discarded by the executor
+WORKER_RESTART_DELAY = 5 # <--- Delay before restarting a failed worker (doubled per consecutive failure, max 5 minutes)
+
+# --- LOCAL MARKET DATA ---
+KLINE_STORE_DIR = 'kline_store' # <--- On-disk kline history (None = always download from the API)
 
 # =========================================================================
 # === 🛠️ UNIFIED PARAMETERS MAP FOR ALL INDICATORS (PARAMS_MAP) ===
 # =========================================================================
 
 # BASE LIQUIDITY PARAMETERS
-BASE_PARAMS = {'MIN_VOLUME_24H': MIN_VOLUME_24H, 'MAX_VOLUME_24H': MAX_VOLUME_24H}
+BASE_PARAMS = {'MIN_VOLUME_24H': MIN_VOLUME_24H, 'MAX_VOLUME_24H': MAX_VOLUME_24H, 'SCAN_WORKERS': SCAN_WORKERS, 'KLINE_STORE_DIR': KLINE_STORE_DIR, 'SIGNAL_RANKING': SIGNAL_RANKING}
 
 # 1: EMA Indicator
-EMA_PARAMS = {**BASE_PARAMS, 'SL_PERCENT': 0.8, 'TP_PERCENT': 1.0, 'EMA_FAST_LENGTH': 10, 'EMA_SLOW_LENGTH': 20, 'KLINE_LIMIT': 200, 'CATEGORY': 'linear', 'KLINE_INTERVAL': '60'}
+EMA_PARAMS = {**BASE_PARAMS, 'SL_PERCENT': 0.8, 'TP_PERCENT': 1.0, 'EMA_FAST_LENGTH': 10, 'EMA_SLOW_LENGTH': 20, 'KLINE_LIMIT': 200, 'CATEGORY': 'linear', 'KLINE_INTERVAL': '60', 'EMA_RECONCILE_EVERY': 24}
+
+# --- ⚠️ Defining the final PARAMS_MAP ---
+PARAMS_MAP = {
+    1: EMA_PARAMS
+}
 
 # =========================================================================
 # === FUNCTION: CALCULATE VOLUME BASED ON RISK ===
@@ -80,109 +140,238 @@ def calculate_volume_from_risk(risk_usdt, entry_price, sl_percent):
     # Add a small buffer to avoid exceeding the limit
     return volume * 0.999 
 
+# =========================================================================
+# === CLASS: PositionTable (Open Positions as NumPy Arrays) ===
+# =========================================================================
+
+class PositionTable:
+    """
+    Open positions stored row-wise in parallel NumPy arrays, so SL/TP of every
+    position is checked against a price snapshot in one vectorized pass.
+    Removing a position moves the last row into its slot (O(1)).
+    """
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.symbols = []
+        self.trades = []
+        self.rows = {} # {symbol: row}
+        self.side = np.zeros(capacity, dtype=np.int8) # +1 = Buy (Long), -1 = Sell (Short)
+        self.entry_price = np.zeros(capacity)
+        self.volume = np.zeros(capacity)
+        self.stop_loss = np.zeros(capacity)
+        self.take_profit = np.zeros(capacity)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, symbol):
+        return symbol in self.rows
+
+    def _grow(self):
+        for name in ('side', 'entry_price', 'volume', 'stop_loss', 'take_profit'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+
+    def add(self, trade):
+        if self.size == len(self.side):
+            self._grow()
+        row = self.size
+        self.side[row] = 1 if trade['side'] == 'Buy' else -1
+        self.entry_price[row] = trade['entry_price']
+        self.volume[row] = trade['volume']
+        self.stop_loss[row] = trade['stop_loss']
+        self.take_profit[row] = trade['take_profit']
+        self.symbols.append(trade['symbol'])
+        self.trades.append(trade)
+        self.rows[trade['symbol']] = row
+        self.size += 1
+
+    def remove(self, symbol):
+        row = self.rows.pop(symbol)
+        last = self.size - 1
+        if row != last:
+            for array in (self.side, self.entry_price, self.volume, self.stop_loss, self.take_profit):
+                array[row] = array[last]
+            self.symbols[row] = self.symbols[last]
+            self.trades[row] = self.trades[last]
+            self.rows[self.symbols[row]] = row
+        self.symbols.pop()
+        self.trades.pop()
+        self.size -= 1
+
+    def get(self, symbol):
+        row = self.rows.get(symbol)
+        return None if row is None else self.trades[row]
+
+    def total_risk(self):
+        """Combined loss in USDT if every open position hits its stop loss."""
+        n = self.size
+        return float(np.sum(self.volume[:n] * np.abs(self.entry_price[:n] - self.stop_loss[:n])))
+
+    def find_exits(self, prices):
+        """Returns [(symbol, price)] of positions whose SL or TP is hit by the {symbol: price} snapshot."""
+        n = self.size
+        if n == 0:
+            return []
+        current = np.array([prices.get(symbol, np.nan) for symbol in self.symbols], dtype=np.float64)
+        side = self.side[:n]
+        # Long: price >= TP or price <= SL; Short: price <= TP or price >= SL (NaN never hits)
+        hit_tp = np.where(side == 1, current >= self.take_profit[:n], current <= self.take_profit[:n])
+        hit_sl = np.where(side == 1, current <= self.stop_loss[:n], current >= self.stop_loss[:n])
+        return [(self.symbols[row], float(current[row])) for row in np.flatnonzero(hit_tp | hit_sl)]
+
 # =========================================================================
 # === CLASS: TradingSimulator (Execution and Accounting Simulator) ===
 # =========================================================================
 
 class TradingSimulator:
     
-    def __init__(self, test_net=False):
-        self.balance_file = 'balance.txt'
-        self.history_file = 'trade_history.xlsx'
+    def __init__(self, test_net=False, data_dir='.', client=None, background_tickers=True):
+        self.balance_file = os.path.join(data_dir, 'balance.txt')
+        self.history_file = os.path.join(data_dir, 'trade_history.xlsx')
+        self.journal_file = os.path.join(data_dir, 'trade_journal.db')
+        # Balance and open positions survive restarts
+        self.state = StateStore(os.path.join(data_dir, 'bot_state'))
         self.balance = self.load_balance()
-        self.active_trade = {}
-        # Loading API keys from .env file
-        BYBIT_API_KEY = os.getenv('BYBIT_API_KEY')
-        BYBIT_API_SECRET = os.getenv('BYBIT_API_SECRET')
-        # Initializing the Bybit client
-        self.client = HTTP(api_key=BYBIT_API_KEY, api_secret=BYBIT_API_SECRET, testnet=test_net)
+        self.journal = TradeJournal(self.journal_file)
+        if len(self.journal) == 0 and os.path.exists(self.history_file):
+            # One-time migration of the old Excel history into the journal
+            imported = self.journal.import_excel(self.history_file)
+            log.info(f"Imported {imported} trades from {self.history_file} into {self.journal_file}")
+        self.positions = PositionTable()
+        self.restore_positions()
+        # Process-wide Bybit client (API keys from .env), shared with the indicators; replays pass their own
+        self.client = client or get_shared_client(
+            test_net,
+            rate=API_RATE_LIMIT,
+            pool_size=HTTP_POOL_SIZE,
+            max_retries=MAX_RETRIES,
+            retry_delay=RETRY_DELAY,
+            retry_budget=RETRY_BUDGET
+        )
+        # Shared ticker snapshots (prices and universe filter)
+        self.tickers = TickerCache(self.client, ttl=TICKER_CACHE_TTL, background=background_tickers)
+        self.track_positions()
 
     # --- Balance and Log Management Methods ---
     
     def load_balance(self):
-        # Loads the balance from balance.txt or uses DEFAULT_BALANCE
+        # Loads the balance from the state store (or a legacy balance.txt) or uses DEFAULT_BALANCE
+        if self.state.balance is not None:
+            log.info(f"Balance restored from state: {self.state.balance:.2f} USDT")
+            return self.state.balance
         if os.path.exists(self.balance_file):
             with open(self.balance_file, 'r') as f:
                 try:
                     balance = float(f.read())
-                    print(f"Balance loaded from file: {balance:.2f} USDT")
+                    log.info(f"Balance loaded from file: {balance:.2f} USDT")
+                    self.save_balance(balance)
                     return balance
                 except (ValueError, FileNotFoundError):
-                    print("Error reading balance file. Using default initial balance.")
+                    log.warning("Error reading balance file. Using default initial balance.")
                     self.save_balance(DEFAULT_BALANCE)
                     return DEFAULT_BALANCE
         else:
-            print(f"Balance file not found. Creating file and using initial balance: {DEFAULT_BALANCE:.2f} USDT")
+            log.info(f"No saved balance found. Using initial balance: {DEFAULT_BALANCE:.2f} USDT")
             self.save_balance(DEFAULT_BALANCE)
             return DEFAULT_BALANCE
 
     def save_balance(self, new_balance):
-        # Saves the current balance to the file
-        with open(self.balance_file, 'w') as f:
-            f.write(str(new_balance))
+        # Saves the current balance to the state store (journaled, fsynced)
+        self.state.set_balance(new_balance)
+
+    def restore_positions(self):
+        # Restores the open positions recorded before a restart
+        for trade in self.state.positions.values():
+            trade = dict(trade, timestamp_open=pd.Timestamp(trade['timestamp_open']))
+            if 'stop_loss' not in trade:
+                # Positions saved before SL/TP levels were stored: use the EMA strategy levels
+                sign = 1 if trade['side'] == 'Buy' else -1
+                trade['stop_loss'] = trade['entry_price'] * (1 - sign * EMA_PARAMS['SL_PERCENT'] / 100)
+                trade['take_profit'] = trade['entry_price'] * (1 + sign * EMA_PARAMS['TP_PERCENT'] / 100)
+            self.positions.add(trade)
+            log.info(f"Open position restored: {trade['side']} {trade['volume']:.4f} {trade['symbol']} at price {trade['entry_price']:.4f}")
+
+    def track_positions(self):
+        # Prices of categories with open positions are refreshed in the background, the rest on read
+        self.tickers.set_tracked({trade['category'] for trade in self.positions.trades})
+
+    def can_open(self, symbol, risk_usdt):
+        # Position count and total risk caps
+        return (symbol not in self.positions and
+                len(self.positions) < MAX_OPEN_POSITIONS and
+                self.positions.total_risk() + risk_usdt <= MAX_TOTAL_RISK_USDT)
 
     # --- Price Fetching Method ---
     
     def get_current_price(self, symbol, category):
         # Gets the latest price for the given symbol and category (linear/spot)
-        for attempt in range(MAX_RETRIES):
-            try:
-                # ... (API price fetching code) ...
-                response = self.client.get_tickers(category=category, symbol=symbol)
+        price = self.tickers.get_price(category, symbol)
+        if price is not None:
+            return price
+
+        # Not in the snapshot: ask the API for this symbol only (the client retries)
+        try:
+            response = self.client.get_tickers(category=category, symbol=symbol)
+            
+            if response['retCode'] == 0:
+                data_list = response['result']['list']
                 
-                if response['retCode'] == 0:
-                    data_list = response['result']['list']
-                    
-                    if data_list:
-                        return float(data_list[0]['lastPrice'])
-                    else:
-                        print(f"⚠️ Attempt {attempt + 1}: API returned an empty ticker list for {symbol}.")
+                if data_list:
+                    return float(data_list[0]['lastPrice'])
                 else:
-                    print(f"❌ Attempt {attempt + 1}: Bybit API error ({response['retCode']}): {response.get('retMsg', 'No message')}")
-                
-            except Exception as e:
-                print(f"🛑 Attempt {attempt + 1}: Critical error fetching price for {symbol}: {e}")
-
-            if attempt < MAX_RETRIES - 1:
-                delay = RETRY_DELAY * (2 ** attempt) 
-                print(f"--> Waiting {delay}s before retry...")
-                tm.sleep(delay)
+                    log.warning(f"⚠️ API returned an empty ticker list for {symbol}.")
+            else:
+                log.error(f"❌ Bybit API error ({response['retCode']}): {response.get('retMsg', 'No message')}")
+            
+        except Exception as e:
+            log.error(f"🛑 Critical error fetching price for {symbol}: {e}")
         return None
 
+    def get_price_snapshot(self, category):
+        # Last prices of every symbol in the category from the shared snapshot: {symbol: price}
+        return self.tickers.get_prices(category)
+
     # --- Position Opening and Closing Methods ---
     
-    def open_position(self, symbol, side, entry_price, volume, category):
-        # Records the open position data in active_trade
-        self.active_trade = {
+    def open_position(self, symbol, side, entry_price, volume, category, stop_loss_price, take_profit_price):
+        # Records the open position in the position table
+        trade = {
             'symbol': symbol,
             'side': side,
             'entry_price': entry_price,
             'volume': volume,
             'status': 'OPEN',
-            'timestamp_open': pd.Timestamp.now(),
-            'category': category
+            'timestamp_open': clock.timestamp(),
+            'category': category,
+            'stop_loss': stop_loss_price,
+            'take_profit': take_profit_price
         }
+        self.positions.add(trade)
+        self.track_positions()
         
         # Accounting for entry fee
         fee_rate = TAKER_FEE_PERCENT if ENTRY_FEE_TYPE == 'TAKER' else MAKER_FEE_PERCENT
         trade_cost_usdt = entry_price * volume 
         fee_amount = trade_cost_usdt * (fee_rate / 100)
         self.balance -= fee_amount
-        self.save_balance(self.balance)
+        trade['entry_fee'] = fee_amount
+        self.state.open_position(symbol, dict(trade, timestamp_open=trade['timestamp_open'].isoformat()), self.balance)
         
         fee_action = "debited (Taker)" if fee_amount > 0 else "added (Maker Rebate)"
         
-        print(f"Position opened: {side} {volume:.4f} {symbol} at price {entry_price:.4f}")
-        print(f"Fee: {abs(fee_amount):.4f} USDT ({fee_action})")
+        log.info(f"Position opened: {side} {volume:.4f} {symbol} at price {entry_price:.4f}")
+        log.info(f"Fee: {abs(fee_amount):.4f} USDT ({fee_action})")
         
-    def close_position(self, close_price):
+    def close_position(self, symbol, close_price):
         # Closes the position, calculates PnL, updates balance, and logs the trade
-        if not self.active_trade:
+        trade = self.positions.get(symbol)
+        if trade is None:
             return
         
-        side = self.active_trade['side']
-        entry_price = self.active_trade['entry_price']
-        volume = self.active_trade['volume']
+        side = trade['side']
+        entry_price = trade['entry_price']
+        volume = trade['volume']
         
         pnl = 0
         if side == 'Buy':
@@ -197,63 +386,66 @@ class TradingSimulator:
         fee_amount_close = close_value_usdt * (TAKER_FEE_PERCENT / 100)
         
         self.balance -= fee_amount_close
-        timestamp_close = pd.Timestamp.now()
+        timestamp_close = clock.timestamp()
+        # Positions opened before entry fees were stored: fee at the current entry rate
+        entry_fee_rate = TAKER_FEE_PERCENT if ENTRY_FEE_TYPE == 'TAKER' else MAKER_FEE_PERCENT
+        entry_fee = trade.get('entry_fee', entry_price * volume * entry_fee_rate / 100)
 
-        # Logging to Excel
+        # Logging to the trade journal
         self.log_trade(
-            symbol=self.active_trade['symbol'],
+            symbol=symbol,
             side=side,
             entry_price=entry_price,
             close_price=close_price,
             pnl=pnl, 
             new_balance=self.balance,
             volume=volume,
-            timestamp_open=self.active_trade['timestamp_open'],
-            timestamp_close=timestamp_close
+            timestamp_open=trade['timestamp_open'],
+            timestamp_close=timestamp_close,
+            fees=entry_fee + fee_amount_close
         )
         
-        self.save_balance(self.balance)
+        self.positions.remove(symbol)
+        self.track_positions()
+        self.state.close_position(symbol, self.balance)
         
         # Formatting message for console (instead of Telegram)
-        pnl_percent = (pnl / (self.active_trade['volume'] * self.active_trade['entry_price'])) * 100 if self.active_trade['entry_price'] > 0 else 0
+        pnl_percent = (pnl / (volume * entry_price)) * 100 if entry_price > 0 else 0
         pnl_emoji = "✅" if pnl >= 0 else "❌"
         total_pnl_net = pnl - fee_amount_close 
         timestamp_close_str = timestamp_close.strftime('%Y-%m-%d %H:%M:%S')
 
-        print(f"\n--- TRADE CLOSED ---")
-        print(f"{pnl_emoji} Instrument: {self.active_trade['symbol']}")
-        print(f"Type: {side}")
-        print(f"PnL (NET): {total_pnl_net:.2f} USDT ({pnl_percent:.2f}%)")
-        print(f"Exit Fee: {fee_amount_close:.4f} USDT")
-        print(f"Entry Price: {entry_price:.8f}")
-        print(f"Exit Price: {close_price:.8f}")
-        print(f"New Balance: {self.balance:.2f} USDT")
-        print(f"Time: {timestamp_close_str}")
-        print("--------------------\n")
-        
-        self.active_trade = {}
-
-    def log_trade(self, symbol, side, entry_price, close_price, pnl, new_balance, volume, timestamp_open, timestamp_close):
-        # Adds the trade record to the Excel file
-        # ... (Excel logging code) ...
-        new_trade = pd.DataFrame([{
-            'Symbol': symbol,
-            'Side': side,
-            'Entry Price': entry_price,
-            'Close Price': close_price,
-            'Volume': volume,
-            'PnL': pnl, 
-            'New Balance': new_balance,
-            'Open Time': timestamp_open,
-            'Close Time': timestamp_close
-        }])
-
-        if not os.path.exists(self.history_file):
-            new_trade.to_excel(self.history_file, index=False, sheet_name='Trade History')
-        else:
-            existing_df = pd.read_excel(self.history_file, sheet_name='Trade History')
-            updated_df = pd.concat([existing_df, new_trade], ignore_index=True)
-            updated_df.to_excel(self.history_file, index=False, sheet_name='Trade History')
+        log.info(f"\n--- TRADE CLOSED ---")
+        log.info(f"{pnl_emoji} Instrument: {symbol}")
+        log.info(f"Type: {side}")
+        log.info(f"PnL (NET): {total_pnl_net:.2f} USDT ({pnl_percent:.2f}%)")
+        log.info(f"Exit Fee: {fee_amount_close:.4f} USDT")
+        log.info(f"Entry Price: {entry_price:.8f}")
+        log.info(f"Exit Price: {close_price:.8f}")
+        log.info(f"New Balance: {self.balance:.2f} USDT")
+        log.info(f"Time: {timestamp_close_str}")
+        log.info("--------------------\n")
+
+    def close_hit_positions(self, prices):
+        # Closes every position whose SL or TP is hit by the {symbol: price} snapshot
+        for symbol, price in self.positions.find_exits(prices):
+            self.close_position(symbol, price)
+
+    def log_trade(self, symbol, side, entry_price, close_price, pnl, new_balance, volume, timestamp_open, timestamp_close, fees=0.0):
+        # Appends the trade record to the journal and updates the running statistics (report: python trade_stats.py, Excel: python trade_journal.py export)
+        with METRICS.time('trade_log_write_seconds'):
+            self.journal.append(
+                symbol=symbol,
+                side=side,
+                entry_price=entry_price,
+                close_price=close_price,
+                pnl=pnl,
+                new_balance=new_balance,
+                volume=volume,
+                timestamp_open=timestamp_open,
+                timestamp_close=timestamp_close,
+                fees=fees
+            )
 
 
 # =========================================================================
@@ -264,115 +456,200 @@ class TradingBot:
     """
     The main trading bot class that manages cycles and calls the selected indicator.
     """
-    def __init__(self, simulator, strategy_type, params_map):
-        self.simulator = simulator
-        self.strategy_type = strategy_type
+    def __init__(self, simulator, strategy_type, params_map, use_price_stream=None):
+        self.strategy_types = list(strategy_type) if isinstance(strategy_type, (list, tuple)) else [strategy_type]
         
-        # INDICATOR CLASS MAP 
-        indicator_map = {
-            1: EmaIndicator 
-        }
-        
-        self.current_params = params_map[strategy_type] 
-        IndicatorClass = indicator_map.get(self.strategy_type)
+        # Indicators come from the registry (@register_indicator); several run as one group
+        self.indicator = IndicatorGroup([
+            create_indicator(type_id, params_map[type_id], test_net=simulator.client.testnet, client=simulator.client)
+            for type_id in self.strategy_types
+        ])
+        self.indicator.set_shared(ticker_cache=simulator.tickers)
+        self._init_execution(simulator, {self.indicator.category}, use_price_stream)
+
+        # Full scans right after each candle close of the strategies' intervals
+        self.scheduler = ScanScheduler(self.indicator.intervals, settle_delay=SCAN_SETTLE_SECONDS, preview_every=PREVIEW_SCAN_SECONDS)
+        self.restore_schedule(self.indicator.category, self.scheduler)
+
+    def restore_schedule(self, category, scheduler):
+        """Candles processed before a restart are not scanned (and acted on) again."""
+        for interval in scheduler.steps:
+            scheduler.restore(interval, self.simulator.state.last_scanned(category, interval))
+
+    def record_scan(self, category, intervals, symbols, scheduler):
+        """Persists the closed candles of `intervals` just scanned for `symbols`."""
+        for interval in intervals:
+            self.simulator.state.set_last_candles(category, interval, symbols, scheduler.last_closed(interval))
+
+    def _init_execution(self, simulator, categories, use_price_stream=None):
+        """Entry and SL/TP state, shared with the supervisor's SignalExecutor."""
+        self.simulator = simulator
+        self.categories = set(categories)
+
+        # Streamed ticker updates close positions from the stream thread (one stream serves one category;
+        # with several, SL/TP is checked by REST polling)
+        self.trade_lock = threading.Lock()
+        self.price_stream = None
+        if (USE_PRICE_STREAM if use_price_stream is None else use_price_stream) and len(self.categories) == 1:
+            self.price_stream = PriceStream(
+                next(iter(self.categories)),
+                testnet=simulator.client.testnet,
+                url=PRICE_STREAM_URL,
+                on_price=self.on_tick,
+                stale_after=STREAM_STALE_SECONDS
+            ).start()
+            # No background ticker refresh while the stream has fresh prices for every position
+            simulator.tickers.set_covered(self.stream_covers)
+
+    def stream_covers(self, category=None):
+        """True while the price stream has a fresh price for every open position (of `category`)."""
+        if self.price_stream is None:
+            return False
+        return all(self.price_stream.get_price(trade['symbol']) is not None
+                   for trade in list(self.simulator.positions.trades)
+                   if category is None or trade['category'] == category)
+
+    def on_tick(self, symbol, price):
+        """Price stream callback: checks SL/TP of the symbol's position on every ticker update."""
+        if symbol in self.simulator.positions:
+            with self.trade_lock:
+                self.simulator.close_hit_positions({symbol: price})
+
+    def stop_levels(self, side, entry_price, params):
+        """SL and TP prices from the parameters of the strategy that gave the signal."""
+        stop_loss_percent = params['SL_PERCENT']
+        take_profit_percent = params['TP_PERCENT']
+        if side == 'Buy': # Long
+            return (entry_price * (1 - stop_loss_percent / 100),
+                    entry_price * (1 + take_profit_percent / 100))
+        return (entry_price * (1 + stop_loss_percent / 100), # Short
+                entry_price * (1 - take_profit_percent / 100))
+
+    def manage_open_positions(self):
+        """Manages open positions: checks SL and TP of all of them against one ticker snapshot."""
+        positions = self.simulator.positions
+        if self.price_stream is not None:
+            for streamed in list(self.price_stream.symbols):
+                if streamed not in positions:
+                    self.price_stream.unsubscribe(streamed)
+            for symbol in positions.symbols:
+                self.price_stream.subscribe(symbol)
+            if self.stream_covers():
+                # The stream checks SL/TP on every tick
+                return
+
+        # No fresh streamed prices: one REST call per category
+        prices = self.position_prices()
+        with self.trade_lock:
+            self.simulator.close_hit_positions(prices)
+
+        for trade in list(positions.trades):
+            current_price = prices.get(trade['symbol'])
+            if current_price is not None:
+                direction = 'Long' if trade['side'] == 'Buy' else 'Short'
+                log.debug(f"Position {trade['symbol']} ({direction}): Current price {current_price:.4f} (entry: {trade['entry_price']:.4f}). Waiting...")
+
+    def position_prices(self):
+        """{symbol: last price} of the open positions from one ticker snapshot per category."""
+        snapshots = {}
+        prices = {}
+        for trade in self.simulator.positions.trades:
+            category = trade['category']
+            if category not in snapshots:
+                snapshots[category] = self.simulator.get_price_snapshot(category)
+            price = snapshots[category].get(trade['symbol'])
+            if price is not None:
+                prices[trade['symbol']] = price
+        return prices
+
+    def has_capacity(self):
+        """True if another position fits under MAX_OPEN_POSITIONS and MAX_TOTAL_RISK_USDT."""
+        positions = self.simulator.positions
+        return (len(positions) < MAX_OPEN_POSITIONS and
+                positions.total_risk() + RISK_PER_TRADE_USDT <= MAX_TOTAL_RISK_USDT)
+
+    def enter_position(self, signal):
+        """Opens a position for a [symbol, signal, category, indicator] signal. Returns True if one was opened."""
+        symbol, signal_type, category, indicator = signal
         
-        if IndicatorClass and self.strategy_type == 1:
-            # Create an instance of the required indicator
-            self.indicator = IndicatorClass(self.current_params, test_net=simulator.client.testnet)
-        else:
-            raise ValueError(f"Strategy type {self.strategy_type} is not implemented. Only EMA (ID 1) is supported in this file.")
+        # Check category
+        if category not in self.categories:
+            log.error(f"Error: Signal category ({category}) does not match strategy categories ({', '.join(sorted(self.categories))}). Skipping.")
+            return False
             
-        self.stop_loss_percent = self.current_params['SL_PERCENT']
-        self.take_profit_percent = self.current_params['TP_PERCENT']
-
+        # Get entry price (current price)
+        current_price = self.simulator.get_current_price(symbol, category)
+        if current_price is None:
+            return False
 
-    def manage_open_trade(self, symbol, entry_price, side, trade_info):
-        """Manages an open position: checks SL and TP."""
-        # Use the indicator's inherited method to get the current price
-        current_price = self.simulator.get_current_price(symbol, self.indicator.category)
+        side = 'Buy' if 'BUY' in signal_type else 'Sell'
         
-        if current_price is None:
-            return
+        # Calculate volume based on global risk and strategy SL
+        volume_to_buy = calculate_volume_from_risk(
+            RISK_PER_TRADE_USDT, 
+            current_price, 
+            indicator.params['SL_PERCENT']
+        )
+        stop_loss_price, take_profit_price = self.stop_levels(side, current_price, indicator.params)
+        risk_usdt = volume_to_buy * abs(current_price - stop_loss_price)
 
-        # SL/TP levels are taken from parameters specific to the current strategy
-        stop_loss_percent = self.current_params['SL_PERCENT']
-        take_profit_percent = self.current_params['TP_PERCENT']
+        if volume_to_buy <= 0 or not self.simulator.can_open(symbol, risk_usdt):
+            return False
 
-        if side == 'Buy': # Long
-            stop_loss_price = entry_price * (1 - stop_loss_percent / 100)
-            take_profit_price = entry_price * (1 + take_profit_percent / 100)
-            
-            # ... (SL/TP condition check) ...
-            if current_price >= take_profit_price:
-                self.simulator.close_position(current_price)
-            elif current_price <= stop_loss_price:
-                self.simulator.close_position(current_price)
-            else:
-                print(f"Position {symbol} (Long): Current price {current_price:.4f} (entry: {entry_price:.4f}). Waiting...")
-                                
-        elif side == 'Sell': # Short
-            stop_loss_price = entry_price * (1 + stop_loss_percent / 100)
-            take_profit_price = entry_price * (1 - take_profit_percent / 100)
-
-            # ... (SL/TP condition check) ...
-            if current_price <= take_profit_price:
-                self.simulator.close_position(current_price)
-            elif current_price >= stop_loss_price:
-                self.simulator.close_position(current_price)
-            else:
-                print(f"Position {symbol} (Short): Current price {current_price:.4f} (entry: {entry_price:.4f}). Waiting...")
+        # Open position
+        with self.trade_lock:
+            self.simulator.open_position(symbol, side, current_price, volume_to_buy, category, stop_loss_price, take_profit_price)
+        if self.price_stream is not None:
+            self.price_stream.subscribe(symbol)
+        log.info(f"✅ Trade entry: {side} {symbol} at price {current_price:.4f}, volume: {volume_to_buy:.4f}")
+        return True
 
     def run_strategy(self):
-        """The main bot loop: searches for signals and manages trades."""
+        """
+        The main bot loop: manages open positions every cycle and scans for signals right after
+        each candle close (plus optional intrabar previews) while there is capacity.
+        """
         while True:
             try:
-                # If a position is open, manage it
-                if self.simulator.active_trade:
-                    # ... (Position management logic) ...
-                    symbol = self.simulator.active_trade['symbol']
-                    entry_price = self.simulator.active_trade['entry_price']
-                    side = self.simulator.active_trade['side']
-                    self.manage_open_trade(symbol, entry_price, side, self.simulator.active_trade)
-                    tm.sleep(13) # Pause when a trade is open
-                else:
-                    # No position, search for a new signal
-                    print(f"[{tm.strftime('%H:%M:%S')}] Searching for signal on Strategy #1 (EMA)...")
-                    
-                    # INDICATOR CALL
-                    signal = self.indicator.get_first_coin_to_buy()
-                    
-                    if signal:
-                        symbol, signal_type, category = signal
+                # Manage open positions
+                if len(self.simulator.positions):
+                    self.manage_open_positions()
+
+                due = self.scheduler.due()
+                preview = not due and self.scheduler.preview_due()
+                if due or preview:
+                    if self.has_capacity():
+                        # Search for new signals among symbols without a position
+                        trigger = f"candle close {', '.join(due)}" if due else "intrabar preview"
+                        log.info(f"[{clock.timestamp():%H:%M:%S}] Searching for signal on {self.indicator.name} ({trigger})... ({len(self.simulator.positions)} open positions)")
                         
-                        # Check category
-                        if category != self.indicator.category:
-                            print(f"Error: Signal category ({category}) does not match strategy category ({self.indicator.category}). Skipping.")
-                            tm.sleep(5)
-                            continue
-                            
-                        # Get entry price (current price)
-                        current_price = self.simulator.get_current_price(symbol, category)
-                        
-                        if current_price is not None:
-                            side = 'Buy' if 'BUY' in signal_type else 'Sell'
-                            
-                            # Calculate volume based on global risk and strategy SL
-                            volume_to_buy = calculate_volume_from_risk(
-                                RISK_PER_TRADE_USDT, 
-                                current_price, 
-                                self.current_params['SL_PERCENT']
-                            )
-
-                            if volume_to_buy > 0:
-                                # Open position
-                                self.simulator.open_position(symbol, side, current_price, volume_to_buy, category)
-                                print(f"✅ Trade entry: {side} {symbol} at price {current_price:.4f}, volume: {volume_to_buy:.4f}")
+                        # INDICATOR CALL: one scan per candle, up to one candidate per free slot (best first)
+                        free_slots = MAX_OPEN_POSITIONS - len(self.simulator.positions)
+                        symbols = self.indicator.universe(exclude=set(self.simulator.positions.symbols))
+                        signals = self.indicator.get_signals(intervals=due or None, limit=free_slots, symbols=symbols)
+                        signal_time = clock.time()
+                        for signal in signals:
+                            if not self.has_capacity():
+                                break
+                            self.indicator.log_signal(signal, len(signals))
+                            if self.enter_position(signal[:4]):
+                                METRICS.observe('signal_to_entry_seconds', clock.time() - signal_time)
+                                if due:
+                                    close_ms = self.scheduler.last_boundary(signal[3].interval)
+                                    METRICS.observe('candle_close_to_entry_seconds', clock.time() - close_ms / 1000)
+                        self.record_scan(self.indicator.category, due, symbols, self.scheduler)
+
+                    if due:
+                        self.scheduler.mark_scanned(due)
+                    else:
+                        self.scheduler.mark_previewed()
                                 
-                    tm.sleep(10) # Pause when no trade is open
+                # Pause until the next candle close / preview, checking positions at least every POSITION_CHECK_SECONDS
+                clock.sleep(max(1, min(POSITION_CHECK_SECONDS, self.scheduler.seconds_until_next())))
 
             except Exception as e:
-                print(f"An unexpected error occurred in the strategy: {e}")
-                tm.sleep(18)
+                log.error(f"An unexpected error occurred in the strategy: {e}")
+                clock.sleep(18)
 
 # =========================================================================
 # === ENTRY POINT: BOT STARTUP ===
@@ -380,11 +657,15 @@ class TradingBot:
 
 if __name__ == "__main__":
     
-    # --- ⚠️ Defining the final PARAMS_MAP ---
-    PARAMS_MAP = {
-        1: EMA_PARAMS
-    }
-    # --------------------------------------------------------------------
+    # Console output through the leveled logger (LOG_LEVEL = None turns it off)
+    if LOG_LEVEL:
+        logging.basicConfig(level=LOG_LEVEL, format='%(message)s')
+    else:
+        logging.disable(logging.CRITICAL)
+    if METRICS_PORT:
+        start_http_exporter(METRICS_PORT)
+    if METRICS_JSON_FILE:
+        start_json_dump(METRICS_JSON_FILE, every=METRICS_JSON_EVERY)
     
     try:
         # Create simulator instance
@@ -392,12 +673,13 @@ if __name__ == "__main__":
         # Create trading logic instance
         trader = TradingBot(simulator, STRATEGY_TYPE, PARAMS_MAP)
         
-        print(f"*** Starting Trading Bot, Strategy 1 (EMA Indicator) ***")
-        print(f"*** Trading Mode: {TRADING_MODE} (0=LONG, 1=SHORT, 2=BOTH) ***")
-        print(f"*** Risk per trade: {RISK_PER_TRADE_USDT} USDT ***\n")
+        log.info(f"*** Starting Trading Bot, Strategy {STRATEGY_TYPE} ({trader.indicator.name}) ***")
+        log.info(f"*** Trading Mode: {TRADING_MODE} (0=LONG, 1=SHORT, 2=BOTH) ***")
+        log.info(f"*** Risk per trade: {RISK_PER_TRADE_USDT} USDT ***")
+        log.info(f"*** Max open positions: {MAX_OPEN_POSITIONS}, max total risk: {MAX_TOTAL_RISK_USDT} USDT ***\n")
         
         # Start the main loop
         trader.run_strategy()
 
     except Exception as e:
-        print(f"Critical error during initialization or in the main thread: {e}")
\ No newline at end of file
+        log.critical(f"Critical error during initialization or in the main thread: {e}")
\ No newline at end of file
@@ -1,83 +1,218 @@
-import pandas as pd
-from pybit.unified_trading import HTTP
-import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import time as tm
+import clock
+from bybit_client import get_shared_client
+from metrics import METRICS
+from .kline_store import KlineStore, interval_to_ms, fetch_kline_rows
+from .candles import Candles
+from .features import FeatureCache
+
+log = logging.getLogger(__name__)
+
+METRICS.describe('scan_duration_seconds', "Duration of a universe scan (kline fetch + evaluation)")
+METRICS.describe('scan_symbols_per_second', "Symbols checked per second in the last scan")
+METRICS.describe('scan_symbols_total', "Symbols checked by scans")
 
 # --- Helper function for fetching candlestick data ---
-def get_kline_data_helper(client, symbol, category, interval, limit):
-    """General function to fetch candlestick data, used by all indicators."""
-    try:
-        response = client.get_kline(
-            category=category,
-            symbol=symbol,
-            interval=interval,
-            limit=limit
-        )
-        if response['retCode'] == 0:
-            df = pd.DataFrame(response['result']['list'], columns=['open_time', 'open', 'high', 'low', 'close', 'volume', 'turnover'])
-            
-            # 💡 FIX: Convert time and set index
-            df['open_time'] = df['open_time'].astype(int) 
-            df['open_time'] = pd.to_datetime(df['open_time'], unit='ms', utc=True)
-            df.set_index('open_time', inplace=True)
-            
-            # Convert data to numeric format
-            df[['open', 'high', 'low', 'close']] = df[['open', 'high', 'low', 'close']].apply(pd.to_numeric) 
-            # Sort by index (time)
-            df = df.sort_index(ascending=True) 
-            
-            return df
-        # print(f"API Error (retCode {response['retCode']}): {response.get('retMsg', 'Unknown error')}")
-    except Exception as e:
-        # print(f"Exception during kline data fetch for {symbol}: {e}")
-        pass
-    return None
+def get_kline_data_helper(client, symbol, category, interval, limit, start=None, store=None):
+    """
+    General function to fetch candlestick data, used by all indicators.
+    Returns array-backed Candles (ascending); call `.to_frame()` for a DataFrame.
+    """
+    if store is not None and start is None:
+        # Closed candles come from the local store, only newer ones from the API
+        return store.get_recent(client, symbol, category, interval, limit)
+    # Only candles opened at or after `start` (ms), if given
+    rows = fetch_kline_rows(client, symbol, category, interval, limit, start=start)
+    if rows is None:
+        return None
+
+    if store is not None and len(rows) > 1:
+        # Persist the closed candles of a delta fetch
+        if not store.append(category, symbol, interval, rows[:-1]):
+            store.sync(client, category, symbol, interval)
+    return Candles.from_rows(rows)
+
+# --- Per-symbol candle cache with delta fetching ---
+class KlineCache:
+    """
+    Keeps the last `limit` candles per (symbol, interval) and on each call downloads only
+    the candles opened since the last cached one (the last cached candle is still forming,
+    so it is refetched too). Falls back to a full download on a cold cache or a gap.
+    """
+    def __init__(self, store=None):
+        self.frames = {}
+        self.store = store
+
+    def get(self, client, symbol, category, interval, limit):
+        key = (symbol, interval)
+        cached = self.frames.get(key)
+        step_ms = interval_to_ms(interval)
+
+        if cached is not None and step_ms and len(cached) >= limit:
+            last_open_ms = int(cached.open_time[-1])
+            missed = (int(clock.time() * 1000) - last_open_ms) // step_ms + 2
+            if missed < limit:
+                delta = get_kline_data_helper(client, symbol, category, interval, int(missed), start=last_open_ms, store=self.store)
+                if delta is None:
+                    return None
+                # The delta must overlap the last cached candle, otherwise there is a gap
+                if not delta.empty and delta.open_time[0] == last_open_ms:
+                    candles = Candles.concat([cached[:-1], delta])[-limit:]
+                    self.frames[key] = candles
+                    return candles
+
+        candles = get_kline_data_helper(client, symbol, category, interval, limit, store=self.store)
+        if candles is not None:
+            self.frames[key] = candles
+        return candles
 
 # --- Base Class ---
 class BaseIndicator:
-    def __init__(self, params, test_net=False):
-        # API Client initialization
-        BYBIT_API_KEY = os.getenv('BYBIT_API_KEY')
-        BYBIT_API_SECRET = os.getenv('BYBIT_API_SECRET')
-        self.client = HTTP(api_key=BYBIT_API_KEY, api_secret=BYBIT_API_SECRET, testnet=test_net) 
+    """
+    Strategies subclass this, list the features they need in `feature_specs` (e.g. ('ema', 10))
+    and implement `evaluate`. Indicators sharing `kline_cache` and `feature_cache` (see
+    IndicatorGroup) fetch each symbol once and compute each feature once per closed candle.
+    """
+    name = 'Indicator'
+    strategy_type = None # set by @register_indicator
+
+    def __init__(self, params, test_net=False, client=None):
+        # API Client: the process-wide shared client (pooling, rate limit, retries) unless one is given
+        self.client = client if client is not None else get_shared_client(test_net)
         
         self.params = params
         self.category = params['CATEGORY']
+        self.interval = params.get('KLINE_INTERVAL', '60')
         self.kline_limit = params.get('KLINE_LIMIT', 100) 
+
+        # Features over closed candles ({spec: value} is passed to evaluate) and the candles needed
+        self.feature_specs = []
+        self.min_candles = 2
         
         # Get global liquidity filters from parameters
         self.min_volume_24h = params.get('MIN_VOLUME_24H', 150000000)
         self.max_volume_24h = params.get('MAX_VOLUME_24H', 1000000000000)
 
+        # Universe scan settings (requests are rate-limited by the shared client)
+        self.scan_workers = params.get('SCAN_WORKERS', 8)
+        self.last_scan_seconds = None
+
+        # On-disk kline store shared with offline tooling (KLINE_STORE_DIR=None disables it)
+        store_dir = params.get('KLINE_STORE_DIR')
+        self.kline_store = KlineStore(store_dir) if store_dir else None
+
+        # Incremental candle cache (KLINE_CACHE=False always downloads the full history)
+        self.kline_cache = KlineCache(self.kline_store) if params.get('KLINE_CACHE', True) else None
+        # Per-candle feature cache (replaced by a shared one when strategies run in a group)
+        self.feature_cache = FeatureCache(params.get('EMA_RECONCILE_EVERY', 24))
+
+        # Optional shared TickerCache used for the universe filter (set by TradingBot)
+        self.ticker_cache = None
+
     def get_kline_data(self, symbol, interval='1', limit=None):
         """Wrapper method for fetching candlestick data, available to all descendants."""
-        return get_kline_data_helper(self.client, symbol, self.category, interval, limit or self.kline_limit)
+        if self.kline_cache is not None:
+            return self.kline_cache.get(self.client, symbol, self.category, interval, limit or self.kline_limit)
+        return get_kline_data_helper(self.client, symbol, self.category, interval, limit or self.kline_limit, store=self.kline_store)
+
+    def scan_symbols(self, symbols, check):
+        """
+        Runs `check(symbol)` for every symbol, concurrently when SCAN_WORKERS > 1.
+        Results are returned in the same order as `symbols`, whatever order the requests finish in.
+        """
+        start = tm.perf_counter()
+        if self.scan_workers > 1 and len(symbols) > 1:
+            with ThreadPoolExecutor(max_workers=self.scan_workers) as pool:
+                results = list(pool.map(check, symbols))
+        else:
+            results = [check(symbol) for symbol in symbols]
+        self.last_scan_seconds = tm.perf_counter() - start
+        METRICS.observe('scan_duration_seconds', self.last_scan_seconds)
+        METRICS.inc('scan_symbols_total', len(symbols))
+        if self.last_scan_seconds > 0:
+            METRICS.set('scan_symbols_per_second', len(symbols) / self.last_scan_seconds)
+        log.info(f"Scan of {len(symbols)} symbols finished in {self.last_scan_seconds:.2f}s ({self.scan_workers} workers)")
+        return results
         
+    def filter_tickers(self, tickers_list):
+        """Liquid USDT symbols from a get_tickers list (no leveraged tokens, within the turnover range)."""
+        usdt_tickers = []
+        for t in tickers_list:
+            symbol = t['symbol']
+            volume = float(t.get('turnover24h', 0)) 
+            if (symbol.endswith('USDT') and 
+                not any(ext in symbol for ext in ['UP', 'DOWN', 'BULL', 'BEAR', 'HALF']) and 
+                not symbol[0].isdigit() and
+                volume >= self.min_volume_24h and volume <= self.max_volume_24h):
+                usdt_tickers.append(symbol)
+        return usdt_tickers
+
     def get_all_tickers(self):
         """General logic for filtering tickers for futures (linear)."""
         if self.category == 'spot':
             # Logic for Spot will be overridden in SpotIndicator
             raise NotImplementedError("For SpotIndicator, use the overridden method SpotIndicator.get_all_tickers.")
 
+        if self.ticker_cache is not None:
+            # Filtered once per snapshot refresh, shared with the simulator's price lookups
+            key = ('universe', self.min_volume_24h, self.max_volume_24h)
+            return self.ticker_cache.derive(self.category, key, lambda snapshot: self.filter_tickers(snapshot.values()))
+
         try:
             response = self.client.get_tickers(category=self.category)
             if response['retCode'] == 0:
-                tickers_list = response['result']['list']
-                usdt_tickers = []
-                for t in tickers_list:
-                    symbol = t['symbol']
-                    volume = float(t.get('turnover24h', 0)) 
-                    if (symbol.endswith('USDT') and 
-                        not any(ext in symbol for ext in ['UP', 'DOWN', 'BULL', 'BEAR', 'HALF']) and 
-                        not symbol[0].isdigit() and
-                        volume >= self.min_volume_24h and volume <= self.max_volume_24h):
-                        usdt_tickers.append(symbol)
-                return usdt_tickers
+                return self.filter_tickers(response['result']['list'])
             # print(f"API Error fetching tickers (retCode {response['retCode']}): {response.get('retMsg', 'Unknown error')}")
             return []
         except Exception:
             # print(f"Exception during ticker data fetch: {e}")
             return []
 
-    def get_first_coin_to_buy(self):
-        """Method that searches for a signal. Must be implemented in each indicator."""
-        raise NotImplementedError("Subclasses must implement get_first_coin_to_buy")
\ No newline at end of file
+    def evaluate(self, coin, candles, features):
+        """
+        Returns 'STRONG_BUY', 'STRONG_SELL' or None for a symbol. `candles` ends with the forming
+        candle, `features` holds the feature_specs values over the closed ones. Must be implemented in each indicator.
+        """
+        raise NotImplementedError("Subclasses must implement evaluate")
+
+    def evaluate_matrix(self, values):
+        """
+        Optional vectorized evaluate over many symbols: `values` is a (field, symbol, time) array
+        from stack_candles (last column forming). Returns (signals: +1 buy / -1 sell / 0 per symbol,
+        strength per symbol), or None if the indicator only supports evaluate.
+        """
+        return None
+
+    def check_candles(self, coin, candles):
+        """Runs evaluate on already fetched candles (the last one still forming)."""
+        if candles is None or candles.empty or len(candles) < self.min_candles:
+            return None
+        closed = candles[:-1]
+        try:
+            features = self.feature_cache.get(coin, self.interval, closed, self.feature_specs)
+        except Exception as e:
+            log.warning(f"⚠️ {coin}: Error calculating {self.name} features: {e}")
+            return None
+        return self.evaluate(coin, candles, features)
+
+    def check_coin(self, coin):
+        """Checks a single symbol. Returns 'STRONG_BUY', 'STRONG_SELL' or None."""
+        return self.check_candles(coin, self.get_kline_data(coin, interval=self.interval, limit=self.kline_limit))
+
+    def get_first_coin_to_buy(self, exclude=()):
+        """Scans the universe, skipping symbols in `exclude`. Returns [coin, signal, category] or None."""
+        tickers_to_check = [coin for coin in self.get_all_tickers() if coin not in exclude]
+
+        # Klines are fetched concurrently; the first signal in ticker order wins
+        results = self.scan_symbols(tickers_to_check, self.check_coin)
+
+        for coin, signal in zip(tickers_to_check, results):
+            if signal == 'STRONG_BUY':
+                log.info(f"LONG Signal by {self.name} for {coin}.")
+                return [coin, signal, self.category]
+            if signal == 'STRONG_SELL':
+                log.info(f"SHORT Signal by {self.name} for {coin}.")
+                return [coin, signal, self.category]
+        return None
\ No newline at end of file
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import itertools
+
+# Field order of a Bybit kline row (and of the kline store columns)
+KLINE_COLUMNS = ['open_time', 'open', 'high', 'low', 'close', 'volume', 'turnover']
+
+
+def decode_kline_rows(rows):
+    """
+    Parses Bybit's kline list (strings, newest first) into a float64 row array in
+    ascending time order. Rows are reversed, not sorted: Bybit returns them strictly descending.
+    """
+    n = len(rows)
+    if n == 0:
+        return np.empty((0, len(KLINE_COLUMNS)))
+    flat = np.fromiter(map(float, itertools.chain.from_iterable(rows)), dtype=np.float64, count=n * len(KLINE_COLUMNS))
+    return flat.reshape(n, len(KLINE_COLUMNS))[::-1]
+
+
+class Candles:
+    """
+    Array-backed candle container: `open_time` (int64 ms) plus one contiguous float64
+    row per field in `values` (open, high, low, close, volume, turnover).
+    Slicing returns views; `to_frame()` builds the DataFrame layout on request.
+    """
+    __slots__ = ('open_time', 'values')
+
+    def __init__(self, open_time, values):
+        self.open_time = open_time
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds candles from a KLINE_COLUMNS row array (ascending)."""
+        return cls(rows[:, 0].astype(np.int64), np.ascontiguousarray(rows[:, 1:].T))
+
+    @classmethod
+    def concat(cls, parts):
+        return cls(np.concatenate([p.open_time for p in parts]), np.concatenate([p.values for p in parts], axis=1))
+
+    @property
+    def open(self):
+        return self.values[0]
+
+    @property
+    def high(self):
+        return self.values[1]
+
+    @property
+    def low(self):
+        return self.values[2]
+
+    @property
+    def close(self):
+        return self.values[3]
+
+    @property
+    def volume(self):
+        return self.values[4]
+
+    @property
+    def turnover(self):
+        return self.values[5]
+
+    @property
+    def empty(self):
+        return len(self.open_time) == 0
+
+    def __len__(self):
+        return len(self.open_time)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("Candles only support slicing, e.g. candles[:-1]")
+        return Candles(self.open_time[index], self.values[:, index])
+
+    def rows(self):
+        """KLINE_COLUMNS row array (for the kline store)."""
+        return np.column_stack([self.open_time, self.values.T])
+
+    def to_frame(self):
+        """DataFrame indexed by UTC open_time, as get_kline_data_helper used to return."""
+        df = pd.DataFrame(self.values.T, columns=KLINE_COLUMNS[1:])
+        df.index = pd.to_datetime(self.open_time, unit='ms', utc=True)
+        df.index.name = 'open_time'
+        return df
+
+
+def stack_candles(symbols, candles_list, length):
+    """
+    Aligns the last `length` candles of many symbols into one array of shape
+    (field, symbol, time) with fields as in Candles.values. Symbols with a shorter or
+    lagging history (last candle older than the newest one) are left out.
+    Returns (kept symbols, open_time of the columns, values).
+    """
+    latest = max((int(c.open_time[-1]) for c in candles_list if c is not None and len(c)), default=None)
+    kept, rows = [], []
+    for symbol, candles in zip(symbols, candles_list):
+        if candles is not None and len(candles) >= length and candles.open_time[-1] == latest:
+            kept.append(symbol)
+            rows.append(candles[-length:])
+    if not rows:
+        return kept, np.empty(0, dtype=np.int64), np.empty((len(KLINE_COLUMNS) - 1, 0, length))
+    return kept, rows[0].open_time, np.stack([c.values for c in rows], axis=1)
@@ -1,53 +1,62 @@
 from .base_indicator import BaseIndicator
-import pandas_ta as ta
-import time as tm
+from .registry import register_indicator
+from . import kernels
 import numpy as np # <-- ADDED for NaN check
 
+@register_indicator(1)
 class EmaIndicator(BaseIndicator):
-    def __init__(self, params, test_net=False):
-        super().__init__(params, test_net)
+    name = 'EMA'
+
+    def __init__(self, params, test_net=False, client=None):
+        super().__init__(params, test_net, client)
         self.ema_fast = params['EMA_FAST_LENGTH']
         self.ema_slow = params['EMA_SLOW_LENGTH']
+        # Streaming EMAs over closed candles, shared through the feature cache
+        self.feature_specs = [('ema', self.ema_fast), ('ema', self.ema_slow)]
+        self.min_candles = max(self.ema_fast, self.ema_slow) + 1 # +1 for the forming candle
+
+    def evaluate(self, coin, candles, features):
+        """Checks a single symbol for an EMA crossover. Returns 'STRONG_BUY', 'STRONG_SELL' or None."""
+        fast = features[('ema', self.ema_fast)]
+        slow = features[('ema', self.ema_slow)]
+        if fast.value is None or slow.value is None:
+            return None
+        # The last candle is still forming: the EMAs cover closed candles only
+        forming_close = float(candles.close[-1])
+
+        # Extract values for the current and previous candle
+        ema_f_now = fast.peek(forming_close)
+        ema_s_now = slow.peek(forming_close)
+        ema_f_prev = fast.value
+        ema_s_prev = slow.value
+
+        # NaN Check
+        if (np.isnan(ema_f_now) or np.isnan(ema_s_now) or
+            np.isnan(ema_f_prev) or np.isnan(ema_s_prev)): # <-- ADDED NaN CHECK
+            return None
+
+        # Buy: Fast EMA crosses slow EMA from below to above
+        if ema_f_now > ema_s_now and ema_f_prev <= ema_s_prev:
+            return 'STRONG_BUY'
+
+        # Sell: Fast EMA crosses slow EMA from above to below
+        if ema_f_now < ema_s_now and ema_f_prev >= ema_s_prev:
+            return 'STRONG_SELL'
+
+        return None
+
+    def evaluate_matrix(self, values):
+        """Crossovers of all symbols at once on a (field, symbol, time) array (see stack_candles)."""
+        closes = values[3]
+        # The last column is the forming candle, so column -2 is the closed-candle EMA and -1 its peek
+        fast = kernels.ema(closes, self.ema_fast)
+        slow = kernels.ema(closes, self.ema_slow)
+        ema_f_now, ema_s_now = fast[:, -1], slow[:, -1]
+        ema_f_prev, ema_s_prev = fast[:, -2], slow[:, -2]
 
-    def get_first_coin_to_buy(self):
-        tickers_to_check = self.get_all_tickers()
-        kline_limit = max(self.ema_fast, self.ema_slow) + 1 # +1 for .iloc[-2]
-        
-        for coin in tickers_to_check:
-            interval = self.params.get('KLINE_INTERVAL', '60') 
-            kline_limit_param = self.params.get('KLINE_LIMIT', 200) 
-            df = self.get_kline_data(coin, interval=interval, limit=kline_limit_param)
-                        
-            if df is not None and not df.empty and len(df) >= kline_limit:
-                try: # <-- ADDED ERROR HANDLING
-                    ema_f = ta.ema(df['close'], length=self.ema_fast)
-                    ema_s = ta.ema(df['close'], length=self.ema_slow)
-                except Exception as e:
-                    print(f"⚠️ {coin}: Error calculating EMA: {e}")
-                    tm.sleep(0.5)
-                    continue
-
-                # Extract values for the current and previous candle
-                ema_f_now = ema_f.iloc[-1]
-                ema_s_now = ema_s.iloc[-1]
-                ema_f_prev = ema_f.iloc[-2]
-                ema_s_prev = ema_s.iloc[-2]
-
-                # NaN Check
-                if (np.isnan(ema_f_now) or np.isnan(ema_s_now) or 
-                    np.isnan(ema_f_prev) or np.isnan(ema_s_prev)): # <-- ADDED NaN CHECK
-                    tm.sleep(0.5)
-                    continue
-                
-                # Buy: Fast EMA crosses slow EMA from below to above
-                if ema_f_now > ema_s_now and ema_f_prev <= ema_s_prev:
-                    print(f"LONG Signal by EMA for {coin}: Crossover up.")
-                    return [coin, 'STRONG_BUY', self.category]
-                
-                # Sell: Fast EMA crosses slow EMA from above to below
-                if ema_f_now < ema_s_now and ema_f_prev >= ema_s_prev:
-                    print(f"SHORT Signal by EMA for {coin}: Crossover down.")
-                    return [coin, 'STRONG_SELL', self.category]
-                
-                tm.sleep(0.5)
-        return None
\ No newline at end of file
+        # NaN comparisons are False, so warming-up symbols never signal
+        buy = (ema_f_now > ema_s_now) & (ema_f_prev <= ema_s_prev)
+        sell = (ema_f_now < ema_s_now) & (ema_f_prev >= ema_s_prev)
+        signals = buy.astype(np.int8) - sell.astype(np.int8)
+        strength = np.abs(ema_f_now - ema_s_now) / closes[:, -1]
+        return signals, strength
@@ -0,0 +1,111 @@
+import numpy as np
+from . import kernels
+
+# =========================================================================
+# === SHARED FEATURE CACHE (COMPUTED ONCE PER CLOSED CANDLE) ===
+# -------------------------------------------------------------------------
+# Indicators declare the features they need as tuples, e.g. ('ema', 10),
+# ('rsi', 14), ('atr', 14). The cache computes each feature once per
+# (symbol, interval) and closed candle, however many strategies ask for
+# it. EMAs are StreamingEma objects updated in O(1) per closed candle
+# (`value`, `peek(close)` for the forming candle); every other feature
+# is the float value at the last closed candle (NaN while warming up).
+# =========================================================================
+
+# --- Streaming EMA over closed candles ---
+class StreamingEma:
+    """
+    EMA over closed candles updated in O(1) per new candle. Seeded like ta.ema (SMA of the
+    first `length` closes); `reset` recomputes it from a full close array.
+    """
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.value = None
+        self.last_time = None
+
+    def reset(self, closes, last_time):
+        """Full recompute over the closes of closed candles; `last_time` is the last one's open_time (ms)."""
+        value = kernels.ema(closes, self.length)[-1] if len(closes) else np.nan
+        self.value = None if np.isnan(value) else float(value)
+        self.last_time = last_time
+
+    def update(self, close, open_time):
+        self.value = self.value + self.alpha * (close - self.value)
+        self.last_time = open_time
+
+    def peek(self, close):
+        """EMA value if `close` were the next closed candle (used for the forming candle)."""
+        return self.value + self.alpha * (close - self.value)
+
+
+# --- Series features: fn(closed Candles, *args) -> value at the last closed candle ---
+def sma_feature(candles, length):
+    return float(kernels.sma(candles.close, length)[-1])
+
+def rsi_feature(candles, length=14):
+    return float(kernels.rsi(candles.close, length)[-1])
+
+def atr_feature(candles, length=14):
+    return float(kernels.atr(candles.high, candles.low, candles.close, length)[-1])
+
+def macd_feature(candles, fast=12, slow=26, signal=9):
+    """(macd, histogram, signal) at the last closed candle."""
+    return tuple(float(series[-1]) for series in kernels.macd(candles.close, fast, slow, signal))
+
+# New features are added here ('ema' is handled by StreamingEma)
+FEATURE_FUNCTIONS = {
+    'sma': sma_feature,
+    'rsi': rsi_feature,
+    'atr': atr_feature,
+    'macd': macd_feature,
+}
+
+
+class FeatureCache:
+    """Per (symbol, interval) feature values, shared by every indicator that holds this cache."""
+    def __init__(self, reconcile_every=24):
+        # EMAs are fully recomputed after this many O(1) updates (bounds floating-point drift)
+        self.reconcile_every = reconcile_every
+        self.entries = {} # {(symbol, interval): {'last_time': ms, 'values': {spec: value}, 'emas': {length: [StreamingEma, updates]}}}
+
+    def get(self, symbol, interval, closed, specs):
+        """Returns {spec: value} for the closed candles (Candles), computing only what this candle lacks."""
+        key = (symbol, interval)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = {'last_time': None, 'values': {}, 'emas': {}}
+        last_time = int(closed.open_time[-1])
+        if entry['last_time'] != last_time:
+            # A new candle closed: everything is recomputed (lazily) for it
+            entry['last_time'] = last_time
+            entry['values'] = {}
+
+        values = entry['values']
+        for spec in specs:
+            if spec not in values:
+                name, *args = spec
+                if name == 'ema':
+                    values[spec] = self._advance_ema(entry['emas'], args[0], closed)
+                else:
+                    values[spec] = FEATURE_FUNCTIONS[name](closed, *args)
+        return {spec: values[spec] for spec in specs}
+
+    def _advance_ema(self, emas, length, closed):
+        """Advances the EMA to the last closed candle, recomputing fully on a cold start, gap or reconcile."""
+        state = emas.get(length)
+        if state is not None and state[1] < self.reconcile_every:
+            ema = state[0]
+            known = int(np.searchsorted(closed.open_time, ema.last_time))
+            if known < len(closed) and closed.open_time[known] == ema.last_time:
+                # O(1) per candle closed since the last scan
+                for open_time, close in zip(closed.open_time[known + 1:].tolist(), closed.close[known + 1:].tolist()):
+                    ema.update(close, open_time)
+                state[1] += len(closed) - known - 1
+                return ema
+
+        ema = StreamingEma(length)
+        ema.reset(closed.close, int(closed.open_time[-1]))
+        emas[length] = [ema, 0]
+        return ema
+
@@ -0,0 +1,181 @@
+import numpy as np
+
+# =========================================================================
+# === NUMPY INDICATOR KERNELS (EMA, SMA, RMA, RSI, ATR, MACD) ===
+# -------------------------------------------------------------------------
+# Plain-array replacements for the pandas_ta functions the bot used, with
+# the same warm-up and seeding rules so results match pandas_ta:
+#   ema  - SMA of the first `length` values, then the recursive EMA
+#   rma  - Wilder's average: ewm(alpha=1/length, adjust=True, min_periods=length)
+#   rsi  - rma of gains / losses of close.diff()
+#   atr  - rma of the true range (the first true range is NaN)
+#   macd - ema(fast) - ema(slow), signal = ema of macd from its first value
+# Inputs are 1-D series or 2-D batches (one series per row, time along the
+# last axis). Outputs have the input's shape with NaN during warm-up. NaN
+# is only supported as a leading prefix shared by all rows.
+#
+#   python -m indicators.kernels   (compares every kernel with pandas_ta)
+# =========================================================================
+
+# Block length keeps beta**-block below 1e100 in _linear_filter
+_MAX_SCALE_LOG10 = 100
+
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(1, -1) if values.ndim == 1 else values, values.ndim == 1
+
+
+def _first_valid(values):
+    """First column where every row has a value (len if none)."""
+    valid = np.flatnonzero(~np.isnan(values).any(axis=0))
+    return int(valid[0]) if len(valid) else values.shape[1]
+
+
+def _linear_filter(values, beta, gain, initial):
+    """
+    y[t] = beta * y[t-1] + gain * x[t] along the last axis, with y[-1] = initial (one per row).
+    Vectorized in blocks: y[k] = beta**(k+1) * (initial + gain * cumsum(x[j] / beta**(j+1))).
+    """
+    out = np.empty_like(values)
+    steps = values.shape[1]
+    if steps == 0:
+        return out
+    if beta == 0:
+        # Length 1: no memory, y[t] = gain * x[t] (the block formula would divide by 0**k)
+        out[:] = gain * values
+        return out
+    block = steps if beta >= 1 or beta <= 0 else max(1, min(steps, int(_MAX_SCALE_LOG10 / -np.log10(beta))))
+    previous = np.asarray(initial, dtype=np.float64)
+    for start in range(0, steps, block):
+        segment = values[:, start:start + block]
+        powers = beta ** np.arange(1, segment.shape[1] + 1)
+        result = powers * (previous[:, None] + gain * np.cumsum(segment / powers, axis=1))
+        out[:, start:start + segment.shape[1]] = result
+        previous = result[:, -1]
+    return out
+
+
+def ema(close, length=10):
+    """Exponential moving average seeded with the SMA of the first `length` values (like ta.ema)."""
+    values, flat = _as_2d(close)
+    out = np.full(values.shape, np.nan)
+    first = _first_valid(values)
+    if values.shape[1] - first >= length:
+        alpha = 2 / (length + 1)
+        seed = values[:, first:first + length].mean(axis=1)
+        out[:, first + length - 1] = seed
+        out[:, first + length:] = _linear_filter(values[:, first + length:], 1 - alpha, alpha, seed)
+    return out[0] if flat else out
+
+
+def sma(close, length=10):
+    """Simple moving average over `length` values (like ta.sma)."""
+    values, flat = _as_2d(close)
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= length:
+        windows = np.lib.stride_tricks.sliding_window_view(values, length, axis=1)
+        out[:, length - 1:] = windows.mean(axis=2)
+    return out[0] if flat else out
+
+
+def rma(close, length=10):
+    """Wilder's moving average: ewm(alpha=1/length, adjust=True, min_periods=length) (like ta.rma)."""
+    values, flat = _as_2d(close)
+    out = np.full(values.shape, np.nan)
+    first = _first_valid(values)
+    if values.shape[1] - first >= length:
+        beta = 1 - 1 / length
+        series = values[:, first:]
+        # adjust=True: weighted sum of all values so far divided by the sum of the weights
+        numerator = _linear_filter(series, beta, 1.0, np.zeros(len(values)))
+        weights = (1 - beta ** np.arange(1, series.shape[1] + 1)) / (1 - beta)
+        out[:, first + length - 1:] = (numerator / weights)[:, length - 1:]
+    return out[0] if flat else out
+
+
+def rsi(close, length=14):
+    """Relative strength index (like ta.rsi)."""
+    values, flat = _as_2d(close)
+    change = np.full(values.shape, np.nan)
+    change[:, 1:] = np.diff(values, axis=1)
+    gains = rma(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), length)
+    losses = rma(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 * gains / (gains + losses)
+    return out[0] if flat else out
+
+
+def true_range(high, low, close):
+    """max(high - low, |high - previous close|, |low - previous close|); NaN for the first candle."""
+    high, flat = _as_2d(high)
+    low, _ = _as_2d(low)
+    close, _ = _as_2d(close)
+    out = np.full(high.shape, np.nan)
+    previous = close[:, :-1]
+    out[:, 1:] = np.maximum(high[:, 1:] - low[:, 1:],
+                            np.maximum(np.abs(high[:, 1:] - previous), np.abs(low[:, 1:] - previous)))
+    return out[0] if flat else out
+
+
+def atr(high, low, close, length=14):
+    """Average true range with Wilder's smoothing (like ta.atr)."""
+    return rma(true_range(high, low, close), length)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd, histogram, signal) like the MACD / MACDh / MACDs columns of ta.macd."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, line - signal_line, signal_line
+
+
+# =========================================================================
+# === ENTRY POINT: NUMERICAL CHECK AGAINST PANDAS_TA ===
+# =========================================================================
+
+if __name__ == "__main__":
+    import pandas as pd
+    import pandas_ta as ta
+
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (8, 1000)), axis=1))
+    high = close * (1 + np.abs(rng.normal(0, 0.005, close.shape)))
+    low = close * (1 - np.abs(rng.normal(0, 0.005, close.shape)))
+
+    def reference(name, row):
+        c, h, l = pd.Series(close[row]), pd.Series(high[row]), pd.Series(low[row])
+        return {
+            'ema': lambda: ta.ema(c, length=20),
+            'sma': lambda: ta.sma(c, length=20),
+            'rma': lambda: ta.rma(c, length=14),
+            'rsi': lambda: ta.rsi(c, length=14),
+            'atr': lambda: ta.atr(h, l, c, length=14),
+            'macd': lambda: ta.macd(c, fast=12, slow=26, signal=9).iloc[:, 0],
+            'macd_signal': lambda: ta.macd(c, fast=12, slow=26, signal=9).iloc[:, 2],
+        }[name]().to_numpy(dtype=np.float64)
+
+    kernels = {
+        'ema': lambda: ema(close, 20),
+        'sma': lambda: sma(close, 20),
+        'rma': lambda: rma(close, 14),
+        'rsi': lambda: rsi(close, 14),
+        'atr': lambda: atr(high, low, close, 14),
+        'macd': lambda: macd(close)[0],
+        'macd_signal': lambda: macd(close)[2],
+    }
+    failed = False
+    for name, kernel in kernels.items():
+        batch = kernel()
+        worst = 0.0
+        for row in range(len(close)):
+            expected = reference(name, row)
+            if not np.array_equal(np.isnan(batch[row]), np.isnan(expected)):
+                worst = np.inf
+                break
+            mask = ~np.isnan(expected)
+            worst = max(worst, float(np.max(np.abs(batch[row][mask] - expected[mask])) / np.max(np.abs(expected[mask]))))
+        ok = worst < 1e-9
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {name}: max difference {worst:.2e} (relative to the series scale)")
+    raise SystemExit(1 if failed else 0)
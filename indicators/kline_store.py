@@ -0,0 +1,323 @@
+import logging
+import numpy as np
+import threading
+import time as tm
+import os
+import clock
+from .candles import KLINE_COLUMNS, Candles, decode_kline_rows
+
+log = logging.getLogger(__name__)
+
+# --- Kline interval lengths in milliseconds ('M' has no fixed length) ---
+INTERVAL_MS = {'D': 86400000, 'W': 604800000}
+
+# Column layout of the store (KLINE_COLUMNS): one raw little-endian file per column, rows in ascending open_time
+COLUMN_DTYPES = {'open_time': '<i8', 'open': '<f8', 'high': '<f8', 'low': '<f8', 'close': '<f8', 'volume': '<f8', 'turnover': '<f8'}
+
+# Bybit returns at most 1000 candles per get_kline call
+MAX_KLINE_PAGE = 1000
+
+
+def interval_to_ms(interval):
+    """Returns the candle length in ms for a Bybit interval ('1'...'720', 'D', 'W'), or None for 'M'."""
+    interval = str(interval)
+    if interval.isdigit():
+        return int(interval) * 60000
+    return INTERVAL_MS.get(interval)
+
+
+def fetch_kline_rows(client, symbol, category, interval, limit, start=None, end=None):
+    """Fetches raw candles as a float64 array (rows ascending, columns as KLINE_COLUMNS), or None on error."""
+    try:
+        request = {'category': category, 'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start is not None:
+            request['start'] = int(start)
+        if end is not None:
+            request['end'] = int(end)
+        response = client.get_kline(**request)
+        if response['retCode'] == 0:
+            return decode_kline_rows(response['result']['list'])
+    except Exception as e:
+        # The shared client has already retried within its budget
+        log.warning(f"⚠️ Kline data fetch for {symbol} failed: {e}")
+    return None
+
+
+class KlineStore:
+    """
+    Append-only columnar kline store on disk, keyed by (category, symbol, interval).
+
+    Each key is a directory with one raw file per column (e.g. `close.f8`), so any column
+    can be memory-mapped with NumPy without loading the rest. Only closed candles are
+    stored, in ascending open_time; `sync` downloads just the missing ranges. Candles the
+    exchange itself does not have (e.g. a maintenance window) are recorded in `gaps.i8`
+    as (last open_time before, first open_time after) pairs instead of being re-downloaded.
+    """
+    def __init__(self, root='kline_store'):
+        self.root = root
+        self.lock = threading.Lock()
+        # Keys whose backfill found no older candles (recent listings): not requested again
+        self.history_starts = set()
+
+    def path(self, category, symbol, interval):
+        return os.path.join(self.root, category, str(interval), symbol)
+
+    def keys(self, category=None, interval=None):
+        """Lists stored (category, symbol, interval) keys."""
+        keys = []
+        if not os.path.isdir(self.root):
+            return keys
+        for cat in sorted(os.listdir(self.root)):
+            if category is not None and cat != category:
+                continue
+            for iv in sorted(os.listdir(os.path.join(self.root, cat))):
+                if interval is not None and iv != str(interval):
+                    continue
+                for symbol in sorted(os.listdir(os.path.join(self.root, cat, iv))):
+                    keys.append((cat, symbol, iv))
+        return keys
+
+    def _column_file(self, directory, column):
+        return os.path.join(directory, f"{column}.{COLUMN_DTYPES[column][1:]}")
+
+    def count(self, category, symbol, interval):
+        """Number of complete rows (a crash mid-append can leave columns of different length)."""
+        directory = self.path(category, symbol, interval)
+        sizes = []
+        for column in KLINE_COLUMNS:
+            file_path = self._column_file(directory, column)
+            if not os.path.exists(file_path):
+                return 0
+            sizes.append(os.path.getsize(file_path) // 8)
+        return min(sizes)
+
+    def read(self, category, symbol, interval, start=None, end=None, columns=None):
+        """
+        Memory-maps the stored columns and returns {column: array} restricted to
+        start <= open_time <= end (ms). Arrays are read-only views of the files.
+        """
+        columns = columns or KLINE_COLUMNS
+        directory = self.path(category, symbol, interval)
+        n = self.count(category, symbol, interval)
+        if n == 0:
+            return {column: np.empty(0, dtype=COLUMN_DTYPES[column]) for column in columns}
+
+        open_time = np.memmap(self._column_file(directory, 'open_time'), dtype='<i8', mode='r', shape=(n,))
+        lo = 0 if start is None else int(np.searchsorted(open_time, start, side='left'))
+        hi = n if end is None else int(np.searchsorted(open_time, end, side='right'))
+
+        data = {}
+        for column in columns:
+            if column == 'open_time':
+                data[column] = open_time[lo:hi]
+            else:
+                data[column] = np.memmap(self._column_file(directory, column), dtype=COLUMN_DTYPES[column], mode='r', shape=(n,))[lo:hi]
+        return data
+
+    def read_tail(self, category, symbol, interval, count):
+        """Returns the last `count` stored candles as a KLINE_COLUMNS row array."""
+        n = self.count(category, symbol, interval)
+        if n == 0:
+            return np.empty((0, len(KLINE_COLUMNS)))
+        directory = self.path(category, symbol, interval)
+        first = max(0, n - count)
+        rows = np.empty((n - first, len(KLINE_COLUMNS)))
+        for i, column in enumerate(KLINE_COLUMNS):
+            rows[:, i] = np.memmap(self._column_file(directory, column), dtype=COLUMN_DTYPES[column], mode='r', shape=(n,))[first:]
+        return rows
+
+    def bounds(self, category, symbol, interval):
+        """Returns (first_open_time, last_open_time) in ms, or None for an empty key."""
+        n = self.count(category, symbol, interval)
+        if n == 0:
+            return None
+        open_time = np.memmap(self._column_file(self.path(category, symbol, interval), 'open_time'), dtype='<i8', mode='r', shape=(n,))
+        return int(open_time[0]), int(open_time[-1])
+
+    def gaps(self, category, symbol, interval):
+        """Recorded exchange gaps of a key as [(last open_time before, first open_time after)] in ms."""
+        file_path = os.path.join(self.path(category, symbol, interval), 'gaps.i8')
+        if not os.path.exists(file_path):
+            return []
+        pairs = np.fromfile(file_path, dtype='<i8')
+        return [(int(pairs[i]), int(pairs[i + 1])) for i in range(0, len(pairs) - 1, 2)]
+
+    def _record_gaps(self, directory, previous_last, open_time, step_ms):
+        """Appends the holes between `previous_last` (or None) and the ascending `open_time` to gaps.i8."""
+        times = np.asarray(open_time, dtype=np.int64)
+        if previous_last is not None:
+            times = np.concatenate([[previous_last], times])
+        holes = np.flatnonzero(np.diff(times) != step_ms)
+        if len(holes):
+            pairs = np.column_stack([times[holes], times[holes + 1]]).astype('<i8')
+            with open(os.path.join(directory, 'gaps.i8'), 'ab') as f:
+                f.write(pairs.tobytes())
+            for before, after in pairs:
+                log.info(f"🕳️ {os.path.basename(directory)}: no candles on the exchange between {before} and {after}, gap recorded.")
+
+    def append(self, category, symbol, interval, rows, allow_gaps=False):
+        """
+        Appends closed candles (KLINE_COLUMNS row array, ascending). Rows already stored are
+        skipped. Returns False without writing if the new rows would leave a gap, unless
+        `allow_gaps` (the rows are a complete exchange download): then the gap is recorded.
+        """
+        step_ms = interval_to_ms(interval)
+        if step_ms is None or len(rows) == 0:
+            return True
+        with self.lock:
+            directory = self.path(category, symbol, interval)
+            n = self.count(category, symbol, interval)
+            bounds = self.bounds(category, symbol, interval)
+            last = None
+            if bounds is not None:
+                last = bounds[1]
+                rows = rows[rows[:, 0] > last]
+                if len(rows) == 0:
+                    return True
+            contiguous = np.all(np.diff(rows[:, 0]) == step_ms) and (last is None or int(rows[0, 0]) == last + step_ms)
+            if not contiguous and not allow_gaps:
+                return False
+            os.makedirs(directory, exist_ok=True)
+            if not contiguous:
+                self._record_gaps(directory, last, rows[:, 0], step_ms)
+            for i, column in enumerate(KLINE_COLUMNS):
+                file_path = self._column_file(directory, column)
+                with open(file_path, 'r+b' if os.path.exists(file_path) else 'wb') as f:
+                    # Drop any partial tail left by an interrupted append
+                    f.truncate(n * 8)
+                    f.seek(n * 8)
+                    f.write(np.ascontiguousarray(rows[:, i], dtype=COLUMN_DTYPES[column]).tobytes())
+            return True
+
+    def _rewrite(self, category, symbol, interval, rows):
+        """Replaces a key's files atomically (used when backfilling history before the first candle)."""
+        directory = self.path(category, symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        for i, column in enumerate(KLINE_COLUMNS):
+            file_path = self._column_file(directory, column)
+            with open(file_path + '.tmp', 'wb') as f:
+                f.write(np.ascontiguousarray(rows[:, i], dtype=COLUMN_DTYPES[column]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        # open_time last, so a crash in between never leaves fewer times than prices
+        for column in KLINE_COLUMNS[1:] + KLINE_COLUMNS[:1]:
+            file_path = self._column_file(directory, column)
+            os.replace(file_path + '.tmp', file_path)
+
+    def _download(self, client, symbol, category, interval, start, end):
+        """Downloads closed candles with start <= open_time <= end, paging backwards from `end`."""
+        step_ms = interval_to_ms(interval)
+        pages = []
+        cursor = end
+        while cursor >= start:
+            rows = fetch_kline_rows(client, symbol, category, interval, MAX_KLINE_PAGE, start=start, end=cursor)
+            if rows is None:
+                return None
+            if len(rows) == 0:
+                break
+            pages.append(rows)
+            cursor = int(rows[0, 0]) - step_ms
+            if len(rows) < MAX_KLINE_PAGE:
+                break
+        if not pages:
+            return np.empty((0, len(KLINE_COLUMNS)))
+        rows = np.concatenate(pages[::-1])
+        return rows[(rows[:, 0] >= start) & (rows[:, 0] <= end)]
+
+    def sync(self, client, category, symbol, interval, start=None, end=None):
+        """
+        Makes the store cover [start, end] (ms, default: up to the last closed candle)
+        by downloading only the ranges that are not on disk yet. Returns the number of new rows.
+        """
+        step_ms = interval_to_ms(interval)
+        if step_ms is None:
+            raise ValueError(f"Interval {interval} has no fixed length and cannot be stored.")
+        last_closed = (int(clock.time() * 1000) // step_ms - 1) * step_ms
+        end = last_closed if end is None else min(end, last_closed)
+        bounds = self.bounds(category, symbol, interval)
+        added = 0
+
+        if bounds is None:
+            rows = self._download(client, symbol, category, interval, start if start is not None else end - (MAX_KLINE_PAGE - 1) * step_ms, end)
+            if rows is not None and len(rows):
+                self.append(category, symbol, interval, rows, allow_gaps=True)
+                added += len(rows)
+            return added
+
+        first, last = bounds
+        if start is not None and start < first:
+            # Backfill: the layout is append-only, so older history means rewriting the key
+            older = self._download(client, symbol, category, interval, start, first - step_ms)
+            if older is not None and len(older):
+                with self.lock:
+                    stored = self.read_tail(category, symbol, interval, self.count(category, symbol, interval))
+                    self._rewrite(category, symbol, interval, np.concatenate([older, stored]))
+                    self._record_gaps(self.path(category, symbol, interval), None, np.concatenate([older[:, 0], [first]]), step_ms)
+                added += len(older)
+        if end > last:
+            newer = self._download(client, symbol, category, interval, last + step_ms, end)
+            if newer is not None and len(newer):
+                # The download covers the whole range: a hole in it is a hole on the exchange
+                self.append(category, symbol, interval, newer, allow_gaps=True)
+                added += len(newer)
+        return added
+
+    def get_recent(self, client, symbol, category, interval, limit):
+        """
+        Returns the last `limit` candles (closed ones from disk plus the forming one from the API)
+        as Candles, downloading only candles newer than the last stored one, and older ones
+        once if the store holds less history than `limit`.
+        """
+        step_ms = interval_to_ms(interval)
+        bounds = self.bounds(category, symbol, interval)
+        if step_ms is None or bounds is None:
+            rows = fetch_kline_rows(client, symbol, category, interval, limit)
+        else:
+            key = (category, symbol, str(interval))
+            first_needed = (int(clock.time() * 1000) // step_ms - 1 - (limit - 1)) * step_ms
+            if bounds[0] > first_needed and key not in self.history_starts:
+                # E.g. KLINE_LIMIT was raised: backfill the older candles
+                self.sync(client, category, symbol, interval, start=first_needed)
+                bounds = self.bounds(category, symbol, interval)
+                if bounds[0] > first_needed:
+                    self.history_starts.add(key)
+            missed = (int(clock.time() * 1000) - bounds[1]) // step_ms
+            if missed >= MAX_KLINE_PAGE:
+                self.sync(client, category, symbol, interval)
+                bounds = self.bounds(category, symbol, interval)
+                missed = (int(clock.time() * 1000) - bounds[1]) // step_ms
+            fresh = fetch_kline_rows(client, symbol, category, interval, max(1, int(missed)), start=bounds[1] + step_ms)
+            if fresh is None:
+                return None
+            stored = self.read_tail(category, symbol, interval, limit)
+            rows = np.concatenate([stored, fresh])[-limit:]
+        if rows is None:
+            return None
+        # Everything but the forming (last) candle is closed and goes to disk
+        if step_ms is not None and len(rows) > 1 and not self.append(category, symbol, interval, rows[:-1]):
+            self.sync(client, category, symbol, interval)
+        return Candles.from_rows(rows)
+
+
+# =========================================================================
+# === ENTRY POINT: OFFLINE SYNC (python -m indicators.kline_store) ===
+# =========================================================================
+
+if __name__ == "__main__":
+    import argparse
+    from bybit_client import get_shared_client
+
+    parser = argparse.ArgumentParser(description="Download kline history into the local store.")
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--category', default='linear')
+    parser.add_argument('--interval', default='60')
+    parser.add_argument('--days', type=float, default=30, help="History depth to keep on disk")
+    parser.add_argument('--root', default='kline_store')
+    args = parser.parse_args()
+
+    store = KlineStore(args.root)
+    client = get_shared_client()
+    start_ms = int((tm.time() - args.days * 86400) * 1000)
+    for symbol in args.symbols:
+        added = store.sync(client, args.category, symbol, args.interval, start=start_ms)
+        print(f"{symbol}: +{added} candles, {store.count(args.category, symbol, args.interval)} stored")
@@ -0,0 +1,47 @@
+import numpy as np
+
+# =========================================================================
+# === CROSS-SECTIONAL SIGNAL RANKING ===
+# -------------------------------------------------------------------------
+# With SIGNAL_RANKING set, a scan first fetches every symbol, aligns the
+# candles into one (field, symbol, time) array (stack_candles) and lets
+# each strategy evaluate all symbols in one vectorized pass
+# (evaluate_matrix). All signals are then ranked by the chosen score and
+# the best one wins instead of the first one in ticker order.
+#   'spread'     - signal strength reported by the strategy
+#                  (EMA: |fast - slow| / close on the forming candle)
+#   'turnover'   - quote turnover over the last 24h of candles
+#   'volatility' - standard deviation of close-to-close log returns
+# =========================================================================
+
+DAY_MS = 86400000
+
+
+def turnover_score(values, strength, step_ms):
+    window = max(1, DAY_MS // step_ms) if step_ms else values.shape[2]
+    return values[5][:, -window:].sum(axis=1)
+
+
+def volatility_score(values, strength, step_ms):
+    closes = values[3]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(closes[:, 1:] / closes[:, :-1]).std(axis=1)
+
+
+def spread_score(values, strength, step_ms):
+    return strength
+
+
+SCORES = {
+    'spread': spread_score,
+    'turnover': turnover_score,
+    'volatility': volatility_score,
+}
+
+
+def score_signals(ranking, values, strength, step_ms):
+    """Score per symbol row (NaN scores rank last)."""
+    if ranking not in SCORES:
+        raise ValueError(f"Unknown SIGNAL_RANKING '{ranking}'. Use one of {sorted(SCORES)}.")
+    scores = np.asarray(SCORES[ranking](values, strength, step_ms), dtype=np.float64)
+    return np.where(np.isnan(scores), -np.inf, scores)
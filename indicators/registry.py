@@ -0,0 +1,168 @@
+import logging
+import numpy as np
+import time as tm
+from .candles import stack_candles
+from .kline_store import interval_to_ms
+from .ranking import score_signals
+
+log = logging.getLogger(__name__)
+
+# =========================================================================
+# === INDICATOR REGISTRY AND STRATEGY GROUPS ===
+# -------------------------------------------------------------------------
+# Indicator classes register under a numeric strategy type
+# (@register_indicator(1)), which is what STRATEGY_TYPE selects.
+# IndicatorGroup runs several strategies in one process: one kline fetch
+# per (symbol, interval) per scan and one shared FeatureCache, so each
+# feature is computed once per closed candle for all of them.
+# =========================================================================
+
+INDICATORS = {} # {strategy_type: indicator class}
+
+
+def register_indicator(strategy_type):
+    """Class decorator registering a BaseIndicator subclass under `strategy_type`."""
+    def decorator(cls):
+        if strategy_type in INDICATORS and INDICATORS[strategy_type] is not cls:
+            raise ValueError(f"Strategy type {strategy_type} is already registered by {INDICATORS[strategy_type].__name__}.")
+        cls.strategy_type = strategy_type
+        INDICATORS[strategy_type] = cls
+        return cls
+    return decorator
+
+
+def create_indicator(strategy_type, params, test_net=False, client=None):
+    IndicatorClass = INDICATORS.get(strategy_type)
+    if IndicatorClass is None:
+        raise ValueError(f"Strategy type {strategy_type} is not implemented. Registered: {sorted(INDICATORS)}.")
+    return IndicatorClass(params, test_net=test_net, client=client)
+
+
+class IndicatorGroup:
+    """Scans the universe once for several indicators of the same category."""
+    def __init__(self, indicators):
+        if not indicators:
+            raise ValueError("An indicator group needs at least one indicator.")
+        self.indicators = list(indicators)
+        lead = self.indicators[0]
+        self.category = lead.category
+        for indicator in self.indicators:
+            if indicator.category != self.category:
+                raise ValueError(f"{indicator.name} trades {indicator.category}, the group trades {self.category}.")
+            # One candle cache and one feature cache for the whole group
+            indicator.kline_cache = lead.kline_cache
+            indicator.feature_cache = lead.feature_cache
+        # Best-signal ranking across the universe (None = first signal in ticker order)
+        self.ranking = lead.params.get('SIGNAL_RANKING')
+        # Largest history each interval needs (features are computed on the same candles for all)
+        self.kline_limits = {}
+        for indicator in self.indicators:
+            self.kline_limits[indicator.interval] = max(self.kline_limits.get(indicator.interval, 0), indicator.kline_limit)
+
+    @property
+    def name(self):
+        return ' + '.join(indicator.name for indicator in self.indicators)
+
+    def set_shared(self, ticker_cache=None):
+        for indicator in self.indicators:
+            indicator.ticker_cache = ticker_cache
+
+    @property
+    def intervals(self):
+        return list(self.kline_limits)
+
+    def check_coin(self, coin, intervals=None):
+        """Returns (indicator, signal) for the first indicator (in group order) with a signal, or None."""
+        lead = self.indicators[0]
+        for interval, limit in self.kline_limits.items():
+            if intervals is not None and interval not in intervals:
+                continue
+            candles = lead.get_kline_data(coin, interval=interval, limit=limit)
+            if candles is None:
+                continue
+            for indicator in self.indicators:
+                if indicator.interval != interval:
+                    continue
+                signal = indicator.check_candles(coin, candles)
+                if signal is not None:
+                    return indicator, signal
+        return None
+
+    def universe(self, exclude=()):
+        """Symbols of all indicators (ticker order, no duplicates), without `exclude`."""
+        tickers = []
+        seen = set(exclude)
+        for indicator in self.indicators:
+            for coin in indicator.get_all_tickers():
+                if coin not in seen:
+                    seen.add(coin)
+                    tickers.append(coin)
+        return tickers
+
+    def get_signals(self, exclude=(), intervals=None, limit=None, symbols=None):
+        """
+        Scans the universe and returns up to `limit` signals as [coin, signal, category, indicator, score]:
+        best-scored first with SIGNAL_RANKING, otherwise in ticker order (score None).
+        `intervals` limits the scan to the strategies on those intervals (default: all).
+        `symbols` replaces the universe (e.g. a scan worker's share of it).
+        """
+        tickers_to_check = self.universe(exclude) if symbols is None else [coin for coin in symbols if coin not in exclude]
+        if self.ranking is not None:
+            return self.rank_signals(tickers_to_check, intervals)[:limit]
+
+        results = self.indicators[0].scan_symbols(tickers_to_check, lambda coin: self.check_coin(coin, intervals))
+        return [[coin, result[1], self.category, result[0], None]
+                for coin, result in zip(tickers_to_check, results) if result is not None][:limit]
+
+    def get_first_coin_to_buy(self, exclude=(), intervals=None):
+        """
+        Returns [coin, signal, category, indicator] for the first signal in ticker order (or the
+        best-ranked one with SIGNAL_RANKING), or None.
+        """
+        signals = self.get_signals(exclude, intervals)
+        if not signals:
+            return None
+        self.log_signal(signals[0], len(signals))
+        return signals[0][:4]
+
+    def log_signal(self, signal, count=None):
+        """Logs a [coin, signal, category, indicator, score] signal (`count` = size of the ranked batch)."""
+        coin, signal_type, category, indicator, score = signal
+        direction = 'LONG' if signal_type == 'STRONG_BUY' else 'SHORT'
+        if score is None:
+            log.info(f"{direction} Signal by {indicator.name} for {coin}.")
+        else:
+            log.info(f"{direction} Signal by {indicator.name} for {coin} (of {count} by {self.ranking}: {score:.6g}).")
+
+    def rank_signals(self, tickers, intervals=None):
+        """Fetches all symbols, evaluates them as one (symbol x time) matrix per interval and returns the signals best-scored first."""
+        lead = self.indicators[0]
+        candidates = [] # (score, coin, signal, indicator)
+        for interval, limit in self.kline_limits.items():
+            if intervals is not None and interval not in intervals:
+                continue
+            fetched = lead.scan_symbols(tickers, lambda coin: lead.get_kline_data(coin, interval=interval, limit=limit))
+            symbols, _, values = stack_candles(tickers, fetched, limit)
+            if not symbols:
+                continue
+
+            start = tm.perf_counter()
+            by_symbol = dict(zip(tickers, fetched))
+            for indicator in self.indicators:
+                if indicator.interval != interval:
+                    continue
+                result = indicator.evaluate_matrix(values)
+                if result is None:
+                    # No vectorized path: evaluate symbol by symbol on the same candles
+                    found = [indicator.check_candles(coin, by_symbol[coin]) for coin in symbols]
+                    signals = np.array([1 if s == 'STRONG_BUY' else -1 if s == 'STRONG_SELL' else 0 for s in found], dtype=np.int8)
+                    strength = np.zeros(len(symbols))
+                else:
+                    signals, strength = result
+                scores = score_signals(self.ranking, values, strength, interval_to_ms(interval))
+                for row in np.nonzero(signals)[0]:
+                    candidates.append((scores[row], symbols[row], 'STRONG_BUY' if signals[row] > 0 else 'STRONG_SELL', indicator))
+            log.debug(f"Ranked {len(symbols)} symbols on {interval} in {(tm.perf_counter() - start) * 1000:.1f} ms ({len(tickers) - len(symbols)} skipped: short or lagging history)")
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [[coin, signal, self.category, indicator, score] for score, coin, signal, indicator in candidates]
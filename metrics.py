@@ -0,0 +1,169 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+import threading
+import bisect
+import json
+import os
+import time as tm
+
+# =========================================================================
+# === METRICS (COUNTERS, GAUGES, HISTOGRAMS) AND EXPORTERS ===
+# -------------------------------------------------------------------------
+# One process-wide registry (METRICS). Recording a value is a dict update
+# under a short lock, so it is safe on the hot path and never does I/O;
+# exporting happens in background threads:
+#   start_http_exporter(port) - Prometheus text format on /metrics
+#   start_json_dump(path)     - whole registry written every N seconds
+# Metric names follow Prometheus conventions (`_total`, `_seconds`).
+# =========================================================================
+
+# Latency buckets in seconds: API calls and journal writes up to slow scans
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {} # {(name, labels): value}
+        self.gauges = {} # {(name, labels): value}
+        self.histograms = {} # {(name, labels): [bucket counts..., +Inf count, sum]}
+        self.buckets = {} # {name: bucket upper bounds}
+        self.help = {} # {name: description}
+
+    def describe(self, name, text, buckets=None):
+        """Sets the help text (and histogram buckets) of a metric."""
+        self.help[name] = text
+        if buckets is not None:
+            self.buckets[name] = tuple(sorted(buckets))
+
+    # --- Recording ---
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self.buckets.get(name, DEFAULT_BUCKETS)
+        slot = bisect.bisect_left(buckets, value)
+        with self.lock:
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            entry[slot] += 1
+            entry[-1] += value
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Observes the duration of the `with` block in seconds."""
+        start = tm.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, tm.perf_counter() - start, **labels)
+
+    # --- Reading ---
+
+    def snapshot(self):
+        """JSON-friendly copy: {'counters': [...], 'gauges': [...], 'histograms': [...]}."""
+        with self.lock:
+            counters = list(self.counters.items())
+            gauges = list(self.gauges.items())
+            histograms = [(key, list(entry)) for key, entry in self.histograms.items()]
+        snapshot = {
+            'timestamp': tm.time(),
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in counters],
+            'gauges': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in gauges],
+            'histograms': [],
+        }
+        for (name, labels), entry in histograms:
+            buckets = self.buckets.get(name, DEFAULT_BUCKETS)
+            snapshot['histograms'].append({
+                'name': name, 'labels': dict(labels), 'buckets': list(buckets),
+                'counts': entry[:-1], 'count': sum(entry[:-1]), 'sum': entry[-1],
+            })
+        return snapshot
+
+    def prometheus_text(self):
+        """Registry in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        def label_text(labels, extra=None):
+            items = list(labels.items()) + ([extra] if extra else [])
+            return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}' if items else ''
+
+        for kind, metrics in (('counter', snapshot['counters']), ('gauge', snapshot['gauges'])):
+            for metric in sorted(metrics, key=lambda m: m['name']):
+                header(metric['name'], kind)
+                lines.append(f"{metric['name']}{label_text(metric['labels'])} {metric['value']}")
+        for metric in sorted(snapshot['histograms'], key=lambda m: m['name']):
+            name = metric['name']
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(list(metric['buckets']) + ['+Inf'], metric['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{label_text(metric['labels'], ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{label_text(metric['labels'])} {metric['sum']}")
+            lines.append(f"{name}_count{label_text(metric['labels'])} {metric['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry used by every module
+METRICS = Metrics()
+
+
+# --- Exporters ---
+
+def start_http_exporter(port, host='127.0.0.1', metrics=METRICS):
+    """Serves /metrics (Prometheus text format) from a daemon thread. Returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # no access log on the console
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def start_json_dump(path, every=60, metrics=METRICS):
+    """Writes the registry snapshot to `path` every `every` seconds (atomic replace) from a daemon thread."""
+    def loop():
+        while True:
+            tm.sleep(every)
+            try:
+                tmp_file = path + '.tmp'
+                with open(tmp_file, 'w') as f:
+                    json.dump(metrics.snapshot(), f)
+                os.replace(tmp_file, path)
+            except OSError:
+                pass
+    thread = threading.Thread(target=loop, name='metrics-json', daemon=True)
+    thread.start()
+    return thread
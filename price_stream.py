@@ -0,0 +1,140 @@
+import logging
+import websocket
+import threading
+import json
+import time as tm
+
+log = logging.getLogger(__name__)
+
+# =========================================================================
+# === PRICE STREAM (BYBIT V5 PUBLIC TICKER WEBSOCKET) ===
+# -------------------------------------------------------------------------
+# Keeps the last traded price of subscribed symbols up to date from the
+# `tickers.<SYMBOL>` topic and calls `on_price(symbol, price)` on every
+# update. Reconnects with exponential backoff and resubscribes; callers
+# check `get_price(symbol)` (None when the stream is stale) and fall back
+# to REST polling. `url` can point at a local stand-in server.
+# =========================================================================
+
+WS_PUBLIC_MAINNET = 'wss://stream.bybit.com/v5/public/{category}'
+WS_PUBLIC_TESTNET = 'wss://stream-testnet.bybit.com/v5/public/{category}'
+
+
+class PriceStream:
+    def __init__(self, category, testnet=False, url=None, on_price=None, stale_after=10, ping_interval=20, max_backoff=30):
+        self.url = url or (WS_PUBLIC_TESTNET if testnet else WS_PUBLIC_MAINNET).format(category=category)
+        self.on_price = on_price
+        self.stale_after = stale_after
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+        self.prices = {} # {symbol: (price, monotonic time of the update)}
+        self.symbols = set()
+        self.lock = threading.Lock()
+        self.ws = None
+        self.connected = False
+        self.stopped = threading.Event()
+        self.thread = None
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, name='price-stream', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.ws is not None:
+            self.ws.close()
+
+    def _run(self):
+        backoff = 1
+        while not self.stopped.is_set():
+            started = tm.monotonic()
+            self.ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=lambda ws, error: log.warning(f"⚠️ Price stream error: {error}")
+            )
+            self.ws.run_forever()
+            self.connected = False
+            if self.stopped.is_set():
+                break
+            # A connection that stayed up for a while resets the backoff
+            if tm.monotonic() - started > self.max_backoff:
+                backoff = 1
+            log.info(f"Price stream disconnected. Reconnecting in {backoff}s...")
+            self.stopped.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _heartbeat(self, ws):
+        # Bybit drops connections without an application-level ping every 20s
+        while self.connected and not self.stopped.wait(self.ping_interval):
+            try:
+                ws.send(json.dumps({'op': 'ping'}))
+            except Exception:
+                break
+
+    # --- WebSocket callbacks ---
+
+    def _on_open(self, ws):
+        self.connected = True
+        with self.lock:
+            topics = [f"tickers.{symbol}" for symbol in self.symbols]
+        if topics:
+            ws.send(json.dumps({'op': 'subscribe', 'args': topics}))
+        threading.Thread(target=self._heartbeat, args=(ws,), daemon=True).start()
+
+    def _on_close(self, ws, status_code=None, message=None):
+        self.connected = False
+
+    def _on_message(self, ws, message):
+        msg = json.loads(message)
+        topic = msg.get('topic', '')
+        if not topic.startswith('tickers.'):
+            return
+        data = msg.get('data', {})
+        # Deltas only carry the fields that changed
+        if 'lastPrice' not in data:
+            return
+        symbol = data.get('symbol') or topic.split('.', 1)[1]
+        price = float(data['lastPrice'])
+        self.prices[symbol] = (price, tm.monotonic())
+        if self.on_price is not None:
+            self.on_price(symbol, price)
+
+    # --- Subscriptions and prices ---
+
+    def _send(self, request):
+        # While disconnected, subscriptions are (re)sent by _on_open
+        if self.connected:
+            try:
+                self.ws.send(json.dumps(request))
+            except Exception:
+                pass
+
+    def subscribe(self, symbol):
+        with self.lock:
+            if symbol in self.symbols:
+                return
+            self.symbols.add(symbol)
+        self._send({'op': 'subscribe', 'args': [f"tickers.{symbol}"]})
+
+    def unsubscribe(self, symbol):
+        with self.lock:
+            if symbol not in self.symbols:
+                return
+            self.symbols.discard(symbol)
+        self.prices.pop(symbol, None)
+        self._send({'op': 'unsubscribe', 'args': [f"tickers.{symbol}"]})
+
+    def get_price(self, symbol):
+        """Last streamed price, or None if the stream has not delivered one within `stale_after` seconds."""
+        entry = self.prices.get(symbol)
+        if entry is None or not self.connected or tm.monotonic() - entry[1] > self.stale_after:
+            return None
+        return entry[0]
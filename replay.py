@@ -0,0 +1,201 @@
+import numpy as np
+import logging
+import os
+import time as tm
+import clock
+from clock import ReplayClock, ReplayFinished
+from indicators.kline_store import KlineStore, interval_to_ms
+from indicators.candles import KLINE_COLUMNS
+
+# =========================================================================
+# === ACCELERATED-CLOCK REPLAY OF THE LIVE BOT OVER STORED KLINES ===
+# -------------------------------------------------------------------------
+# Runs the unchanged TradingBot loop (scheduler, indicators, ticker cache,
+# simulator, journal) against the local kline store instead of Bybit:
+#   ReplayClock  - simulated time; every bot pause advances it instantly
+#   ReplayMarket - pybit-like get_tickers / get_kline answering with what
+#                  the exchange would have returned at the clock's time
+# Closed candles come from the store of the strategy interval. Prices (and
+# the forming candle) come from a finer "tick" interval if one is stored,
+# e.g. '1': the last price is the close of the last closed 1m candle, so
+# nothing after the simulated time is ever visible to the bot.
+# The replay writes its own state and journal under --out.
+#
+#   python -m indicators.kline_store BTCUSDT ETHUSDT --interval 60 --days 60
+#   python -m indicators.kline_store BTCUSDT ETHUSDT --interval 1 --days 30
+#   python replay.py --interval 60 --tick-interval 1 --days 30 --out replay_run
+# =========================================================================
+
+
+class ReplayMarket:
+    def __init__(self, store, category, interval, symbols=None, tick_interval=None, testnet=False):
+        self.category = category
+        self.interval = str(interval)
+        self.tick_interval = str(tick_interval) if tick_interval else self.interval
+        self.testnet = testnet
+        self.series = {} # {(symbol, interval): (open_time int64, KLINE_COLUMNS row array)}
+        self.turnover_sums = {} # {symbol: cumulative turnover of the strategy interval, with a leading 0}
+        self.ticker_cache = (None, None) # (tick candle, tickers list) of the last get_tickers
+
+        symbols = symbols or [key[1] for key in store.keys(category, self.interval)]
+        for symbol in symbols:
+            for interval in {self.interval, self.tick_interval}:
+                data = store.read(category, symbol, interval)
+                if len(data['open_time']):
+                    rows = np.column_stack([np.asarray(data[column], dtype=np.float64) for column in KLINE_COLUMNS])
+                    self.series[(symbol, interval)] = (np.array(data['open_time']), rows)
+        self.symbols = [symbol for symbol in symbols if (symbol, self.interval) in self.series]
+        for symbol in self.symbols:
+            self.turnover_sums[symbol] = np.concatenate([[0.0], np.cumsum(self.series[(symbol, self.interval)][1][:, 6])])
+
+    def span(self):
+        """(first open_time, last close time) in ms of the strategy interval over all symbols, or None."""
+        if not self.symbols:
+            return None
+        step_ms = interval_to_ms(self.interval)
+        first = min(int(self.series[(s, self.interval)][0][0]) for s in self.symbols)
+        last = max(int(self.series[(s, self.interval)][0][-1]) for s in self.symbols)
+        return first, last + step_ms
+
+    # --- Data as seen at `now_ms` ---
+
+    def _closed_count(self, symbol, interval, now_ms):
+        """Number of stored candles of the key closed at now_ms (open_time + step <= now_ms)."""
+        open_time = self.series[(symbol, interval)][0]
+        return int(np.searchsorted(open_time, now_ms - interval_to_ms(interval), side='right'))
+
+    def last_price(self, symbol, now_ms):
+        """Close of the newest closed candle (tick interval preferred, strategy interval outside its range), or None."""
+        latest = None
+        for interval in (self.interval, self.tick_interval):
+            if (symbol, interval) in self.series:
+                count = self._closed_count(symbol, interval, now_ms)
+                if count:
+                    open_time, rows = self.series[(symbol, interval)]
+                    close_ms = int(open_time[count - 1]) + interval_to_ms(interval)
+                    if latest is None or close_ms >= latest[0]:
+                        latest = (close_ms, rows[count - 1, 4])
+        return latest[1] if latest else None
+
+    def _forming(self, symbol, interval, now_ms):
+        """The candle of `interval` forming at now_ms, built from the closed tick candles inside it."""
+        start = now_ms // interval_to_ms(interval) * interval_to_ms(interval)
+        price = self.last_price(symbol, now_ms)
+        if price is None:
+            return None
+        if self.tick_interval != interval and (symbol, self.tick_interval) in self.series:
+            open_time, rows = self.series[(symbol, self.tick_interval)]
+            ticks = rows[int(np.searchsorted(open_time, start, side='left')):self._closed_count(symbol, self.tick_interval, now_ms)]
+            if len(ticks):
+                return [start, ticks[0, 1], ticks[:, 2].max(), ticks[:, 3].min(), ticks[-1, 4], ticks[:, 5].sum(), ticks[:, 6].sum()]
+        return [start, price, price, price, price, 0.0, 0.0]
+
+    # --- pybit HTTP methods ---
+
+    def get_tickers(self, category='linear', symbol=None, **kwargs):
+        now_ms = int(clock.time() * 1000)
+        # Prices only change once per tick candle
+        tick = now_ms // interval_to_ms(self.tick_interval)
+        if self.ticker_cache[0] != tick:
+            step_ms = interval_to_ms(self.interval)
+            day = max(1, 86400000 // step_ms)
+            tickers = []
+            for name in self.symbols:
+                price = self.last_price(name, now_ms)
+                if price is None:
+                    continue
+                count = self._closed_count(name, self.interval, now_ms)
+                sums = self.turnover_sums[name]
+                tickers.append({'symbol': name, 'lastPrice': str(price), 'turnover24h': str(sums[count] - sums[max(0, count - day)])})
+            self.ticker_cache = (tick, tickers)
+        tickers = self.ticker_cache[1] if category == self.category else []
+        if symbol is not None:
+            tickers = [t for t in tickers if t['symbol'] == symbol]
+        return {'retCode': 0, 'retMsg': 'OK', 'result': {'category': category, 'list': tickers}}
+
+    def get_kline(self, category='linear', symbol=None, interval='60', limit=200, start=None, end=None, **kwargs):
+        now_ms = int(clock.time() * 1000)
+        interval = str(interval)
+        if category != self.category or (symbol, interval) not in self.series:
+            return {'retCode': 0, 'retMsg': 'OK', 'result': {'category': category, 'symbol': symbol, 'list': []}}
+        open_time, rows = self.series[(symbol, interval)]
+        count = self._closed_count(symbol, interval, now_ms)
+        rows = rows[max(0, count - int(limit)):count].tolist()
+        forming = self._forming(symbol, interval, now_ms)
+        if forming is not None and (not rows or forming[0] > rows[-1][0]):
+            rows.append(forming)
+        # Newest first, like Bybit: the newest `limit` candles with start <= open_time <= end
+        rows = [row for row in rows if (start is None or row[0] >= int(start)) and (end is None or row[0] <= int(end))]
+        return {'retCode': 0, 'retMsg': 'OK', 'result': {'category': category, 'symbol': symbol, 'list': rows[::-1][:int(limit)]}}
+
+
+def run_replay(market, start_ms, end_ms, out_dir, strategy_type=None, params_map=None):
+    """
+    Runs TradingBot.run_strategy over [start_ms, end_ms) of stored history on a simulated clock.
+    Returns the simulator (its journal holds the trades). `out_dir` must not contain an earlier run.
+    """
+    import complex_bot_demo as bot
+
+    if os.path.exists(os.path.join(out_dir, 'bot_state.wal')) or os.path.exists(os.path.join(out_dir, 'trade_journal.db')):
+        raise FileExistsError(f"{out_dir} already holds a replay; choose another --out directory.")
+    os.makedirs(out_dir, exist_ok=True)
+
+    strategy_type = bot.STRATEGY_TYPE if strategy_type is None else strategy_type
+    # Replays read the store directly: no store writes, no worker threads (nothing waits on I/O)
+    params_map = {type_id: {**params, 'KLINE_STORE_DIR': None, 'SCAN_WORKERS': 1}
+                  for type_id, params in (params_map or bot.PARAMS_MAP).items()}
+
+    previous = clock.set_clock(ReplayClock(start_ms / 1000, end_ms / 1000))
+    try:
+        simulator = bot.TradingSimulator(data_dir=out_dir, client=market, background_tickers=False)
+        trader = bot.TradingBot(simulator, strategy_type, params_map, use_price_stream=False)
+        try:
+            trader.run_strategy()
+        except ReplayFinished:
+            pass
+    finally:
+        clock.set_clock(previous)
+    return simulator
+
+
+# =========================================================================
+# === ENTRY POINT: REPLAY ===
+# =========================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import complex_bot_demo as bot
+
+    parser = argparse.ArgumentParser(description="Replay the live bot loop over the local kline store on a simulated clock.")
+    parser.add_argument('symbols', nargs='*', help="Symbols to replay (default: every stored symbol)")
+    parser.add_argument('--category', default=bot.EMA_PARAMS['CATEGORY'])
+    parser.add_argument('--interval', default=bot.EMA_PARAMS['KLINE_INTERVAL'])
+    parser.add_argument('--tick-interval', default=None, help="Finer stored interval for prices and the forming candle, e.g. 1")
+    parser.add_argument('--days', type=float, default=None, help="Only the last N days of history")
+    parser.add_argument('--root', default=bot.KLINE_STORE_DIR or 'kline_store')
+    parser.add_argument('--out', default='replay_run', help="Directory for the replay's state and trade journal")
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+    store = KlineStore(args.root)
+    market = ReplayMarket(store, args.category, args.interval, args.symbols or None, args.tick_interval)
+    span = market.span()
+    if span is None:
+        raise SystemExit(f"No stored {args.category} {args.interval} klines in {args.root}.")
+    # Indicators need KLINE_LIMIT candles of history before the first scan
+    warmup = max(params['KLINE_LIMIT'] for params in bot.PARAMS_MAP.values()) * interval_to_ms(args.interval)
+    start_ms = max(span[0] + warmup, span[1] - int(args.days * 86400000) if args.days else 0)
+    if start_ms >= span[1]:
+        raise SystemExit("Not enough stored history for the warm-up.")
+
+    started = tm.perf_counter()
+    simulator = run_replay(market, start_ms, span[1], args.out)
+    elapsed = tm.perf_counter() - started
+
+    simulated = (span[1] - start_ms) / 1000
+    print(f"\n--- REPLAY ({len(market.symbols)} symbols, {simulated / 86400:.1f} days in {elapsed:.1f}s, {simulated / max(elapsed, 1e-9):,.0f}x) ---")
+    print(f"Closed trades: {len(simulator.journal)}")
+    print(f"Open positions at the end: {len(simulator.positions)}")
+    print(f"Final balance: {simulator.balance:.2f} USDT")
+    print(f"Journal: {simulator.journal_file}")
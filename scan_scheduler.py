@@ -0,0 +1,90 @@
+import datetime as dt
+
+import clock
+from indicators.kline_store import interval_to_ms
+
+# =========================================================================
+# === CANDLE-CLOSE SCAN SCHEDULER ===
+# -------------------------------------------------------------------------
+# Strategies evaluate closed candles, so a full universe scan is only
+# useful once per candle: the scheduler reports an interval as due right
+# after each of its candle boundaries (plus `settle_delay` seconds for the
+# exchange to publish the new candle). Several intervals are tracked
+# independently. Optional intrabar previews re-check the forming candle
+# every `preview_every` seconds between closes. Monthly candles ('M') have
+# no fixed length: their boundaries are the UTC calendar month starts.
+# =========================================================================
+
+def month_start(ms, months=0):
+    """Open time (ms) of the UTC calendar month containing `ms`, shifted by `months`."""
+    date = dt.datetime.fromtimestamp(ms / 1000, tz=dt.timezone.utc)
+    index = date.year * 12 + date.month - 1 + months
+    return int(dt.datetime(index // 12, index % 12 + 1, 1, tzinfo=dt.timezone.utc).timestamp() * 1000)
+
+
+class ScanScheduler:
+    def __init__(self, intervals, settle_delay=2.0, preview_every=None, clock=clock.time):
+        self.steps = {interval: interval_to_ms(interval) for interval in intervals} # ms, None for 'M'
+        self.settle_ms = int(settle_delay * 1000)
+        self.preview_every = preview_every
+        self.clock = clock
+        self.scanned = {interval: None for interval in self.steps} # last candle boundary scanned (ms)
+        self.last_preview = None
+
+    def _now_ms(self):
+        return int(self.clock() * 1000)
+
+    def _shift(self, interval, open_time, candles):
+        """Open time (ms) `candles` candles after the one opening at `open_time`."""
+        step = self.steps[interval]
+        return month_start(open_time, candles) if step is None else open_time + candles * step
+
+    def last_boundary(self, interval, now_ms=None):
+        """Open time (ms) of the newest candle whose start has settled."""
+        step = self.steps[interval]
+        now_ms = (self._now_ms() if now_ms is None else now_ms) - self.settle_ms
+        return month_start(now_ms) if step is None else now_ms // step * step
+
+    def last_closed(self, interval, now_ms=None):
+        """Open time (ms) of the newest closed candle (the one a close scan evaluates)."""
+        return self._shift(interval, self.last_boundary(interval, now_ms), -1)
+
+    def restore(self, interval, open_time):
+        """Seeds the scan state after a restart from the last processed closed candle (`open_time` ms, or None)."""
+        if interval in self.steps and open_time is not None:
+            self.scanned[interval] = self._shift(interval, int(open_time), 1)
+
+    # --- Close scans ---
+
+    def due(self):
+        """Intervals with a candle closed since their last scan (all of them before the first scan)."""
+        now_ms = self._now_ms()
+        return [interval for interval in self.steps if self.scanned[interval] != self.last_boundary(interval, now_ms)]
+
+    def mark_scanned(self, intervals):
+        now_ms = self._now_ms()
+        for interval in intervals:
+            self.scanned[interval] = self.last_boundary(interval, now_ms)
+        self.last_preview = self.clock()
+
+    # --- Intrabar previews ---
+
+    def preview_due(self):
+        return (self.preview_every is not None and
+                (self.last_preview is None or self.clock() - self.last_preview >= self.preview_every))
+
+    def mark_previewed(self):
+        self.last_preview = self.clock()
+
+    def seconds_until_next(self):
+        """Seconds until the next close scan or preview is due (0 if one is due now)."""
+        now_ms = self._now_ms()
+        waits = []
+        for interval in self.steps:
+            boundary = self.last_boundary(interval, now_ms)
+            if self.scanned[interval] != boundary:
+                return 0.0
+            waits.append((self._shift(interval, boundary, 1) + self.settle_ms - now_ms) / 1000)
+        if self.preview_every is not None:
+            waits.append(0.0 if self.last_preview is None else self.last_preview + self.preview_every - self.clock())
+        return max(0.0, min(waits)) if waits else 0.0
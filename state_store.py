@@ -0,0 +1,130 @@
+import json
+import threading
+import os
+
+# =========================================================================
+# === STATE STORE (SNAPSHOT + WRITE-AHEAD JOURNAL) ===
+# -------------------------------------------------------------------------
+# Balance, open positions and the last processed candle per symbol and
+# interval. Every change is one JSON line appended to `<path>.wal`;
+# balance and position changes are fsynced before returning, candle marks
+# (one line per scan, not per symbol) are not. After `compact_every` lines
+# the whole state is written atomically to `<path>.json` (temp file +
+# fsync + rename) and the journal is truncated.
+# Restoring = read the snapshot + replay the (short) journal; a torn last
+# line from a crash mid-write is cut off before new lines are appended.
+# =========================================================================
+
+class StateStore:
+    def __init__(self, path='bot_state', compact_every=500):
+        self.snapshot_file = path + '.json'
+        self.journal_file = path + '.wal'
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.balance = None
+        self.positions = {}
+        self.last_candles = {} # {"category|symbol|interval": open_time (ms) of the last processed closed candle}
+        self.journal_lines = 0
+        self._load()
+        self.journal = open(self.journal_file, 'a')
+
+    # --- Recovery ---
+
+    def _load(self):
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r') as f:
+                snapshot = json.load(f)
+            self.balance = snapshot.get('balance')
+            self.positions = snapshot.get('positions', {})
+            self.last_candles = snapshot.get('last_candles', {})
+        if os.path.exists(self.journal_file):
+            valid_bytes = 0
+            with open(self.journal_file, 'r+b') as f:
+                for line in f:
+                    try:
+                        # A line without its newline was cut off mid-write too
+                        record = json.loads(line) if line.endswith(b'\n') else None
+                    except ValueError:
+                        record = None
+                    if record is None:
+                        break
+                    self._apply(record)
+                    self.journal_lines += 1
+                    valid_bytes += len(line)
+                # Drop the torn tail, or the next appended lines would follow it and be lost on restore
+                if valid_bytes < os.path.getsize(self.journal_file):
+                    f.truncate(valid_bytes)
+
+    def _apply(self, record):
+        op = record['op']
+        if 'balance' in record:
+            self.balance = record['balance']
+        if op == 'open':
+            self.positions[record['key']] = record['trade']
+        elif op == 'close':
+            self.positions.pop(record['key'], None)
+        elif op == 'candles':
+            for symbol in record['symbols']:
+                self.last_candles[f"{record['category']}|{symbol}|{record['interval']}"] = record['open_time']
+
+    # --- Journal ---
+
+    def _write(self, record, durable=True):
+        with self.lock:
+            self._apply(record)
+            self.journal.write(json.dumps(record) + '\n')
+            self.journal.flush()
+            if durable:
+                os.fsync(self.journal.fileno())
+            self.journal_lines += 1
+            if self.journal_lines >= self.compact_every:
+                self._compact()
+
+    def _compact(self):
+        snapshot = {'balance': self.balance, 'positions': self.positions, 'last_candles': self.last_candles}
+        tmp_file = self.snapshot_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        # The snapshot now contains everything in the journal
+        self.journal.truncate(0)
+        self.journal.seek(0)
+        self.journal_lines = 0
+
+    def compact(self):
+        with self.lock:
+            self._compact()
+
+    def close(self):
+        self.compact()
+        self.journal.close()
+
+    # --- State changes ---
+
+    def set_balance(self, balance):
+        self._write({'op': 'balance', 'balance': balance})
+
+    def open_position(self, key, trade, balance):
+        """Records an opened position together with the balance after the entry fee."""
+        self._write({'op': 'open', 'key': key, 'trade': trade, 'balance': balance})
+
+    def close_position(self, key, balance):
+        """Removes a position together with the balance after PnL and exit fee."""
+        self._write({'op': 'close', 'key': key, 'balance': balance})
+
+    def set_last_candles(self, category, interval, symbols, open_time):
+        """Marks the closed candle `open_time` (ms) of `interval` as processed for all scanned `symbols`."""
+        self._write({'op': 'candles', 'category': category, 'interval': str(interval), 'symbols': list(symbols),
+                     'open_time': int(open_time)}, durable=False)
+
+    def get_last_candle(self, category, symbol, interval):
+        return self.last_candles.get(f"{category}|{symbol}|{interval}")
+
+    def last_scanned(self, category, interval):
+        """Newest processed candle open time (ms) of any symbol of the category and interval, or None."""
+        suffix = f"|{interval}"
+        times = [open_time for key, open_time in self.last_candles.items()
+                 if key.startswith(category + '|') and key.endswith(suffix)]
+        return max(times, default=None)
@@ -0,0 +1,342 @@
+import multiprocessing
+import logging
+import queue
+import os
+import time as tm
+import zlib
+import clock
+from bybit_client import get_shared_client
+from scan_scheduler import ScanScheduler
+from metrics import METRICS, start_http_exporter, start_json_dump
+from indicators.registry import create_indicator, IndicatorGroup
+from complex_bot_demo import (
+    TradingBot, TradingSimulator, PARAMS_MAP, STRATEGY_TYPE, MAX_OPEN_POSITIONS, POSITION_CHECK_SECONDS,
+    SCAN_SHARDS, SCAN_PROCESSES, SIGNAL_QUEUE_SIZE, SIGNAL_MAX_AGE_SECONDS, WORKER_RESTART_DELAY,
+    SCAN_SETTLE_SECONDS, PREVIEW_SCAN_SECONDS, API_RATE_LIMIT, HTTP_POOL_SIZE,
+    MAX_RETRIES, RETRY_DELAY, RETRY_BUDGET, LOG_LEVEL, METRICS_PORT, METRICS_JSON_FILE, METRICS_JSON_EVERY
+)
+
+log = logging.getLogger('supervisor')
+
+METRICS.describe('signal_queue_depth', "Signals waiting in the queue between scan workers and the executor")
+METRICS.describe('signals_received_total', "Signals taken from the queue by the executor")
+METRICS.describe('signals_dropped_total', "Signals discarded by the executor (stale, capacity, open position)")
+METRICS.describe('scan_tasks_skipped_total', "Scan tasks discarded by workers because they waited too long")
+METRICS.describe('scan_workers_alive', "Scan worker processes currently running")
+METRICS.describe('scan_worker_restarts_total', "Restarts of failed scan worker processes")
+
+# =========================================================================
+# === SUPERVISOR MODE: SHARDED SCAN WORKERS + ONE EXECUTOR ===
+# -------------------------------------------------------------------------
+# The (category, interval, symbol) space is split across worker processes:
+# every (category, interval) pair in SCAN_SHARDS gets SCAN_PROCESSES
+# workers, each scanning the symbols with crc32(symbol) % count == index.
+# This process owns the simulator and the scan schedule: after each candle
+# close it fetches the universe once, sends every worker its share of the
+# symbols over the worker's task queue, and the workers publish their best
+# signals to one bounded queue. The executor opens positions while there
+# is capacity and manages SL/TP of all positions in one place.
+# Backpressure: no tasks are sent while no position fits, workers drop
+# tasks that waited too long and signals while the queue is full, and the
+# executor discards signals older than SIGNAL_MAX_AGE_SECONDS.
+# Failed workers are restarted with exponential backoff.
+#
+#   python supervisor.py
+# =========================================================================
+
+
+def plan_shards(pairs, processes=None):
+    """[(category, interval, index, count)] for every (category, interval) pair."""
+    count = processes or max(1, (os.cpu_count() or 1) // len(pairs))
+    return [(category, str(interval), index, count) for category, interval in pairs for index in range(count)]
+
+
+def shard_name(shard):
+    category, interval, index, count = shard
+    return f"{category}/{interval}#{index + 1}of{count}"
+
+
+def split_symbols(symbols, count):
+    """Splits symbols into `count` lists by crc32(symbol) % count (stable across restarts), keeping their order."""
+    parts = [[] for _ in range(count)]
+    for symbol in symbols:
+        parts[zlib.crc32(symbol.encode()) % count].append(symbol)
+    return parts
+
+
+# --- Worker process ---
+
+def scan_worker(shard, task_queue, signal_queue, rate):
+    """Worker process: scans the symbols of every task from `task_queue` and publishes signals to `signal_queue`."""
+    category, interval, index, count = shard
+    name = shard_name(shard)
+    if LOG_LEVEL:
+        logging.basicConfig(level=LOG_LEVEL, format=f'[{name}] %(message)s')
+    else:
+        logging.disable(logging.CRITICAL)
+
+    # The API rate limit is split between the executor and all workers (Bybit limits per IP)
+    client = get_shared_client(rate=rate, pool_size=HTTP_POOL_SIZE, max_retries=MAX_RETRIES,
+                               retry_delay=RETRY_DELAY, retry_budget=RETRY_BUDGET)
+    strategy_types = list(STRATEGY_TYPE) if isinstance(STRATEGY_TYPE, (list, tuple)) else [STRATEGY_TYPE]
+    group = IndicatorGroup([
+        create_indicator(type_id, {**PARAMS_MAP[type_id], 'CATEGORY': category, 'KLINE_INTERVAL': interval}, client=client)
+        for type_id in strategy_types
+    ])
+    log.info(f"Scan worker {name} started ({group.name})")
+
+    while True:
+        try:
+            task = task_queue.get()
+            if clock.time() - task['sent'] > SIGNAL_MAX_AGE_SECONDS:
+                # Queued while the worker was down: the candle is no longer worth scanning
+                METRICS.inc('scan_tasks_skipped_total', shard=name)
+                continue
+            signals = group.get_signals(limit=task['limit'], symbols=task['symbols'])
+            for coin, signal, signal_category, indicator, score in signals:
+                publish(signal_queue, {
+                    'symbol': coin,
+                    'signal': signal,
+                    'category': signal_category,
+                    'interval': indicator.interval,
+                    'strategy_type': indicator.strategy_type,
+                    'score': None if score is None else float(score),
+                    'candle': task['candle'],
+                    'published': clock.time(),
+                    'shard': name,
+                })
+        except Exception as e:
+            log.error(f"An unexpected error occurred in scan worker {name}: {e}")
+            clock.sleep(18)
+
+
+def publish(signal_queue, message):
+    """Puts a signal on the queue without blocking. Returns False (signal dropped) if the queue is full."""
+    try:
+        signal_queue.put_nowait(message)
+        return True
+    except queue.Full:
+        log.warning(f"⚠️ Signal queue full: dropped {message['signal']} {message['symbol']}")
+        return False
+
+
+# --- Worker supervision ---
+
+class Supervisor:
+    """Runs one scan worker process per shard and restarts workers that exit."""
+    def __init__(self, shards, queue_size=1000, restart_delay=5, max_restart_delay=300, rate=API_RATE_LIMIT):
+        # spawn: workers start from a clean interpreter (no inherited threads or sockets)
+        self.context = multiprocessing.get_context('spawn')
+        self.queue = self.context.Queue(maxsize=queue_size)
+        self.shards = list(shards)
+        # One task queue per shard, kept across restarts of its worker
+        self.tasks = {shard: self.context.Queue() for shard in self.shards}
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        # Executor and workers share the API rate limit
+        self.process_rate = rate / (len(self.shards) + 1)
+        self.processes = {} # {shard: Process}
+        self.started = {} # {shard: monotonic start time}
+        self.failures = {} # {shard: consecutive failures}
+        self.restart_at = {} # {shard: monotonic time of the pending restart}
+
+    def _spawn(self, shard):
+        process = self.context.Process(target=scan_worker, name=f"scan-{shard_name(shard)}", daemon=True,
+                                       args=(shard, self.tasks[shard], self.queue, self.process_rate))
+        process.start()
+        self.processes[shard] = process
+        self.started[shard] = tm.monotonic()
+
+    def start(self):
+        for shard in self.shards:
+            self._spawn(shard)
+        log.info(f"Started {len(self.shards)} scan workers: {', '.join(shard_name(shard) for shard in self.shards)}")
+        return self
+
+    def pairs(self):
+        """{category: [intervals]} covered by the shards."""
+        pairs = {}
+        for category, interval, index, count in self.shards:
+            if interval not in pairs.setdefault(category, []):
+                pairs[category].append(interval)
+        return pairs
+
+    def dispatch(self, category, interval, symbols, limit, candle=None):
+        """Sends every worker of (category, interval) its share of `symbols` to scan."""
+        shards = [shard for shard in self.shards if shard[:2] == (category, interval)]
+        if not shards:
+            return
+        parts = split_symbols(symbols, shards[0][3])
+        for shard in shards:
+            self.tasks[shard].put({'symbols': parts[shard[2]], 'limit': limit, 'candle': candle, 'sent': clock.time()})
+
+    def check(self):
+        """Schedules restarts of exited workers (backoff per consecutive failure) and starts the due ones."""
+        now = tm.monotonic()
+        alive = 0
+        for shard, process in list(self.processes.items()):
+            if process.is_alive():
+                alive += 1
+                if now - self.started[shard] > self.max_restart_delay:
+                    self.failures[shard] = 0
+                continue
+            if shard not in self.restart_at:
+                self.failures[shard] = self.failures.get(shard, 0) + 1
+                delay = min(self.max_restart_delay, self.restart_delay * 2 ** (self.failures[shard] - 1))
+                self.restart_at[shard] = now + delay
+                METRICS.inc('scan_worker_restarts_total', shard=shard_name(shard))
+                log.warning(f"⚠️ Scan worker {shard_name(shard)} exited (code {process.exitcode}); restarting in {delay:.0f}s")
+            elif now >= self.restart_at[shard]:
+                del self.restart_at[shard]
+                self._spawn(shard)
+        METRICS.set('scan_workers_alive', alive)
+        try:
+            METRICS.set('signal_queue_depth', self.queue.qsize())
+        except NotImplementedError:
+            pass # qsize is not available on macOS
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join(5)
+
+
+# --- Executor ---
+
+class SignalExecutor(TradingBot):
+    """
+    TradingBot that has its scans done by the supervisor's workers: it schedules them and takes
+    the signals from the queue. Entries, SL/TP management and accounting are the single-process bot's.
+    """
+    def __init__(self, simulator, supervisor, strategy_type, params_map, use_price_stream=None):
+        self.supervisor = supervisor
+        self.params_map = params_map
+        self.strategy_types = list(strategy_type) if isinstance(strategy_type, (list, tuple)) else [strategy_type]
+        self.indicators = {} # {(strategy_type, category, interval): indicator}, for the signal's SL/TP parameters
+        self._init_execution(simulator, list(supervisor.pairs()), use_price_stream)
+
+        # Per category: the universe filter (read from the simulator's ticker snapshots) and the scan schedule
+        self.universes = {}
+        self.schedulers = {}
+        for category, intervals in supervisor.pairs().items():
+            self.universes[category] = IndicatorGroup([
+                create_indicator(type_id, {**params_map[type_id], 'CATEGORY': category}, client=simulator.client)
+                for type_id in self.strategy_types
+            ])
+            self.universes[category].set_shared(ticker_cache=simulator.tickers)
+            self.schedulers[category] = ScanScheduler(intervals, settle_delay=SCAN_SETTLE_SECONDS, preview_every=PREVIEW_SCAN_SECONDS)
+            self.restore_schedule(category, self.schedulers[category])
+
+    def indicator_for(self, message):
+        key = (message['strategy_type'], message['category'], message['interval'])
+        if key not in self.indicators:
+            params = {**self.params_map[key[0]], 'CATEGORY': key[1], 'KLINE_INTERVAL': key[2]}
+            self.indicators[key] = create_indicator(key[0], params, client=self.simulator.client)
+        return self.indicators[key]
+
+    def schedule_scans(self):
+        """Sends the workers the symbols to scan for every candle close (or preview) due, while a position fits."""
+        for category, scheduler in self.schedulers.items():
+            due = scheduler.due()
+            preview = not due and scheduler.preview_due()
+            if not (due or preview):
+                continue
+            if self.has_capacity():
+                # Enough signals to fill every free slot
+                free_slots = MAX_OPEN_POSITIONS - len(self.simulator.positions)
+                symbols = self.universes[category].universe(exclude=set(self.simulator.positions.symbols))
+                for interval in due or scheduler.steps:
+                    candle = scheduler.last_boundary(interval) if due else None
+                    self.supervisor.dispatch(category, interval, symbols, free_slots, candle)
+                self.record_scan(category, due, symbols, scheduler)
+                log.info(f"[{clock.timestamp():%H:%M:%S}] {category}: {len(symbols)} symbols sent to the scan workers ({', '.join(due) if due else 'intrabar preview'})")
+            if due:
+                scheduler.mark_scanned(due)
+            else:
+                scheduler.mark_previewed()
+
+    def seconds_until_next_scan(self):
+        return min(scheduler.seconds_until_next() for scheduler in self.schedulers.values())
+
+    def collect_signals(self, timeout):
+        """Waits up to `timeout` seconds for signals and returns every pending fresh one, best-scored first."""
+        messages = []
+        try:
+            messages.append(self.supervisor.queue.get(timeout=timeout))
+            while True:
+                messages.append(self.supervisor.queue.get_nowait())
+        except queue.Empty:
+            pass
+        METRICS.inc('signals_received_total', len(messages))
+        now = clock.time()
+        fresh = [message for message in messages if now - message['published'] <= SIGNAL_MAX_AGE_SECONDS]
+        if len(fresh) < len(messages):
+            METRICS.inc('signals_dropped_total', len(messages) - len(fresh), reason='stale')
+        # Unranked signals (score None) keep their arrival order after the ranked ones
+        fresh.sort(key=lambda message: float('-inf') if message['score'] is None else message['score'], reverse=True)
+        return fresh
+
+    def run_strategy(self):
+        """Executor loop: manages open positions and enters the best queued signals while there is capacity."""
+        while True:
+            try:
+                if len(self.simulator.positions):
+                    self.manage_open_positions()
+                self.supervisor.check()
+                self.schedule_scans()
+
+                # Wait for signals until the next scan is due, checking positions at least every POSITION_CHECK_SECONDS
+                for message in self.collect_signals(timeout=max(1, min(POSITION_CHECK_SECONDS, self.seconds_until_next_scan()))):
+                    if message['symbol'] in self.simulator.positions:
+                        METRICS.inc('signals_dropped_total', reason='open_position')
+                        continue
+                    if not self.has_capacity():
+                        METRICS.inc('signals_dropped_total', reason='capacity')
+                        continue
+                    direction = 'LONG' if message['signal'] == 'STRONG_BUY' else 'SHORT'
+                    log.info(f"{direction} Signal for {message['symbol']} ({message['category']} {message['interval']}) from {message['shard']}")
+                    signal = [message['symbol'], message['signal'], message['category'], self.indicator_for(message)]
+                    if self.enter_position(signal):
+                        METRICS.observe('signal_to_entry_seconds', clock.time() - message['published'])
+                        if message['candle'] is not None:
+                            METRICS.observe('candle_close_to_entry_seconds', clock.time() - message['candle'] / 1000)
+
+            except Exception as e:
+                log.error(f"An unexpected error occurred in the executor: {e}")
+                clock.sleep(18)
+
+
+# =========================================================================
+# === ENTRY POINT: SUPERVISOR STARTUP ===
+# =========================================================================
+
+if __name__ == "__main__":
+    if LOG_LEVEL:
+        logging.basicConfig(level=LOG_LEVEL, format='%(message)s')
+    else:
+        logging.disable(logging.CRITICAL)
+    if METRICS_PORT:
+        start_http_exporter(METRICS_PORT)
+    if METRICS_JSON_FILE:
+        start_json_dump(METRICS_JSON_FILE, every=METRICS_JSON_EVERY)
+
+    shards = plan_shards(SCAN_SHARDS, SCAN_PROCESSES)
+    supervisor = Supervisor(shards, queue_size=SIGNAL_QUEUE_SIZE, restart_delay=WORKER_RESTART_DELAY)
+    client = get_shared_client(rate=supervisor.process_rate, pool_size=HTTP_POOL_SIZE, max_retries=MAX_RETRIES,
+                               retry_delay=RETRY_DELAY, retry_budget=RETRY_BUDGET)
+    simulator = TradingSimulator(test_net=False, client=client)
+    executor = SignalExecutor(simulator, supervisor, STRATEGY_TYPE, PARAMS_MAP)
+
+    log.info(f"*** Starting Supervisor: Strategy {STRATEGY_TYPE}, {len(shards)} scan workers over {', '.join(f'{c} {i}' for c, i in SCAN_SHARDS)} ***")
+    log.info(f"*** Max open positions: {MAX_OPEN_POSITIONS} ***\n")
+    supervisor.start()
+    try:
+        executor.run_strategy()
+    except KeyboardInterrupt:
+        log.info("Supervisor stopped.")
+    except Exception as e:
+        log.critical(f"Critical error in the supervisor: {e}")
+    finally:
+        supervisor.stop()
+        simulator.tickers.stop()
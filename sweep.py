@@ -0,0 +1,143 @@
+import numpy as np
+import itertools
+import random
+import time as tm
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from complex_bot_demo import EMA_PARAMS
+from backtest import backtest_arrays, ema_crossover_signals, summarize
+from indicators.kline_store import KlineStore
+
+# =========================================================================
+# === PARAMETER SWEEP OVER EMA_PARAMS (PROCESS POOL) ===
+# -------------------------------------------------------------------------
+# Every worker memory-maps the kline store, so candle arrays live once in
+# the OS page cache and are shared by all processes without copying.
+# Combinations are sorted by (interval, fast, slow) and sent in chunks, so
+# a worker reuses the crossover signals of a symbol across SL/TP values.
+# =========================================================================
+
+# Ranked results file layout
+RESULT_DTYPE = np.dtype([
+    ('KLINE_INTERVAL', 'U4'), ('EMA_FAST_LENGTH', 'i4'), ('EMA_SLOW_LENGTH', 'i4'),
+    ('SL_PERCENT', 'f8'), ('TP_PERCENT', 'f8'),
+    ('net_pnl', 'f8'), ('win_rate', 'f8'), ('max_drawdown', 'f8'), ('trades', 'i8')
+])
+
+# --- Worker process state (set once per process by init_worker) ---
+_worker = {}
+
+
+def init_worker(root, category, symbols, start, end):
+    _worker['store'] = KlineStore(root)
+    _worker['category'] = category
+    _worker['symbols'] = symbols
+    _worker['start'] = start
+    _worker['end'] = end
+    _worker['candles'] = {}
+    _worker['signals'] = {}
+
+
+def _candles(symbol, interval):
+    key = (symbol, interval)
+    if key not in _worker['candles']:
+        _worker['candles'][key] = _worker['store'].read(_worker['category'], symbol, interval, start=_worker['start'], end=_worker['end'])
+    return _worker['candles'][key]
+
+
+def run_combination(combo):
+    """Backtests one (interval, fast, slow, sl, tp) combination over all symbols and returns a result row."""
+    interval, fast, slow, sl_percent, tp_percent = combo
+    if _worker['signals'].get('key') != (interval, fast, slow):
+        # Signals depend only on (interval, fast, slow); chunks arrive grouped by them
+        _worker['signals'] = {'key': (interval, fast, slow)}
+
+    trades = []
+    for symbol in _worker['symbols']:
+        data = _candles(symbol, interval)
+        if len(data['close']) < slow + 2:
+            continue
+        if symbol not in _worker['signals']:
+            _worker['signals'][symbol] = ema_crossover_signals(data['close'], fast, slow)
+        trades.append(backtest_arrays(
+            data['open_time'], data['open'], data['high'], data['low'], data['close'],
+            fast, slow, sl_percent, tp_percent, symbol=symbol, signals=_worker['signals'][symbol]
+        ))
+    stats = summarize(np.concatenate(trades) if trades else [])
+    return (interval, fast, slow, sl_percent, tp_percent, stats['net_pnl'], stats['win_rate'], stats['max_drawdown'], stats['trades'])
+
+
+def build_space(grid, samples=None, seed=None):
+    """Grid over {EMA_PARAMS key: [values]} (fast < slow only), or `samples` random points of it."""
+    if min(min(grid['EMA_FAST_LENGTH']), min(grid['EMA_SLOW_LENGTH'])) < 1:
+        raise ValueError("EMA lengths must be at least 1.")
+    combos = [
+        combo for combo in itertools.product(
+            grid['KLINE_INTERVAL'], grid['EMA_FAST_LENGTH'], grid['EMA_SLOW_LENGTH'], grid['SL_PERCENT'], grid['TP_PERCENT']
+        )
+        if combo[1] < combo[2]
+    ]
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return sorted(combos)
+
+
+def run_sweep(combos, root, category, symbols, start=None, end=None, workers=None):
+    """Runs all combinations on a process pool and returns a RESULT_DTYPE array ranked by net PnL."""
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(combos) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(root, category, symbols, start, end)) as pool:
+        rows = list(pool.map(run_combination, combos, chunksize=chunksize))
+    results = np.array(rows, dtype=RESULT_DTYPE)
+    return results[np.argsort(-results['net_pnl'], kind='stable')]
+
+
+# =========================================================================
+# === ENTRY POINT: python sweep.py --fast 5,10,15 --slow 20,30 ... ===
+# =========================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    def values(cast):
+        return lambda text: [cast(v) for v in text.split(',')]
+
+    parser = argparse.ArgumentParser(description="Sweep EMA_PARAMS over the local kline store.")
+    parser.add_argument('symbols', nargs='*', help="Symbols to test (default: every stored symbol)")
+    parser.add_argument('--category', default=EMA_PARAMS['CATEGORY'])
+    parser.add_argument('--interval', type=values(str), default=[EMA_PARAMS['KLINE_INTERVAL']])
+    parser.add_argument('--fast', type=values(int), default=[EMA_PARAMS['EMA_FAST_LENGTH']])
+    parser.add_argument('--slow', type=values(int), default=[EMA_PARAMS['EMA_SLOW_LENGTH']])
+    parser.add_argument('--sl', type=values(float), default=[EMA_PARAMS['SL_PERCENT']])
+    parser.add_argument('--tp', type=values(float), default=[EMA_PARAMS['TP_PERCENT']])
+    parser.add_argument('--random', type=int, default=None, help="Sample N random combinations instead of the full grid")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--days', type=float, default=None, help="Only the last N days of history")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--root', default=EMA_PARAMS.get('KLINE_STORE_DIR') or 'kline_store')
+    parser.add_argument('--output', default='sweep_results.npy')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    store = KlineStore(args.root)
+    symbols = args.symbols or sorted({key[1] for key in store.keys(args.category)})
+    start = int((tm.time() - args.days * 86400) * 1000) if args.days else None
+    grid = {'KLINE_INTERVAL': args.interval, 'EMA_FAST_LENGTH': args.fast, 'EMA_SLOW_LENGTH': args.slow,
+            'SL_PERCENT': args.sl, 'TP_PERCENT': args.tp}
+    try:
+        combos = build_space(grid, samples=args.random, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"Sweeping {len(combos)} combinations x {len(symbols)} symbols...")
+    started = tm.perf_counter()
+    results = run_sweep(combos, args.root, args.category, symbols, start=start, workers=args.workers)
+    elapsed = tm.perf_counter() - started
+    np.save(args.output, results)
+
+    print(f"Done in {elapsed:.2f}s, results saved to {args.output}\n")
+    print(f"{'INT':>4} {'FAST':>5} {'SLOW':>5} {'SL%':>6} {'TP%':>6} {'NET PNL':>11} {'WIN%':>7} {'MAX DD':>10} {'TRADES':>7}")
+    for row in results[:args.top]:
+        print(f"{row['KLINE_INTERVAL']:>4} {row['EMA_FAST_LENGTH']:>5} {row['EMA_SLOW_LENGTH']:>5} {row['SL_PERCENT']:>6.2f} {row['TP_PERCENT']:>6.2f} "
+              f"{row['net_pnl']:>11.2f} {row['win_rate']:>7.2f} {row['max_drawdown']:>10.2f} {row['trades']:>7}")
@@ -0,0 +1,18 @@
+import os
+import sys
+
+# Tests import the top-level modules of the repository (no package install)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import clock
+
+
+@pytest.fixture
+def replay_clock():
+    """Process clock replaced by a ReplayClock (advance with .sleep), restored afterwards."""
+    simulated = clock.ReplayClock(start=0)
+    previous = clock.set_clock(simulated)
+    yield simulated
+    clock.set_clock(previous)
@@ -0,0 +1,129 @@
+import base64
+import hashlib
+import json
+import queue
+import socket
+import struct
+import threading
+import time as tm
+
+import numpy as np
+
+import clock
+
+STEP_MS = 3600000
+
+
+def at(replay_clock, ms):
+    """Moves the test's ReplayClock to `ms` (epoch milliseconds)."""
+    replay_clock.now = ms / 1000
+
+
+class SeriesClient:
+    """pybit-like get_kline over a deterministic hourly series, as seen at clock.time()."""
+    def __init__(self, first_open_ms=0, count=5000, step_ms=STEP_MS, gaps=()):
+        open_time = first_open_ms + np.arange(count, dtype=np.int64) * step_ms
+        # Candles missing on the exchange (e.g. maintenance)
+        self.open_time = open_time[~np.isin(open_time, np.asarray(gaps, dtype=np.int64))]
+        self.step_ms = step_ms
+        self.requests = []
+        self.testnet = False
+
+    def row(self, t):
+        price = 100 + (t // self.step_ms) % 17
+        return [str(t), str(price), str(price + 1), str(price - 1), str(price + 0.5), '10', str(10 * price)]
+
+    def get_kline(self, category='linear', symbol=None, interval='60', limit=200, start=None, end=None, **kwargs):
+        self.requests.append({'limit': limit, 'start': start, 'end': end})
+        now_ms = int(clock.time() * 1000)
+        mask = self.open_time <= (now_ms if end is None else min(now_ms, int(end)))
+        if start is not None:
+            mask &= self.open_time >= int(start)
+        selected = self.open_time[mask][::-1][:int(limit)]
+        return {'retCode': 0, 'retMsg': 'OK', 'result': {'list': [self.row(int(t)) for t in selected]}}
+
+
+class WebSocketServer:
+    """Local stand-in for the Bybit public stream: records the clients' JSON requests, pushes messages, drops connections."""
+    GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen()
+        self.url = f"ws://127.0.0.1:{self.sock.getsockname()[1]}"
+        self.received = queue.Queue()
+        self.connections = []
+        self.connected_at = [] # monotonic time of every handshake
+        self.lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _recv_exact(self, conn, size):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            request += conn.recv(4096)
+        key = next(line.split(':', 1)[1].strip() for line in request.decode().split('\r\n')
+                   if line.lower().startswith('sec-websocket-key:'))
+        accept = base64.b64encode(hashlib.sha1((key + self.GUID).encode()).digest()).decode()
+        conn.sendall(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        with self.lock:
+            self.connections.append(conn)
+            self.connected_at.append(tm.monotonic())
+        try:
+            while True:
+                head = self._recv_exact(conn, 2)
+                opcode, length = head[0] & 0x0F, head[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack('>H', self._recv_exact(conn, 2))[0]
+                elif length == 127:
+                    length = struct.unpack('>Q', self._recv_exact(conn, 8))[0]
+                mask = self._recv_exact(conn, 4) # client frames are always masked
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self._recv_exact(conn, length)))
+                if opcode == 0x8:
+                    break
+                if opcode == 0x1:
+                    self.received.put(json.loads(payload))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with self.lock:
+                if conn in self.connections:
+                    self.connections.remove(conn)
+            conn.close()
+
+    def send(self, message):
+        """Pushes `message` (JSON) to every connected client."""
+        payload = json.dumps(message).encode()
+        header = bytes([0x81, len(payload)]) if len(payload) < 126 else bytes([0x81, 126]) + struct.pack('>H', len(payload))
+        with self.lock:
+            for conn in self.connections:
+                conn.sendall(header + payload)
+
+    def drop(self):
+        """Cuts every connection without a close frame (server restart, network loss)."""
+        with self.lock:
+            for conn in self.connections:
+                conn.shutdown(socket.SHUT_RDWR)
+
+    def close(self):
+        self.drop()
+        self.sock.close()
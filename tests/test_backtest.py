@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from backtest import backtest_arrays, summarize, EXIT_SL, EXIT_TP, EXIT_END
+from complex_bot_demo import RISK_PER_TRADE_USDT, TAKER_FEE_PERCENT, MAKER_FEE_PERCENT, ENTRY_FEE_TYPE, calculate_volume_from_risk
+
+
+def flat(n, price=100.0):
+    """Candle arrays of `n` flat candles (open_time in ms) to be edited by the test."""
+    return {'open_time': np.arange(n, dtype=np.int64) * 60000, 'open_': np.full(n, price), 'high': np.full(n, price),
+            'low': np.full(n, price), 'close': np.full(n, price)}
+
+
+def run(candles, side=1, at=0, sl=2.0, tp=4.0, **kwargs):
+    signals = np.zeros(len(candles['close']), dtype=np.int8)
+    signals[at] = side
+    return backtest_arrays(candles['open_time'], candles['open_'], candles['high'], candles['low'], candles['close'],
+                           5, 20, sl, tp, symbol='TEST', trading_mode=2, signals=signals, **kwargs)
+
+
+def test_intrabar_stop_loss_long():
+    candles = flat(10)
+    candles['low'][4] = 97.5
+    trade = run(candles)[0]
+    assert trade['exit_reason'] == EXIT_SL and trade['exit_price'] == pytest.approx(98.0)
+    assert trade['exit_time'] == 4 * 60000
+
+
+def test_intrabar_take_profit_short():
+    candles = flat(10)
+    candles['low'][3] = 95.0
+    trade = run(candles, side=-1)[0]
+    assert trade['exit_reason'] == EXIT_TP and trade['exit_price'] == pytest.approx(96.0)
+    assert trade['pnl'] > 0
+
+
+def test_stop_loss_wins_when_both_are_hit_in_one_bar():
+    candles = flat(10)
+    candles['low'][2], candles['high'][2] = 97.0, 105.0
+    assert run(candles)[0]['exit_reason'] == EXIT_SL
+
+
+def test_gaps_fill_at_the_open():
+    candles = flat(10)
+    # Opens below the stop: filled at the open, not at the stop price
+    candles['open_'][5], candles['low'][5], candles['high'][5] = 95.0, 94.0, 95.5
+    assert run(candles)[0]['exit_price'] == pytest.approx(95.0)
+    candles = flat(10)
+    # Opens above the take profit
+    candles['open_'][5], candles['low'][5], candles['high'][5] = 107.0, 106.0, 108.0
+    trade = run(candles)[0]
+    assert trade['exit_reason'] == EXIT_TP and trade['exit_price'] == pytest.approx(107.0)
+
+
+def test_exit_search_reaches_the_end_of_long_histories():
+    # Past several doubling windows (64, 128, 256, ...)
+    candles = flat(1000)
+    candles['high'][900] = 104.5
+    trade = run(candles)[0]
+    assert trade['exit_reason'] == EXIT_TP and trade['exit_time'] == 900 * 60000
+
+    candles = flat(1000)
+    candles['close'][-1] = 101.0
+    trade = run(candles)[0]
+    assert trade['exit_reason'] == EXIT_END and trade['exit_price'] == 101.0 and trade['exit_time'] == 999 * 60000
+
+
+def test_fee_math_and_one_position_at_a_time():
+    candles = flat(20)
+    candles['high'][5] = 104.0
+    signals = np.zeros(20, dtype=np.int8)
+    signals[[0, 3, 8]] = 1
+    trades = backtest_arrays(candles['open_time'], candles['open_'], candles['high'], candles['low'], candles['close'],
+                             5, 20, 2.0, 4.0, trading_mode=2, signals=signals)
+    # The signal at 3 comes while the first position is still open
+    assert list(trades['entry_time']) == [0, 8 * 60000]
+
+    trade = trades[0]
+    volume = calculate_volume_from_risk(RISK_PER_TRADE_USDT, 100.0, 2.0)
+    entry_rate = TAKER_FEE_PERCENT if ENTRY_FEE_TYPE == 'TAKER' else MAKER_FEE_PERCENT
+    assert trade['volume'] == pytest.approx(volume)
+    assert trade['fees'] == pytest.approx(100.0 * volume * entry_rate / 100 + 104.0 * volume * TAKER_FEE_PERCENT / 100)
+    assert trade['pnl'] == pytest.approx(4.0 * volume)
+    assert trade['net_pnl'] == pytest.approx(trade['pnl'] - trade['fees'])
+    assert summarize(trades)['fees'] == pytest.approx(trades['fees'].sum())
@@ -0,0 +1,131 @@
+import datetime as dt
+import json
+import time as tm
+
+import pytest
+import requests
+
+from bybit_client import BybitClient, TokenBucket
+
+
+def test_bucket_allows_a_burst_up_to_capacity():
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    tm.sleep(0.05)
+    assert bucket.try_acquire()
+
+
+def test_acquire_waits_for_a_token():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket.acquire()
+    start = tm.monotonic()
+    bucket.acquire()
+    assert tm.monotonic() - start >= 0.03
+
+
+def test_pause_holds_acquire():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.pause(0.1)
+    start = tm.monotonic()
+    bucket.acquire()
+    assert tm.monotonic() - start >= 0.09
+
+
+# --- BybitClient.call through pybit with a fake HTTP session ---
+
+class FakeSession(requests.Session):
+    """requests.Session that answers from a script: (body dict, headers) or an exception per request."""
+    def __init__(self, *replies):
+        super().__init__()
+        self.replies = list(replies)
+        self.sent = [] # monotonic time of every request
+
+    def send(self, request, **kwargs):
+        self.sent.append(tm.monotonic())
+        reply = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        if isinstance(reply, Exception):
+            raise reply
+        body, headers = reply
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.headers.update(headers)
+        response.elapsed = dt.timedelta(0)
+        response.url = request.url
+        return response
+
+
+def ok(headers=None):
+    return {'retCode': 0, 'retMsg': 'OK', 'result': {'list': []}}, headers or {}
+
+
+def error(code, headers=None):
+    return {'retCode': code, 'retMsg': f"error {code}", 'result': {}}, headers or {}
+
+
+def reset_in(seconds):
+    return str(int((tm.time() + seconds) * 1000))
+
+
+def fake_client(*replies, **settings):
+    client = BybitClient(rate=1000, retry_delay=0, **settings)
+    client.http.retry_delay = 0 # pybit's own wait before re-sending a 10002
+    client.http.client = FakeSession(*replies)
+    return client
+
+
+def test_ret_codes_are_returned_without_retrying():
+    client = fake_client(error(10001))
+    assert client.get_tickers(category='linear') == {'retCode': 10001, 'retMsg': 'error 10001', 'result': {}}
+    assert len(client.http.client.sent) == 1
+
+    client = fake_client(ok())
+    assert client.get_tickers(category='linear') == ok()[0]
+
+
+def test_recv_window_error_is_retried():
+    client = fake_client(error(10002), ok())
+    assert client.get_kline(category='linear', symbol='BTCUSDT', interval='60') == ok()[0]
+    assert len(client.http.client.sent) == 2
+
+
+def test_rate_limit_error_pauses_until_the_reset():
+    client = fake_client(error(10006, {'X-Bapi-Limit-Reset-Timestamp': reset_in(0.3)}), ok())
+    assert client.get_tickers(category='linear') == ok()[0]
+    first, second = client.http.client.sent
+    assert second - first >= 0.2
+    assert client.limiter.paused_until > first
+
+
+def test_exhausted_limit_status_header_pauses_the_next_request():
+    client = fake_client(ok({'X-Bapi-Limit-Status': '1', 'X-Bapi-Limit-Reset-Timestamp': reset_in(0.3)}), ok())
+    start = tm.monotonic()
+    client.get_tickers(category='linear')
+    client.get_tickers(category='linear')
+    assert client.http.client.sent[1] - start >= 0.2
+
+    # Remaining requests in the window: no pause
+    client = fake_client(ok({'X-Bapi-Limit-Status': '50', 'X-Bapi-Limit-Reset-Timestamp': reset_in(5)}))
+    client.get_tickers(category='linear')
+    start = tm.monotonic()
+    client.get_tickers(category='linear')
+    assert tm.monotonic() - start < 0.1
+
+
+def test_retries_stop_when_the_budget_is_spent():
+    client = fake_client(requests.exceptions.ConnectionError('down'), max_retries=5, retry_budget=2, retry_refill=0.001)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get_tickers(category='linear')
+    # First attempt + 2 budgeted retries (not max_retries)
+    assert len(client.http.client.sent) == 3
+    # The budget is shared: the next failing call is not retried at all
+    client.http.client.sent.clear()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get_tickers(category='linear')
+    assert len(client.http.client.sent) == 1
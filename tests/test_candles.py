@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from indicators.candles import KLINE_COLUMNS, Candles, decode_kline_rows, stack_candles
+
+
+def bybit_rows(first, count):
+    """Bybit kline list (strings, newest first) for hourly candles from index `first`."""
+    rows = [[str(i * 3600000), str(100 + i), str(101 + i), str(99 + i), str(100.5 + i), '10', str(1000 + i)]
+            for i in range(first, first + count)]
+    return rows[::-1]
+
+
+def test_decode_reverses_to_ascending_float_rows():
+    rows = decode_kline_rows(bybit_rows(5, 4))
+    assert rows.shape == (4, len(KLINE_COLUMNS)) and rows.dtype == np.float64
+    np.testing.assert_array_equal(rows[:, 0], np.arange(5, 9) * 3600000)
+    np.testing.assert_array_equal(rows[:, 4], np.arange(5, 9) + 100.5)
+
+
+def test_decode_empty_list():
+    assert decode_kline_rows([]).shape == (0, len(KLINE_COLUMNS))
+
+
+def test_decode_matches_the_dataframe_path():
+    raw = bybit_rows(0, 50)
+    df = pd.DataFrame(raw, columns=KLINE_COLUMNS).astype(float).iloc[::-1]
+    candles = Candles.from_rows(decode_kline_rows(raw))
+    np.testing.assert_array_equal(candles.open_time, df['open_time'].astype(np.int64).to_numpy())
+    np.testing.assert_array_equal(candles.values, df[KLINE_COLUMNS[1:]].to_numpy().T)
+    frame = candles[:-1].to_frame()
+    assert list(frame.columns) == KLINE_COLUMNS[1:] and len(frame) == 49
+
+
+def test_stack_candles_drops_short_and_lagging_symbols():
+    full = Candles.from_rows(decode_kline_rows(bybit_rows(0, 30)))
+    short = Candles.from_rows(decode_kline_rows(bybit_rows(20, 10)))
+    lagging = Candles.from_rows(decode_kline_rows(bybit_rows(0, 29)))
+    kept, open_time, values = stack_candles(['A', 'B', 'C', 'D'], [full, short, lagging, None], 20)
+    assert kept == ['A']
+    assert values.shape == (len(KLINE_COLUMNS) - 1, 1, 20)
+    np.testing.assert_array_equal(open_time, full.open_time[-20:])
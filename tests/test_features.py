@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes import STEP_MS
+from indicators import kernels
+from indicators.candles import Candles
+from indicators.features import FeatureCache, StreamingEma
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+    values = np.vstack([close, close * 1.01, close * 0.99, close, np.full(400, 10.0), close * 10])
+    return Candles(np.arange(400, dtype=np.int64) * STEP_MS, values)
+
+
+def test_streaming_updates_match_the_batch_ema(candles):
+    close = candles.close
+    ema = StreamingEma(21)
+    ema.reset(close[:50], int(candles.open_time[49]))
+    for i in range(50, len(close)):
+        assert ema.peek(close[i]) == pytest.approx(kernels.ema(close[:i + 1], 21)[-1], rel=1e-12)
+        ema.update(close[i], int(candles.open_time[i]))
+    batch = kernels.ema(close, 21)
+    assert ema.value == pytest.approx(batch[-1], rel=1e-12)
+    # ta.ema: ewm(adjust=False) started from the SMA of the first `length` closes
+    seeded = pd.Series(close)
+    seeded.iloc[:20] = np.nan
+    seeded.iloc[20] = close[:21].mean()
+    assert ema.value == pytest.approx(seeded.ewm(span=21, adjust=False).mean().iloc[-1], rel=1e-12)
+
+
+def test_streaming_ema_warms_up_like_the_batch_ema(candles):
+    ema = StreamingEma(21)
+    ema.reset(candles.close[:20], int(candles.open_time[19]))
+    assert ema.value is None
+
+
+def test_cache_follows_closed_candles_in_o1_updates(candles):
+    cache = FeatureCache(reconcile_every=1000)
+    for end in range(100, 400):
+        closed = candles[:end]
+        values = cache.get('BTCUSDT', '60', closed, [('ema', 9), ('ema', 21), ('sma', 10)])
+        assert values[('ema', 9)].value == pytest.approx(kernels.ema(closed.close, 9)[-1], rel=1e-10)
+        assert values[('ema', 21)].value == pytest.approx(kernels.ema(closed.close, 21)[-1], rel=1e-10)
+        assert values[('sma', 10)] == pytest.approx(closed.close[-10:].mean(), rel=1e-12)
+    ema, updates = cache.entries[('BTCUSDT', '60')]['emas'][21]
+    assert updates == 299 and ema.last_time == candles.open_time[398]
+
+
+def test_reconcile_resets_drift(candles):
+    cache = FeatureCache(reconcile_every=5)
+    ema = cache.get('BTCUSDT', '60', candles[:100], [('ema', 21)])[('ema', 21)]
+    ema.value += 1.0 # accumulated floating-point error, exaggerated
+    for end in range(101, 106):
+        drifted = cache.get('BTCUSDT', '60', candles[:end], [('ema', 21)])[('ema', 21)]
+        assert drifted is ema and abs(ema.value - kernels.ema(candles[:end].close, 21)[-1]) > 1e-3
+    # After `reconcile_every` O(1) updates the EMA is recomputed from the full closes
+    reconciled = cache.get('BTCUSDT', '60', candles[:106], [('ema', 21)])[('ema', 21)]
+    assert reconciled is not ema
+    assert reconciled.value == pytest.approx(kernels.ema(candles[:106].close, 21)[-1], rel=1e-12)
+    assert cache.entries[('BTCUSDT', '60')]['emas'][21][1] == 0
+
+
+def test_unknown_last_candle_recomputes(candles):
+    cache = FeatureCache(reconcile_every=1000)
+    ema = cache.get('BTCUSDT', '60', candles[:100], [('ema', 21)])[('ema', 21)]
+    # History that no longer contains the EMA's last candle (e.g. a gap after downtime)
+    later = candles[200:300]
+    recomputed = cache.get('BTCUSDT', '60', later, [('ema', 21)])[('ema', 21)]
+    assert recomputed is not ema
+    assert recomputed.value == pytest.approx(kernels.ema(later.close, 21)[-1], rel=1e-12)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import kernels
+
+
+@pytest.fixture
+def close():
+    rng = np.random.default_rng(3)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (4, 300)), axis=1))
+
+
+def ema_reference(series, length):
+    """ta.ema: SMA of the first `length` values, then ewm(span=length, adjust=False)."""
+    s = pd.Series(series)
+    seeded = s.copy()
+    seeded.iloc[:length - 1] = np.nan
+    seeded.iloc[length - 1] = s.iloc[:length].mean()
+    return seeded.ewm(span=length, adjust=False).mean().to_numpy()
+
+
+@pytest.mark.parametrize('length', [2, 9, 21, 200])
+def test_ema_matches_pandas_ewm(close, length):
+    batch = kernels.ema(close, length)
+    for row in range(len(close)):
+        np.testing.assert_allclose(batch[row], ema_reference(close[row], length), rtol=1e-10)
+
+
+@pytest.mark.parametrize('length', [2, 14, 150])
+def test_rma_matches_pandas_ewm(close, length):
+    batch = kernels.rma(close, length)
+    for row in range(len(close)):
+        expected = pd.Series(close[row]).ewm(alpha=1 / length, adjust=True, min_periods=length).mean().to_numpy()
+        np.testing.assert_allclose(batch[row], expected, rtol=1e-10)
+
+
+def test_length_one_is_the_input(close):
+    np.testing.assert_array_equal(kernels.ema(close, 1), close)
+    np.testing.assert_allclose(kernels.rma(close, 1), close, rtol=1e-12)
+    np.testing.assert_array_equal(kernels.sma(close[0], 1), close[0])
+
+
+def test_leading_nan_and_short_series():
+    series = np.concatenate([[np.nan] * 5, np.arange(1.0, 31.0)])
+    out = kernels.ema(series, 10)
+    assert np.isnan(out[:14]).all() and out[14] == 5.5
+    assert np.isnan(kernels.ema(np.arange(5.0), 10)).all()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from indicators.base_indicator import KlineCache
+from fakes import SeriesClient, STEP_MS, at
+
+
+def test_delta_fetch_matches_full_download(replay_clock):
+    client = SeriesClient()
+    cache = KlineCache()
+    at(replay_clock, 1000 * STEP_MS + 5000)
+    first = cache.get(client, 'BTCUSDT', 'linear', '60', 50)
+    assert len(first) == 50 and first.open_time[-1] == 1000 * STEP_MS
+
+    at(replay_clock, 1003 * STEP_MS + 5000)
+    merged = cache.get(client, 'BTCUSDT', 'linear', '60', 50)
+    # Only the candles since the last cached (forming) one were requested
+    assert client.requests[-1]['start'] == 1000 * STEP_MS
+    assert client.requests[-1]['limit'] < 50
+
+    fresh = KlineCache().get(SeriesClient(), 'BTCUSDT', 'linear', '60', 50)
+    np.testing.assert_array_equal(merged.open_time, fresh.open_time)
+    np.testing.assert_array_equal(merged.values, fresh.values)
+
+
+def test_long_absence_falls_back_to_full_download(replay_clock):
+    client = SeriesClient()
+    cache = KlineCache()
+    at(replay_clock, 1000 * STEP_MS)
+    cache.get(client, 'BTCUSDT', 'linear', '60', 50)
+    at(replay_clock, 1200 * STEP_MS)
+    candles = cache.get(client, 'BTCUSDT', 'linear', '60', 50)
+    assert client.requests[-1]['start'] is None
+    assert candles.open_time[-1] == 1200 * STEP_MS and len(candles) == 50
@@ -0,0 +1,90 @@
+import numpy as np
+
+from indicators.kline_store import KlineStore
+from fakes import SeriesClient, STEP_MS, at
+
+
+def test_sync_downloads_only_missing_ranges(tmp_path, replay_clock):
+    store = KlineStore(str(tmp_path))
+    client = SeriesClient()
+    at(replay_clock, 3000 * STEP_MS + 1)
+    assert store.sync(client, 'linear', 'BTCUSDT', '60', start=2500 * STEP_MS) == 500
+    assert store.bounds('linear', 'BTCUSDT', '60') == (2500 * STEP_MS, 2999 * STEP_MS)
+
+    # Backfill before the first candle and new candles after the last one
+    at(replay_clock, 3010 * STEP_MS + 1)
+    assert store.sync(client, 'linear', 'BTCUSDT', '60', start=2400 * STEP_MS) == 110
+    data = store.read('linear', 'BTCUSDT', '60')
+    np.testing.assert_array_equal(data['open_time'], np.arange(2400, 3010) * STEP_MS)
+    assert store.sync(client, 'linear', 'BTCUSDT', '60', start=2400 * STEP_MS) == 0
+
+
+def test_append_rejects_a_gap_and_skips_stored_rows(tmp_path):
+    store = KlineStore(str(tmp_path))
+    rows = np.column_stack([np.arange(10) * STEP_MS] + [np.ones(10)] * 6).astype(np.float64)
+    assert store.append('linear', 'BTCUSDT', '60', rows[:5])
+    assert not store.append('linear', 'BTCUSDT', '60', rows[7:])
+    assert store.append('linear', 'BTCUSDT', '60', rows[3:])
+    assert store.count('linear', 'BTCUSDT', '60') == 10
+
+
+def test_exchange_gap_is_recorded_not_redownloaded(tmp_path, replay_clock):
+    gap = [t * STEP_MS for t in range(2005, 2008)]
+    store = KlineStore(str(tmp_path))
+    client = SeriesClient(gaps=gap)
+    at(replay_clock, 2000 * STEP_MS + 1)
+    store.sync(client, 'linear', 'BTCUSDT', '60', start=1900 * STEP_MS)
+
+    at(replay_clock, 2020 * STEP_MS + 1)
+    assert store.sync(client, 'linear', 'BTCUSDT', '60') == 20 - len(gap)
+    assert store.gaps('linear', 'BTCUSDT', '60') == [(2004 * STEP_MS, 2008 * STEP_MS)]
+
+    # The recent candles are served from disk afterwards, one request for the forming candle
+    requests = len(client.requests)
+    candles = store.get_recent(client, 'BTCUSDT', 'linear', '60', 50)
+    assert len(client.requests) == requests + 1
+    assert candles.open_time[-1] == 2020 * STEP_MS
+    assert not np.isin(candles.open_time, gap).any()
+
+
+def test_get_recent_over_a_fresh_gap_syncs_once(tmp_path, replay_clock):
+    store = KlineStore(str(tmp_path))
+    client = SeriesClient(gaps=[2001 * STEP_MS])
+    at(replay_clock, 2001 * STEP_MS + 1)
+    store.sync(client, 'linear', 'BTCUSDT', '60', start=1900 * STEP_MS)
+
+    at(replay_clock, 2005 * STEP_MS + 1)
+    store.get_recent(client, 'BTCUSDT', 'linear', '60', 50)
+    assert store.bounds('linear', 'BTCUSDT', '60')[1] == 2004 * STEP_MS
+    requests = len(client.requests)
+    store.get_recent(client, 'BTCUSDT', 'linear', '60', 50)
+    assert len(client.requests) == requests + 1
+
+
+def test_get_recent_backfills_a_short_history(tmp_path, replay_clock):
+    store = KlineStore(str(tmp_path))
+    client = SeriesClient()
+    at(replay_clock, 3000 * STEP_MS + 1)
+    store.sync(client, 'linear', 'BTCUSDT', '60', start=2800 * STEP_MS)
+    assert store.count('linear', 'BTCUSDT', '60') == 200
+
+    candles = store.get_recent(client, 'BTCUSDT', 'linear', '60', 500)
+    assert len(candles) == 500 and candles.open_time[-1] == 3000 * STEP_MS
+    assert store.count('linear', 'BTCUSDT', '60') >= 499
+    requests = len(client.requests)
+    at(replay_clock, 3001 * STEP_MS + 1)
+    assert len(store.get_recent(client, 'BTCUSDT', 'linear', '60', 500)) == 500
+    assert len(client.requests) == requests + 1
+
+
+def test_get_recent_does_not_retry_a_listing_start(tmp_path, replay_clock):
+    store = KlineStore(str(tmp_path))
+    # Listed 150 candles ago
+    client = SeriesClient(first_open_ms=2850 * STEP_MS)
+    at(replay_clock, 3000 * STEP_MS + 1)
+    assert len(store.get_recent(client, 'BTCUSDT', 'linear', '60', 500)) == 151
+    # The first call with a stored history looks for older candles once
+    assert len(store.get_recent(client, 'BTCUSDT', 'linear', '60', 500)) == 151
+    requests = len(client.requests)
+    assert len(store.get_recent(client, 'BTCUSDT', 'linear', '60', 500)) == 151
+    assert len(client.requests) == requests + 1
@@ -0,0 +1,81 @@
+import json
+import time as tm
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import Metrics, start_http_exporter, start_json_dump
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.describe('orders_total', "Orders by side")
+    metrics.describe('scan_seconds', "Scan duration", buckets=(1, 0.1, 0.5))
+    metrics.inc('orders_total', side='buy')
+    metrics.inc('orders_total', 2, side='buy')
+    metrics.inc('orders_total', side='sell')
+    metrics.set('open_positions', 3)
+    for value in (0.05, 0.1, 0.3, 2):
+        metrics.observe('scan_seconds', value, category='linear')
+    return metrics
+
+
+def test_prometheus_text(metrics):
+    assert metrics.prometheus_text().splitlines() == [
+        '# HELP orders_total Orders by side',
+        '# TYPE orders_total counter',
+        'orders_total{side="buy"} 3',
+        'orders_total{side="sell"} 1',
+        '# TYPE open_positions gauge',
+        'open_positions 3',
+        '# HELP scan_seconds Scan duration',
+        '# TYPE scan_seconds histogram',
+        # Cumulative counts; a value on a bound counts in that bucket (le)
+        'scan_seconds_bucket{category="linear",le="0.1"} 2',
+        'scan_seconds_bucket{category="linear",le="0.5"} 3',
+        'scan_seconds_bucket{category="linear",le="1"} 3',
+        'scan_seconds_bucket{category="linear",le="+Inf"} 4',
+        'scan_seconds_sum{category="linear"} 2.45',
+        'scan_seconds_count{category="linear"} 4',
+    ]
+
+
+def test_histogram_default_buckets_and_timer():
+    metrics = Metrics()
+    with metrics.time('write_seconds', table='trades'):
+        pass
+    text = metrics.prometheus_text()
+    assert 'write_seconds_bucket{table="trades",le="0.001"} 1' in text
+    assert 'write_seconds_bucket{table="trades",le="+Inf"} 1' in text
+    assert 'write_seconds_count{table="trades"} 1' in text
+
+
+def test_json_snapshot_and_dump(metrics, tmp_path):
+    path = str(tmp_path / 'metrics.json')
+    start_json_dump(path, every=0.02, metrics=metrics)
+    deadline = tm.monotonic() + 5
+    while not (tmp_path / 'metrics.json').exists() and tm.monotonic() < deadline:
+        tm.sleep(0.01)
+    with open(path) as f:
+        dumped = json.load(f)
+    assert dumped['counters'] == [{'name': 'orders_total', 'labels': {'side': 'buy'}, 'value': 3},
+                                  {'name': 'orders_total', 'labels': {'side': 'sell'}, 'value': 1}]
+    assert dumped['gauges'] == [{'name': 'open_positions', 'labels': {}, 'value': 3}]
+    histogram, = dumped['histograms']
+    assert histogram == {'name': 'scan_seconds', 'labels': {'category': 'linear'}, 'buckets': [0.1, 0.5, 1],
+                         'counts': [2, 1, 0, 1], 'count': 4, 'sum': pytest.approx(2.45)}
+
+
+def test_http_exporter_serves_metrics(metrics):
+    server = start_http_exporter(0, metrics=metrics)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(url + '/metrics') as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert response.read().decode() == metrics.prometheus_text()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + '/other')
+    finally:
+        server.shutdown()
@@ -0,0 +1,91 @@
+import numpy as np
+
+import complex_bot_demo
+from complex_bot_demo import PositionTable, TradingSimulator
+
+
+def position(symbol, side='Buy', entry=100.0, volume=1.0, stop_loss=95.0, take_profit=110.0):
+    return {'symbol': symbol, 'side': side, 'entry_price': entry, 'volume': volume,
+            'stop_loss': stop_loss, 'take_profit': take_profit}
+
+
+def assert_aligned(table):
+    """Every row of the arrays belongs to the trade at the same index."""
+    n = len(table)
+    assert len(table.symbols) == len(table.trades) == len(table.rows) == n
+    for row, trade in enumerate(table.trades):
+        assert table.symbols[row] == trade['symbol'] and table.rows[trade['symbol']] == row
+        assert table.side[row] == (1 if trade['side'] == 'Buy' else -1)
+        assert (table.entry_price[row], table.volume[row], table.stop_loss[row], table.take_profit[row]) == \
+            (trade['entry_price'], trade['volume'], trade['stop_loss'], trade['take_profit'])
+
+
+def test_find_exits_on_long_and_short_positions():
+    table = PositionTable()
+    table.add(position('LONGTP'))
+    table.add(position('LONGSL'))
+    table.add(position('LONGHOLD'))
+    table.add(position('SHORTTP', side='Sell', stop_loss=105.0, take_profit=90.0))
+    table.add(position('SHORTSL', side='Sell', stop_loss=105.0, take_profit=90.0))
+    table.add(position('SHORTHOLD', side='Sell', stop_loss=105.0, take_profit=90.0))
+    prices = {'LONGTP': 110.0, 'LONGSL': 94.0, 'LONGHOLD': 104.0,
+              'SHORTTP': 89.5, 'SHORTSL': 105.0, 'SHORTHOLD': 96.0}
+    assert table.find_exits(prices) == [('LONGTP', 110.0), ('LONGSL', 94.0), ('SHORTTP', 89.5), ('SHORTSL', 105.0)]
+    assert PositionTable().find_exits(prices) == []
+
+
+def test_missing_or_nan_prices_never_exit():
+    table = PositionTable()
+    table.add(position('BTCUSDT'))
+    table.add(position('ETHUSDT', side='Sell', stop_loss=105.0, take_profit=90.0))
+    assert table.find_exits({}) == []
+    assert table.find_exits({'BTCUSDT': np.nan, 'ETHUSDT': None}) == []
+    assert table.find_exits({'BTCUSDT': 120.0}) == [('BTCUSDT', 120.0)]
+
+
+def test_remove_moves_the_last_row_into_the_slot():
+    table = PositionTable()
+    for symbol, entry in [('A', 100.0), ('B', 200.0), ('C', 300.0), ('D', 400.0)]:
+        table.add(position(symbol, entry=entry, stop_loss=entry - 5, take_profit=entry + 10))
+    table.remove('B')
+    assert table.symbols == ['A', 'D', 'C']
+    assert_aligned(table)
+    assert table.get('D')['entry_price'] == 400.0 and table.get('B') is None and 'B' not in table
+    # Removing the last row moves nothing
+    table.remove('C')
+    table.remove('A')
+    assert table.symbols == ['D']
+    assert_aligned(table)
+    # Stale values beyond the size are never evaluated
+    assert table.find_exits({'D': 500.0, 'A': 0.0}) == [('D', 500.0)]
+    table.remove('D')
+    assert len(table) == 0 and table.total_risk() == 0
+
+
+def test_grows_past_the_initial_capacity():
+    table = PositionTable(capacity=2)
+    for i in range(5):
+        table.add(position(f"SYM{i}", entry=100.0 + i, stop_loss=90.0 + i))
+    assert len(table) == 5 and len(table.side) >= 5
+    assert_aligned(table)
+    assert table.total_risk() == 5 * 10.0
+    assert table.find_exits({'SYM4': 94.0}) == [('SYM4', 94.0)]
+
+
+def test_total_risk_and_the_open_caps(monkeypatch):
+    monkeypatch.setattr(complex_bot_demo, 'MAX_OPEN_POSITIONS', 3)
+    monkeypatch.setattr(complex_bot_demo, 'MAX_TOTAL_RISK_USDT', 10.0)
+    simulator = TradingSimulator.__new__(TradingSimulator)
+    simulator.positions = PositionTable()
+    # Risk = volume * |entry - SL|, for shorts as well
+    simulator.positions.add(position('A', volume=0.5, entry=100.0, stop_loss=92.0))
+    simulator.positions.add(position('B', side='Sell', volume=2.0, entry=10.0, stop_loss=11.0, take_profit=8.0))
+    assert simulator.positions.total_risk() == 6.0
+
+    assert simulator.can_open('C', 4.0)
+    assert not simulator.can_open('C', 4.5) # total risk cap
+    assert not simulator.can_open('A', 1.0) # already open
+    simulator.positions.add(position('C', volume=1.0, entry=100.0, stop_loss=99.0))
+    assert not simulator.can_open('D', 0.5) # position count cap
+    simulator.positions.remove('A')
+    assert simulator.can_open('D', 3.0)
@@ -0,0 +1,118 @@
+import time as tm
+
+import pytest
+
+import complex_bot_demo
+from complex_bot_demo import TradingBot, TradingSimulator
+from fakes import WebSocketServer
+from price_stream import PriceStream
+
+
+def wait_for(predicate, timeout=5):
+    deadline = tm.monotonic() + timeout
+    while not predicate():
+        if tm.monotonic() > deadline:
+            return False
+        tm.sleep(0.01)
+    return True
+
+
+def ticker(symbol, price):
+    return {'topic': f"tickers.{symbol}", 'type': 'snapshot', 'data': {'symbol': symbol, 'lastPrice': str(price)}}
+
+
+@pytest.fixture
+def server():
+    server = WebSocketServer()
+    yield server
+    server.close()
+
+
+def test_subscribes_and_delivers_prices(server):
+    received = []
+    stream = PriceStream('linear', url=server.url, on_price=lambda symbol, price: received.append((symbol, price)))
+    stream.subscribe('BTCUSDT')
+    stream.start()
+    try:
+        assert server.received.get(timeout=5) == {'op': 'subscribe', 'args': ['tickers.BTCUSDT']}
+        # Subscriptions while connected are sent right away
+        stream.subscribe('ETHUSDT')
+        assert server.received.get(timeout=5) == {'op': 'subscribe', 'args': ['tickers.ETHUSDT']}
+
+        server.send({'success': True, 'op': 'subscribe'})
+        server.send(ticker('BTCUSDT', 101.5))
+        server.send({'topic': 'tickers.ETHUSDT', 'type': 'delta', 'data': {'symbol': 'ETHUSDT', 'volume24h': '5'}})
+        server.send(ticker('ETHUSDT', 2000))
+        assert wait_for(lambda: len(received) == 2)
+        assert received == [('BTCUSDT', 101.5), ('ETHUSDT', 2000.0)]
+        assert stream.get_price('BTCUSDT') == 101.5
+
+        stream.unsubscribe('ETHUSDT')
+        assert server.received.get(timeout=5) == {'op': 'unsubscribe', 'args': ['tickers.ETHUSDT']}
+        assert stream.get_price('ETHUSDT') is None
+    finally:
+        stream.stop()
+
+
+def test_reconnects_with_backoff_and_resubscribes(server):
+    stream = PriceStream('linear', url=server.url)
+    stream.subscribe('BTCUSDT')
+    stream.start()
+    try:
+        server.received.get(timeout=5)
+        for attempt, backoff in enumerate([1, 2], start=2):
+            dropped = tm.monotonic()
+            server.drop()
+            assert wait_for(lambda: not stream.connected)
+            assert stream.get_price('BTCUSDT') is None
+            # Same subscriptions on the new connection, after the (doubling) backoff
+            assert server.received.get(timeout=backoff + 5) == {'op': 'subscribe', 'args': ['tickers.BTCUSDT']}
+            assert len(server.connected_at) == attempt
+            assert server.connected_at[-1] - dropped >= backoff - 0.1
+        server.send(ticker('BTCUSDT', 99))
+        assert wait_for(lambda: stream.get_price('BTCUSDT') == 99)
+    finally:
+        stream.stop()
+
+
+class TickerClient:
+    testnet = False
+
+    def __init__(self, price):
+        self.price = price
+        self.calls = 0
+
+    def get_tickers(self, category='linear', **kwargs):
+        self.calls += 1
+        return {'retCode': 0, 'result': {'list': [{'symbol': 'BTCUSDT', 'lastPrice': str(self.price)}]}}
+
+
+def test_stale_stream_falls_back_to_polling(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(complex_bot_demo, 'PRICE_STREAM_URL', server.url)
+    monkeypatch.setattr(complex_bot_demo, 'STREAM_STALE_SECONDS', 0.3)
+    monkeypatch.setattr(complex_bot_demo, 'TICKER_CACHE_TTL', 0)
+    client = TickerClient(price=100)
+    simulator = TradingSimulator(data_dir=str(tmp_path), client=client, background_tickers=False)
+    bot = TradingBot.__new__(TradingBot)
+    bot._init_execution(simulator, {'linear'}, use_price_stream=True)
+    try:
+        simulator.open_position('BTCUSDT', 'Buy', 100, 1, 'linear', 95, 110)
+        bot.manage_open_positions()
+        assert server.received.get(timeout=5) == {'op': 'subscribe', 'args': ['tickers.BTCUSDT']}
+
+        # Fresh streamed price: SL/TP is left to the stream, no REST call
+        server.send(ticker('BTCUSDT', 101))
+        assert wait_for(lambda: bot.price_stream.get_price('BTCUSDT') == 101)
+        calls = client.calls
+        bot.manage_open_positions()
+        assert client.calls == calls and 'BTCUSDT' in simulator.positions
+
+        # No update for longer than STREAM_STALE_SECONDS: the REST snapshot closes the position at TP
+        tm.sleep(0.4)
+        client.price = 111
+        bot.manage_open_positions()
+        assert client.calls > calls
+        assert 'BTCUSDT' not in simulator.positions
+    finally:
+        bot.price_stream.stop()
+        simulator.journal.close()
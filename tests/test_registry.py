@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from fakes import STEP_MS
+from indicators.base_indicator import BaseIndicator
+from indicators.candles import stack_candles
+from indicators.ema_indicator import EmaIndicator
+from indicators.ranking import score_signals
+from indicators.registry import IndicatorGroup
+
+NOW_MS = 1000 * STEP_MS
+
+
+class UniverseClient:
+    """pybit-like get_kline over one close series per symbol (newest candle forming at NOW_MS unless lagging)."""
+    testnet = False
+
+    def __init__(self, closes, lagging=()):
+        self.closes = closes
+        self.lagging = set(lagging)
+        self.requests = [] # (symbol, interval, limit)
+
+    def get_kline(self, category='linear', symbol=None, interval='60', limit=200, **kwargs):
+        self.requests.append((symbol, interval, limit))
+        closes = self.closes[symbol]
+        last = NOW_MS - (STEP_MS if symbol in self.lagging else 0)
+        count = min(len(closes), int(limit))
+        rows = [[str(last - i * STEP_MS), str(c), str(c + 1), str(c - 1), str(c), '10', str(10 * c)]
+                for i, c in enumerate(closes[::-1][:count])]
+        return {'retCode': 0, 'retMsg': 'OK', 'result': {'list': rows}}
+
+
+def params(**overrides):
+    return {'CATEGORY': 'linear', 'KLINE_INTERVAL': '60', 'KLINE_LIMIT': 50, 'KLINE_CACHE': False,
+            'SCAN_WORKERS': 1, 'MIN_VOLUME_24H': 0, **overrides}
+
+
+class Recorder(BaseIndicator):
+    """Signals from a {symbol: signal} table; records the candles and features it was given."""
+    def __init__(self, params, client, signals, strength=None):
+        super().__init__(params, client=client)
+        self.signals = signals
+        self.strength = strength
+        self.feature_specs = [('ema', 5)]
+        self.seen = []
+
+    def evaluate(self, coin, candles, features):
+        self.seen.append((coin, len(candles), features[('ema', 5)]))
+        return self.signals.get(coin)
+
+    def evaluate_matrix(self, values):
+        if self.strength is None:
+            return None
+        # Signal sign and strength from the last close, e.g. 105 -> buy with strength 0.05
+        change = values[3][:, -1] / 100 - 1
+        return np.sign(change).astype(np.int8), np.abs(change)
+
+
+def test_group_fetches_each_symbol_once_for_all_strategies():
+    client = UniverseClient({symbol: np.full(200, 100.0) for symbol in ['AUSDT', 'BUSDT']})
+    short = Recorder(params(KLINE_LIMIT=50), client, {'BUSDT': 'STRONG_SELL'})
+    long = Recorder(params(KLINE_LIMIT=120), client, {'AUSDT': 'STRONG_BUY', 'BUSDT': 'STRONG_BUY'})
+    hourly_only = Recorder(params(KLINE_INTERVAL='15'), client, {})
+    group = IndicatorGroup([short, long, hourly_only])
+
+    signals = group.get_signals(symbols=['AUSDT', 'BUSDT'], intervals=['60'])
+    # The first strategy in group order wins a symbol
+    assert [(coin, signal, indicator) for coin, signal, _, indicator, _ in signals] == \
+        [('AUSDT', 'STRONG_BUY', long), ('BUSDT', 'STRONG_SELL', short)]
+    # One request per symbol with the largest history of the interval; the '15' strategy was not due
+    assert client.requests == [('AUSDT', '60', 120), ('BUSDT', '60', 120)]
+    assert hourly_only.seen == []
+    # Both strategies saw the same candles and the same (shared) EMA object
+    assert short.seen[0][1] == long.seen[0][1] == 120
+    assert short.seen[0][2] is long.seen[0][2]
+
+
+def test_ranking_order_and_ties_on_unequal_histories():
+    closes = {
+        'DUSDT': np.full(100, 105.0), # buy, strength 0.05
+        'AUSDT': np.full(100, 105.0), # same strength: ticker order decides
+        'BUSDT': np.full(30, 120.0), # shorter than KLINE_LIMIT: not ranked
+        'CUSDT': np.full(100, 130.0), # last candle lags the others: not ranked
+        'EUSDT': np.full(100, 90.0), # sell, strength 0.1
+        'FUSDT': np.full(100, 100.0), # no matrix signal
+    }
+    client = UniverseClient(closes, lagging={'CUSDT'})
+    matrix = Recorder(params(SIGNAL_RANKING='spread'), client, {}, strength=True)
+    # No evaluate_matrix: evaluated symbol by symbol on the same candles, strength 0
+    fallback = Recorder(params(SIGNAL_RANKING='spread'), client, {'FUSDT': 'STRONG_SELL', 'BUSDT': 'STRONG_BUY'})
+    group = IndicatorGroup([matrix, fallback])
+
+    signals = group.get_signals(symbols=list(closes))
+    assert [(coin, signal) for coin, signal, *_ in signals] == \
+        [('EUSDT', 'STRONG_SELL'), ('DUSDT', 'STRONG_BUY'), ('AUSDT', 'STRONG_BUY'), ('FUSDT', 'STRONG_SELL')]
+    assert [score for *_, score in signals] == pytest.approx([0.1, 0.05, 0.05, 0.0])
+    assert [indicator for _, _, _, indicator, _ in signals] == [matrix, matrix, matrix, fallback]
+    assert {coin for coin, *_ in fallback.seen} == {'DUSDT', 'AUSDT', 'EUSDT', 'FUSDT'}
+    assert len(client.requests) == len(closes)
+    # `limit` keeps the best ones
+    assert [coin for coin, *_ in group.get_signals(symbols=list(closes), limit=2)] == ['EUSDT', 'DUSDT']
+
+
+def test_matrix_evaluation_matches_symbol_by_symbol_evaluation():
+    rng = np.random.default_rng(11)
+    # Random walks of different lengths: every one at least KLINE_LIMIT long except the last two
+    lengths = rng.integers(60, 300, 200).tolist() + [30, 10]
+    closes = {f"S{i:03d}USDT": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))) for i, n in enumerate(lengths)}
+    client = UniverseClient(closes)
+    ema = EmaIndicator(params(EMA_FAST_LENGTH=5, EMA_SLOW_LENGTH=12, KLINE_LIMIT=60), client=client)
+
+    symbols = list(closes)
+    fetched = [ema.get_kline_data(symbol, interval='60', limit=60) for symbol in symbols]
+    kept, open_time, values = stack_candles(symbols, fetched, 60)
+    assert kept == symbols[:200] and open_time[-1] == NOW_MS
+    signals, strength = ema.evaluate_matrix(values)
+    expected = [ema.check_candles(symbol, candles) for symbol, candles in zip(kept, fetched)]
+    assert [{1: 'STRONG_BUY', -1: 'STRONG_SELL', 0: None}[s] for s in signals.tolist()] == expected
+    assert {'STRONG_BUY', 'STRONG_SELL'} <= set(expected)
+
+
+def test_nan_scores_rank_last_and_unknown_rankings_fail():
+    values = np.ones((6, 3, 4))
+    scores = score_signals('spread', values, np.array([np.nan, 0.5, 0.1]), STEP_MS)
+    assert scores.tolist() == [-np.inf, 0.5, 0.1]
+    with pytest.raises(ValueError):
+        score_signals('momentum', values, np.zeros(3), STEP_MS)
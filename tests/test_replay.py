@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import clock
+from benchmarks.fake_bybit import FakeBybitHTTP
+from complex_bot_demo import EMA_PARAMS
+from fakes import STEP_MS, at
+from indicators.kline_store import KlineStore
+from replay import ReplayMarket, run_replay
+
+MINUTE_MS = 60000
+SYMBOLS = ['SYM000USDT', 'SYM001USDT', 'SYM002USDT']
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    """Kline store with 400 hourly and 400 minute candles per symbol from the synthetic fake API."""
+    store = KlineStore(str(tmp_path_factory.mktemp('kline_store')))
+    fake = FakeBybitHTTP(symbols=len(SYMBOLS), history=400)
+    now_ms = int(clock.time() * 1000)
+    for symbol in SYMBOLS:
+        store.sync(fake, 'linear', symbol, '60', start=now_ms - 400 * STEP_MS)
+        store.sync(fake, 'linear', symbol, '1', start=now_ms - 400 * MINUTE_MS)
+    return store
+
+
+def test_market_never_serves_data_beyond_the_replay_clock(store, replay_clock):
+    market = ReplayMarket(store, 'linear', '60', tick_interval='1')
+    minutes = store.read('linear', 'SYM000USDT', '1')
+    # Inside an hour covered by minute candles, 20 seconds into a minute
+    now_ms = (int(minutes['open_time'][200]) // STEP_MS + 1) * STEP_MS + 30 * MINUTE_MS + 20000
+    at(replay_clock, now_ms)
+
+    candles = market.get_kline(category='linear', symbol='SYM000USDT', interval='60', limit=1000,
+                               end=now_ms + 10 * STEP_MS)['result']['list']
+    open_time = [int(row[0]) for row in candles]
+    # Closed candles end before now, the newest one is forming
+    assert open_time[0] == now_ms // STEP_MS * STEP_MS
+    assert all(t + STEP_MS <= now_ms for t in open_time[1:])
+
+    # The forming candle only holds the 30 minute candles closed so far
+    hour = open_time[0]
+    closed = (minutes['open_time'] >= hour) & (minutes['open_time'] + MINUTE_MS <= now_ms)
+    assert closed.sum() == 30
+    forming = candles[0]
+    assert forming[1] == minutes['open'][closed][0] and forming[4] == minutes['close'][closed][-1]
+    assert forming[2] == minutes['high'][closed].max() and forming[3] == minutes['low'][closed].min()
+
+    # The last price is the close of the last closed minute, not of the one forming
+    ticker, = market.get_tickers(category='linear', symbol='SYM000USDT')['result']['list']
+    last_minute = int(np.flatnonzero(minutes['open_time'] == now_ms // MINUTE_MS * MINUTE_MS - MINUTE_MS)[0])
+    assert float(ticker['lastPrice']) == minutes['close'][last_minute]
+    hours = store.read('linear', 'SYM000USDT', '60')
+    day = hours['open_time'] + STEP_MS <= now_ms
+    assert float(ticker['turnover24h']) == pytest.approx(hours['turnover'][day][-24:].sum())
+
+    # Minute candles: nothing opened after now, even when asked for
+    assert market.get_kline(category='linear', symbol='SYM000USDT', interval='1', start=now_ms)['result']['list'] == []
+    recent = market.get_kline(category='linear', symbol='SYM000USDT', interval='1', start=now_ms - 2 * MINUTE_MS)['result']['list']
+    assert [int(row[0]) for row in recent] == [now_ms // MINUTE_MS * MINUTE_MS, now_ms // MINUTE_MS * MINUTE_MS - MINUTE_MS]
+
+    # Moving the clock reveals the next minute
+    at(replay_clock, now_ms + MINUTE_MS)
+    ticker, = market.get_tickers(category='linear', symbol='SYM000USDT')['result']['list']
+    assert float(ticker['lastPrice']) == minutes['close'][last_minute + 1]
+
+
+def test_run_replay_smoke(store, tmp_path):
+    market = ReplayMarket(store, 'linear', '60')
+    first, last = market.span()
+    assert market.symbols == SYMBOLS
+    start_ms = (first // STEP_MS + EMA_PARAMS['KLINE_LIMIT']) * STEP_MS
+    end_ms = start_ms + 48 * STEP_MS
+    system_clock = clock.get_clock()
+    params_map = {1: {**EMA_PARAMS, 'MIN_VOLUME_24H': 0}}
+
+    simulator = run_replay(market, start_ms, end_ms, str(tmp_path / 'run'), strategy_type=1, params_map=params_map)
+    assert clock.get_clock() is system_clock
+    assert np.isfinite(simulator.balance)
+    assert len(simulator.journal) + len(simulator.positions) > 0
+    # Every hourly close was scanned up to the end of the replay
+    assert simulator.state.last_scanned('linear', '60') == end_ms - 2 * STEP_MS
+    with pytest.raises(FileExistsError):
+        run_replay(market, start_ms, end_ms, str(tmp_path / 'run'), strategy_type=1, params_map=params_map)
+    simulator.journal.close()
@@ -0,0 +1,87 @@
+import datetime as dt
+
+from scan_scheduler import ScanScheduler, month_start
+
+HOUR = 3600
+
+
+class FakeTime:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_due_once_per_candle_after_the_settle_delay():
+    now = FakeTime(10 * HOUR + 100)
+    scheduler = ScanScheduler(['60'], settle_delay=2, clock=now)
+    assert scheduler.due() == ['60']
+    scheduler.mark_scanned(['60'])
+    assert scheduler.due() == []
+    assert scheduler.seconds_until_next() == HOUR - 100 + 2
+
+    now.now = 11 * HOUR + 1
+    assert scheduler.due() == []
+    now.now = 11 * HOUR + 2
+    assert scheduler.due() == ['60']
+
+
+def test_intervals_are_due_independently():
+    now = FakeTime(10 * HOUR + 5)
+    scheduler = ScanScheduler(['15', '60'], settle_delay=2, clock=now)
+    scheduler.mark_scanned(['15', '60'])
+    now.now = 10 * HOUR + 15 * 60 + 5
+    assert scheduler.due() == ['15']
+    scheduler.mark_scanned(['15'])
+    now.now = 11 * HOUR + 5
+    assert scheduler.due() == ['15', '60']
+
+
+def utc(*date):
+    return dt.datetime(*date, tzinfo=dt.timezone.utc).timestamp()
+
+
+def test_monthly_interval_is_due_once_per_calendar_month():
+    now = FakeTime(utc(2024, 1, 31, 12, 30))
+    hourly = ScanScheduler(['M', '60'], settle_delay=2, clock=now)
+    hourly.mark_scanned(['M', '60'])
+    # The hourly close comes first
+    assert hourly.due() == [] and hourly.seconds_until_next() == HOUR / 2 + 2
+
+    scheduler = ScanScheduler(['M'], settle_delay=2, clock=now)
+    scheduler.mark_scanned(['M'])
+    assert scheduler.due() == []
+    assert scheduler.last_closed('M') == utc(2023, 12, 1) * 1000
+    assert scheduler.seconds_until_next() == 11.5 * HOUR + 2
+
+    now.now = utc(2024, 2, 1) + 1
+    assert scheduler.due() == []
+    now.now = utc(2024, 2, 1) + 2
+    assert scheduler.due() == ['M']
+    scheduler.mark_scanned(['M'])
+    assert scheduler.last_closed('M') == utc(2024, 1, 1) * 1000
+    # February 2024 has 29 days
+    assert scheduler.seconds_until_next() == 29 * 24 * HOUR
+
+
+def test_month_boundaries_cross_the_year():
+    assert month_start(utc(2023, 12, 15) * 1000) == utc(2023, 12, 1) * 1000
+    assert month_start(utc(2023, 12, 15) * 1000, 1) == utc(2024, 1, 1) * 1000
+    assert month_start(utc(2024, 1, 1) * 1000, -1) == utc(2023, 12, 1) * 1000
+    scheduler = ScanScheduler(['M'], settle_delay=0, clock=FakeTime(utc(2024, 1, 10)))
+    scheduler.restore('M', utc(2023, 12, 1) * 1000)
+    assert scheduler.due() == []
+    scheduler.restore('M', utc(2023, 11, 1) * 1000)
+    assert scheduler.due() == ['M']
+
+
+def test_previews_between_closes():
+    now = FakeTime(10 * HOUR + 5)
+    scheduler = ScanScheduler(['60'], preview_every=600, clock=now)
+    scheduler.mark_scanned(['60'])
+    assert not scheduler.preview_due()
+    now.now += 600
+    assert scheduler.preview_due() and scheduler.due() == []
+    scheduler.mark_previewed()
+    assert scheduler.seconds_until_next() == 600
@@ -0,0 +1,83 @@
+import json
+import os
+
+from scan_scheduler import ScanScheduler
+from state_store import StateStore
+
+
+def test_restore_replays_the_journal(tmp_path):
+    path = str(tmp_path / 'bot_state')
+    state = StateStore(path)
+    state.set_balance(100)
+    state.open_position('BTCUSDT', {'side': 'Buy', 'qty': 1}, 99.5)
+    state.open_position('ETHUSDT', {'side': 'Sell', 'qty': 2}, 99)
+    state.close_position('ETHUSDT', 101)
+    state.journal.close()
+
+    restored = StateStore(path)
+    assert restored.balance == 101
+    assert restored.positions == {'BTCUSDT': {'side': 'Buy', 'qty': 1}}
+
+
+def test_compaction_writes_the_snapshot_and_empties_the_journal(tmp_path):
+    path = str(tmp_path / 'bot_state')
+    state = StateStore(path, compact_every=3)
+    state.set_balance(100)
+    state.open_position('BTCUSDT', {'side': 'Buy'}, 99)
+    state.set_balance(98)
+    assert os.path.getsize(path + '.wal') == 0
+    with open(path + '.json') as f:
+        assert json.load(f) == {'balance': 98, 'positions': {'BTCUSDT': {'side': 'Buy'}}, 'last_candles': {}}
+    state.close_position('BTCUSDT', 105)
+    state.journal.close()
+
+    restored = StateStore(path, compact_every=3)
+    assert restored.balance == 105 and restored.positions == {}
+
+
+def test_torn_tail_is_cut_before_new_records(tmp_path):
+    path = str(tmp_path / 'bot_state')
+    state = StateStore(path)
+    state.set_balance(150)
+    state.open_position('BTCUSDT', {'side': 'Buy'}, 149)
+    state.journal.close()
+    # Crash in the middle of writing the next record
+    with open(path + '.wal', 'a') as f:
+        f.write('{"op": "close", "key": "BTC')
+
+    restarted = StateStore(path)
+    assert restarted.positions == {'BTCUSDT': {'side': 'Buy'}}
+    restarted.close_position('BTCUSDT', 150.5)
+    restarted.set_balance(151)
+    restarted.journal.close()
+
+    again = StateStore(path)
+    assert again.balance == 151
+    assert again.positions == {}
+
+
+def test_last_processed_candles_survive_restart_and_seed_the_schedule(tmp_path):
+    path = str(tmp_path / 'bot_state')
+    hour = 3600000
+    state = StateStore(path, compact_every=2)
+    state.set_last_candles('linear', '60', ['BTCUSDT', 'ETHUSDT'], 9 * hour)
+    state.set_last_candles('linear', '60', ['BTCUSDT'], 10 * hour) # compacted into the snapshot
+    state.set_last_candles('spot', '60', ['BTCUSDT'], 11 * hour) # stays in the journal
+    state.journal.close()
+
+    restored = StateStore(path, compact_every=2)
+    assert restored.get_last_candle('linear', 'BTCUSDT', '60') == 10 * hour
+    assert restored.get_last_candle('linear', 'ETHUSDT', '60') == 9 * hour
+    assert restored.last_scanned('linear', '60') == 10 * hour
+    assert restored.last_scanned('spot', '60') == 11 * hour
+    assert restored.last_scanned('linear', '15') is None
+
+    # At 11:00:05 the 10:00 candle was processed before the restart: nothing is due until the 11:00 close
+    scheduler = ScanScheduler(['60', '15'], settle_delay=2, preview_every=0, clock=lambda: (11 * hour + 5000) / 1000)
+    scheduler.restore('60', restored.last_scanned('linear', '60'))
+    scheduler.restore('15', restored.last_scanned('linear', '15'))
+    assert scheduler.last_closed('60') == 10 * hour
+    assert scheduler.due() == ['15']
+
+    scheduler.restore('60', 9 * hour)
+    assert scheduler.due() == ['60', '15']
@@ -0,0 +1,41 @@
+import zlib
+
+from supervisor import Supervisor, plan_shards, shard_name, split_symbols
+
+
+def test_plan_shards_covers_every_pair():
+    shards = plan_shards([('linear', 60), ('spot', '15')], 3)
+    assert shards == [('linear', '60', 0, 3), ('linear', '60', 1, 3), ('linear', '60', 2, 3),
+                      ('spot', '15', 0, 3), ('spot', '15', 1, 3), ('spot', '15', 2, 3)]
+    assert shard_name(shards[1]) == 'linear/60#2of3'
+
+
+def test_plan_shards_defaults_to_cores_per_pair(monkeypatch):
+    monkeypatch.setattr('os.cpu_count', lambda: 8)
+    assert len(plan_shards([('linear', '60'), ('linear', '15')])) == 8
+    monkeypatch.setattr('os.cpu_count', lambda: 1)
+    assert len(plan_shards([('linear', '60'), ('linear', '15')])) == 2
+
+
+def test_split_symbols_is_a_stable_partition():
+    symbols = [f"SYM{i:03d}USDT" for i in range(100)]
+    parts = split_symbols(symbols, 4)
+    assert sorted(sum(parts, [])) == symbols
+    for index, part in enumerate(parts):
+        assert part == sorted(part)
+        assert all(zlib.crc32(symbol.encode()) % 4 == index for symbol in part)
+
+
+def test_dispatch_sends_each_worker_its_share():
+    shards = plan_shards([('linear', '60'), ('linear', '15')], 2)
+    supervisor = Supervisor(shards)
+    symbols = [f"SYM{i:03d}USDT" for i in range(20)]
+    supervisor.dispatch('linear', '60', symbols, limit=3, candle=123)
+    received = []
+    for shard in shards[:2]:
+        task = supervisor.tasks[shard].get(timeout=5)
+        assert task['limit'] == 3 and task['candle'] == 123
+        received += task['symbols']
+    assert sorted(received) == symbols
+    assert all(supervisor.tasks[shard].empty() for shard in shards[2:])
+    assert supervisor.pairs() == {'linear': ['60', '15']}
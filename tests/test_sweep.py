@@ -0,0 +1,16 @@
+import pytest
+
+from sweep import build_space
+
+
+def grid(fast, slow):
+    return {'KLINE_INTERVAL': ['60'], 'EMA_FAST_LENGTH': fast, 'EMA_SLOW_LENGTH': slow, 'SL_PERCENT': [1.0], 'TP_PERCENT': [2.0]}
+
+
+def test_space_keeps_fast_below_slow():
+    assert build_space(grid([1, 5, 20], [10, 20])) == [('60', 1, 10, 1.0, 2.0), ('60', 1, 20, 1.0, 2.0), ('60', 5, 10, 1.0, 2.0), ('60', 5, 20, 1.0, 2.0)]
+
+
+def test_space_rejects_lengths_below_one():
+    with pytest.raises(ValueError):
+        build_space(grid([0, 5], [20]))
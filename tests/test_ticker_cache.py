@@ -0,0 +1,59 @@
+import time as tm
+
+from ticker_cache import TickerCache
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get_tickers(self, category='linear', **kwargs):
+        self.calls += 1
+        return {'retCode': 0, 'result': {'list': [{'symbol': 'BTCUSDT', 'lastPrice': str(100 + self.calls)}]}}
+
+
+def test_no_background_refresh_while_nothing_is_tracked():
+    client = CountingClient()
+    cache = TickerCache(client, ttl=0.05)
+    assert cache.get_price('linear', 'BTCUSDT') == 101
+    tm.sleep(0.2)
+    assert client.calls == 1 and cache.thread is None
+    # Stale snapshot: refreshed on read
+    assert cache.get_price('linear', 'BTCUSDT') == 102
+
+
+def test_background_refresh_follows_the_tracked_set_and_stops():
+    client = CountingClient()
+    cache = TickerCache(client, ttl=0.05)
+    cache.set_tracked({'linear'})
+    tm.sleep(0.2)
+    assert client.calls >= 2
+    cache.set_tracked(set())
+    tm.sleep(0.1)
+    assert cache.thread is None
+    calls = client.calls
+    tm.sleep(0.1)
+    assert client.calls == calls
+
+    cache.set_tracked({'linear'})
+    thread = cache.thread
+    cache.stop()
+    thread.join(1)
+    assert not thread.is_alive()
+    cache.set_tracked({'linear'})
+    assert cache.thread is None
+
+
+def test_background_refresh_pauses_while_another_source_is_fresh():
+    client = CountingClient()
+    cache = TickerCache(client, ttl=0.05)
+    fresh = {'linear': True}
+    cache.set_covered(lambda category: fresh[category])
+    cache.set_tracked({'linear'})
+    tm.sleep(0.2)
+    assert client.calls == 0 and cache.thread.is_alive()
+    # The stream went stale: the background refresh takes over again
+    fresh['linear'] = False
+    tm.sleep(0.2)
+    assert client.calls >= 2
+    cache.stop()
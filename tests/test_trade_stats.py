@@ -0,0 +1,78 @@
+import math
+import sqlite3
+
+import numpy as np
+import pytest
+
+from trade_journal import TradeJournal
+from trade_stats import RunningStats, TradeStats
+
+TRADES = [(12.0, 1.0, 1000.0), (-5.0, 0.5, 500.0), (3.0, 0.2, 800.0), (-8.0, 1.1, 1200.0), (20.0, 0.7, 900.0)]
+
+
+def test_running_stats_match_batch_figures():
+    stats = RunningStats()
+    for pnl, fees, notional in TRADES:
+        stats.update(pnl, fees, notional, 'close')
+    net = np.array([pnl - fees for pnl, fees, _ in TRADES])
+    returns = net / np.array([notional for _, _, notional in TRADES])
+    equity = np.cumsum(net)
+
+    summary = stats.summary()
+    assert summary['trades'] == 5 and summary['win_rate'] == 60
+    assert summary['net_pnl'] == pytest.approx(net.sum())
+    assert summary['fees'] == pytest.approx(3.5)
+    assert summary['profit_factor'] == pytest.approx(net[net > 0].sum() / -net[net <= 0].sum())
+    assert summary['sharpe'] == pytest.approx(returns.mean() / returns.std(ddof=1))
+    assert summary['sortino'] == pytest.approx(returns.mean() / math.sqrt(np.mean(np.minimum(returns, 0) ** 2)))
+    assert summary['max_drawdown'] == pytest.approx(np.max(np.maximum.accumulate(equity) - equity))
+    assert summary['best'] == pytest.approx(net.max()) and summary['worst'] == pytest.approx(net.min())
+
+
+def test_values_round_trip_and_empty_summary():
+    stats = RunningStats()
+    stats.update(5.0, 0.1, 100.0, 'close')
+    assert RunningStats(stats.values()).summary() == stats.summary()
+    assert RunningStats().summary()['sharpe'] is None
+
+
+def test_trade_stats_groups():
+    stats = TradeStats()
+    stats.update('BTCUSDT', 'Buy', 10.0, 1.0, 100.0, 't1')
+    stats.update('ETHUSDT', 'Buy', -4.0, 1.0, 100.0, 't2')
+    assert stats.get('all').trades == 2
+    assert set(stats.breakdown('symbol')) == {'BTCUSDT', 'ETHUSDT'}
+    assert stats.breakdown('side')['Buy'].net_pnl == pytest.approx(4.0)
+
+
+def test_journal_stores_fees_of_overlapping_positions(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    journal = TradeJournal(path)
+    # Two positions open at once: the balance change between closes includes another position's entry fee
+    journal.append('BTCUSDT', 'Buy', 100, 110, 10.0, 1008.0, 1, 't0', 't1', fees=2.0)
+    journal.append('ETHUSDT', 'Sell', 50, 45, 5.0, 1011.0, 1, 't0', 't2', fees=1.5)
+    live = journal.stats.get('all').values()
+    journal.rebuild_stats()
+    assert journal.stats.get('all').values() == pytest.approx(live)
+    assert journal.stats.get('all').fees == pytest.approx(3.5)
+    journal.close()
+
+
+def test_journal_without_fees_column_is_migrated(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE trades (id INTEGER PRIMARY KEY, symbol TEXT, side TEXT, entry_price REAL, close_price REAL, '
+                 'volume REAL, pnl REAL, new_balance REAL, timestamp_open TEXT, timestamp_close TEXT)')
+    conn.executemany('INSERT INTO trades (symbol, side, entry_price, close_price, volume, pnl, new_balance, timestamp_open, timestamp_close) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     [('BTCUSDT', 'Buy', 100, 110, 1, 10.0, 1000.0, 't0', 't1'), ('ETHUSDT', 'Buy', 50, 55, 1, 5.0, 1004.0, 't1', 't2')])
+    conn.commit()
+    conn.close()
+
+    journal = TradeJournal(path)
+    # Legacy rows: fees inferred from the balance change (none known for the first trade)
+    assert journal.stats.get('all').fees == pytest.approx(1.0)
+    journal.append('SOLUSDT', 'Buy', 10, 11, 1.0, 1004.5, 1, 't2', 't3', fees=0.5)
+    journal.rebuild_stats()
+    assert journal.stats.get('all').fees == pytest.approx(1.5)
+    journal.close()
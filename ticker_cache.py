@@ -0,0 +1,115 @@
+import logging
+import threading
+import clock
+
+log = logging.getLogger(__name__)
+
+# =========================================================================
+# === TICKER SNAPSHOT CACHE (SHARED, TTL, BACKGROUND REFRESH) ===
+# -------------------------------------------------------------------------
+# One get_tickers(category) response serves price lookups of the simulator
+# and the liquidity filter of the indicators. Snapshots older than `ttl`
+# seconds are refetched on read. Only while categories are tracked (the
+# simulator tracks those with open positions) a background thread keeps
+# them fresh, so SL/TP checks never wait for the API; an idle bot makes
+# no ticker requests between scans. Categories whose positions all have
+# fresh prices from another source (`set_covered`, the price stream) are
+# skipped until that source goes stale. Values
+# derived from a snapshot (e.g. the filtered universe) are computed once
+# per snapshot with `derive`.
+# =========================================================================
+
+class TickerCache:
+    def __init__(self, client, ttl=5, background=True):
+        self.client = client
+        self.ttl = ttl
+        self.background = background
+        self.snapshots = {} # {category: (tickers {symbol: ticker dict}, monotonic fetch time, version)}
+        self.derived = {} # {(category, key): (version, value)}
+        self.tracked = set()
+        self.covered = None # optional callable(category) -> True while another source has fresh prices for it
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    # --- Refresh ---
+
+    def refresh(self, category):
+        """Fetches a new snapshot. Returns it, or None on an API error (the old snapshot is kept)."""
+        try:
+            response = self.client.get_tickers(category=category)
+        except Exception as e:
+            log.error(f"🛑 Error refreshing {category} tickers: {e}")
+            return None
+        if response['retCode'] != 0:
+            log.error(f"❌ Bybit API error refreshing {category} tickers ({response['retCode']}): {response.get('retMsg', 'No message')}")
+            return None
+        tickers = {t['symbol']: t for t in response['result']['list']}
+        with self.lock:
+            version = self.snapshots.get(category, (None, None, 0))[2] + 1
+            self.snapshots[category] = (tickers, clock.monotonic(), version)
+        return tickers
+
+    def set_tracked(self, categories):
+        """Keeps exactly `categories` fresh from a background thread (if enabled); an empty set lets it exit."""
+        with self.lock:
+            self.tracked = set(categories)
+            if self.background and self.tracked and self.thread is None and not self.stopped.is_set():
+                self.thread = threading.Thread(target=self._refresh_loop, name='ticker-cache', daemon=True)
+                self.thread.start()
+
+    def set_covered(self, check):
+        """`check(category)` returns True while the background refresh of the category is not needed."""
+        self.covered = check
+
+    def _refresh_loop(self):
+        while True:
+            with self.lock:
+                categories = list(self.tracked)
+                if not categories or self.stopped.is_set():
+                    self.thread = None
+                    return
+            for category in categories:
+                if self.covered is None or not self.covered(category):
+                    self.refresh(category)
+            self.stopped.wait(self.ttl * 0.8)
+
+    def stop(self):
+        """Ends the background refresh for good (reads keep refreshing after the TTL)."""
+        self.stopped.set()
+
+    # --- Reads ---
+
+    def get_snapshot(self, category):
+        """Returns {symbol: ticker dict}, refetching if the snapshot is missing or older than the TTL."""
+        entry = self.snapshots.get(category)
+        if entry is None or clock.monotonic() - entry[1] > self.ttl:
+            tickers = self.refresh(category)
+            if tickers is not None:
+                return tickers
+            return entry[0] if entry is not None else {}
+        return entry[0]
+
+    def get_price(self, category, symbol):
+        """Last price from the snapshot, or None if the symbol is not in it."""
+        ticker = self.get_snapshot(category).get(symbol)
+        if ticker is None or not ticker.get('lastPrice'):
+            return None
+        return float(ticker['lastPrice'])
+
+    def derive(self, category, key, compute):
+        """Returns compute(snapshot), recomputed only when a new snapshot has been fetched."""
+        snapshot = self.get_snapshot(category)
+        version = self.snapshots.get(category, (None, None, 0))[2]
+        cached = self.derived.get((category, key))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = compute(snapshot)
+        self.derived[(category, key)] = (version, value)
+        return value
+
+    def get_prices(self, category):
+        """{symbol: last price} for the whole category, built once per snapshot."""
+        return self.derive(category, 'prices', lambda snapshot: {
+            symbol: float(t['lastPrice']) for symbol, t in snapshot.items() if t.get('lastPrice')
+        })
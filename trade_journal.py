@@ -0,0 +1,163 @@
+import pandas as pd
+import sqlite3
+import threading
+import os
+from trade_stats import TradeStats, RunningStats, STATS_FIELDS
+
+# =========================================================================
+# === TRADE JOURNAL (APPEND-ONLY SQLITE, WAL MODE) ===
+# -------------------------------------------------------------------------
+# Each closed trade is one INSERT (plus the upsert of its running
+# statistics, see trade_stats.py, in the same transaction). In WAL mode with synchronous=NORMAL a
+# commit only appends to the write-ahead log (no fsync), so a crash of the
+# process never loses or corrupts committed trades; the log is fsynced to
+# the database by a checkpoint every `sync_every` trades and on close().
+# Excel is produced on demand: python trade_journal.py export
+# =========================================================================
+
+# Column names of the exported sheet (same as the former trade_history.xlsx)
+EXCEL_COLUMNS = ['Symbol', 'Side', 'Entry Price', 'Close Price', 'Volume', 'PnL', 'New Balance', 'Open Time', 'Close Time']
+JOURNAL_COLUMNS = ['symbol', 'side', 'entry_price', 'close_price', 'volume', 'pnl', 'new_balance', 'timestamp_open', 'timestamp_close']
+
+
+class TradeJournal:
+    def __init__(self, path='trade_journal.db', sync_every=20):
+        self.path = path
+        self.sync_every = sync_every
+        self.unsynced = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS trades ('
+            'id INTEGER PRIMARY KEY, symbol TEXT, side TEXT, entry_price REAL, close_price REAL, volume REAL, '
+            'pnl REAL, new_balance REAL, timestamp_open TEXT, timestamp_close TEXT, fees REAL)'
+        )
+        if 'fees' not in [row[1] for row in self.conn.execute('PRAGMA table_info(trades)')]:
+            # Journal created before fees were stored: older rows keep fees NULL (unknown)
+            self.conn.execute('ALTER TABLE trades ADD COLUMN fees REAL')
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS trade_stats (key TEXT PRIMARY KEY, {', '.join(STATS_FIELDS)})")
+        self.conn.commit()
+        self.stats = TradeStats()
+        for row in self.conn.execute('SELECT * FROM trade_stats'):
+            self.stats.groups[row[0]] = RunningStats(row[1:])
+        if not self.stats.groups and len(self):
+            # Journal written before the statistics existed: one pass over the history
+            self.rebuild_stats()
+
+    def append(self, symbol, side, entry_price, close_price, pnl, new_balance, volume, timestamp_open, timestamp_close, fees=0.0):
+        """Appends one closed trade (gross `pnl`, entry + exit `fees`) and updates its statistics in constant time."""
+        with self.lock:
+            self.conn.execute(
+                f"INSERT INTO trades ({', '.join(JOURNAL_COLUMNS)}, fees) VALUES ({', '.join('?' * (len(JOURNAL_COLUMNS) + 1))})",
+                (symbol, side, float(entry_price), float(close_price), float(volume), float(pnl), float(new_balance),
+                 str(timestamp_open), str(timestamp_close), float(fees))
+            )
+            keys = self.stats.update(symbol, side, float(pnl), float(fees), float(entry_price) * float(volume), timestamp_close)
+            self._save_stats(keys)
+            self.conn.commit()
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every:
+                self._checkpoint()
+
+    def _save_stats(self, keys):
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO trade_stats (key, {', '.join(STATS_FIELDS)}) VALUES ({', '.join('?' * (len(STATS_FIELDS) + 1))})",
+            [(key,) + self.stats.groups[key].values() for key in keys]
+        )
+
+    def rebuild_stats(self):
+        """
+        Recomputes the statistics from the whole journal. Rows without journaled fees (imported
+        from Excel or written before the column existed) get them inferred from the balance
+        change (previous balance + PnL - new balance), which assumes one position at a time.
+        """
+        with self.lock:
+            self.stats = TradeStats()
+            previous = None
+            for symbol, side, entry_price, volume, pnl, new_balance, timestamp_close, fees in self.conn.execute(
+                    'SELECT symbol, side, entry_price, volume, pnl, new_balance, timestamp_close, fees FROM trades ORDER BY id'):
+                if fees is None:
+                    fees = 0.0 if previous is None else previous + pnl - new_balance
+                self.stats.update(symbol, side, pnl, fees, entry_price * volume, timestamp_close)
+                previous = new_balance
+            self.conn.execute('DELETE FROM trade_stats')
+            self._save_stats(list(self.stats.groups))
+            self.conn.commit()
+
+    def _checkpoint(self):
+        self.conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        self.unsynced = 0
+
+    def flush(self):
+        """Forces the pending trades to disk."""
+        with self.lock:
+            self._checkpoint()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM trades').fetchone()[0]
+
+    def equity_curve(self, count):
+        """[(timestamp_close, new_balance)] of the last `count` trades, oldest first."""
+        with self.lock:
+            rows = self.conn.execute('SELECT timestamp_close, new_balance FROM trades ORDER BY id DESC LIMIT ?', (int(count),)).fetchall()
+        return rows[::-1]
+
+    def read_frame(self):
+        """Returns the whole journal as a DataFrame with the Excel column names."""
+        with self.lock:
+            df = pd.read_sql_query(f"SELECT {', '.join(JOURNAL_COLUMNS)} FROM trades ORDER BY id", self.conn)
+        df.columns = EXCEL_COLUMNS
+        df['Open Time'] = pd.to_datetime(df['Open Time'])
+        df['Close Time'] = pd.to_datetime(df['Close Time'])
+        return df
+
+    def export_excel(self, path='trade_history.xlsx'):
+        """Writes the journal to an Excel workbook (requires openpyxl)."""
+        df = self.read_frame()
+        df.to_excel(path, index=False, sheet_name='Trade History')
+        return len(df)
+
+    def import_excel(self, path):
+        """One-time import of an existing trade_history.xlsx into the journal."""
+        df = pd.read_excel(path, sheet_name='Trade History')
+        rows = [
+            (r['Symbol'], r['Side'], r['Entry Price'], r['Close Price'], r['Volume'], r['PnL'], r['New Balance'], str(r['Open Time']), str(r['Close Time']))
+            for r in df.to_dict('records')
+        ]
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT INTO trades ({', '.join(JOURNAL_COLUMNS)}) VALUES ({', '.join('?' * len(JOURNAL_COLUMNS))})", rows
+            )
+            self.conn.commit()
+            self._checkpoint()
+        self.rebuild_stats()
+        return len(rows)
+
+
+# =========================================================================
+# === ENTRY POINT: python trade_journal.py export [trade_history.xlsx] ===
+# =========================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Trade journal tools.")
+    parser.add_argument('command', choices=['export'])
+    parser.add_argument('output', nargs='?', default='trade_history.xlsx')
+    parser.add_argument('--journal', default='trade_journal.db')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.journal):
+        print(f"Journal {args.journal} not found.")
+    else:
+        journal = TradeJournal(args.journal)
+        count = journal.export_excel(args.output)
+        journal.close()
+        print(f"Exported {count} trades to {args.output}")
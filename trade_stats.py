@@ -0,0 +1,163 @@
+import math
+
+# =========================================================================
+# === RUNNING TRADE STATISTICS (O(1) PER CLOSED TRADE) ===
+# -------------------------------------------------------------------------
+# Performance figures kept up to date as trades are journaled, so reading
+# them never rescans the history. One RunningStats per group: the whole
+# account ('all'), each symbol ('symbol:BTCUSDT') and each side
+# ('side:Buy'). Every closed trade updates three groups in constant time:
+#   equity        - cumulative net PnL, its peak and the max drawdown
+#   Sharpe/Sortino - per-trade returns (net PnL / entry notional), mean and
+#                   variance by Welford's method, downside deviation
+#   fee drag      - entry + exit fees against the gross PnL
+# TradeJournal stores the groups in its database, in the same transaction
+# as the trade.
+#
+#   python trade_stats.py [--journal trade_journal.db] [--by symbol]
+# =========================================================================
+
+# Persisted fields of a group (columns of the trade_stats table after `key`)
+STATS_FIELDS = ['trades', 'wins', 'gross_pnl', 'fees', 'net_pnl', 'gross_profit', 'gross_loss', 'mean_return',
+                'm2_return', 'downside_sq', 'peak', 'max_drawdown', 'best', 'worst', 'last_close']
+
+
+class RunningStats:
+    __slots__ = STATS_FIELDS
+
+    def __init__(self, values=None):
+        for field in STATS_FIELDS:
+            setattr(self, field, 0)
+        self.best = self.worst = self.last_close = None
+        if values is not None:
+            for field, value in zip(STATS_FIELDS, values):
+                setattr(self, field, value)
+
+    def values(self):
+        return tuple(getattr(self, field) for field in STATS_FIELDS)
+
+    def update(self, pnl, fees, notional, timestamp_close):
+        """Adds one closed trade: gross `pnl` and the `fees` paid for it, in USDT."""
+        net = pnl - fees
+        self.trades += 1
+        self.wins += net > 0
+        self.gross_pnl += pnl
+        self.fees += fees
+        self.net_pnl += net
+        if net > 0:
+            self.gross_profit += net
+        else:
+            self.gross_loss -= net
+        # Welford's running mean / variance of the per-trade return
+        ret = net / notional if notional else 0.0
+        delta = ret - self.mean_return
+        self.mean_return += delta / self.trades
+        self.m2_return += delta * (ret - self.mean_return)
+        self.downside_sq += min(ret, 0.0) ** 2
+        # Equity curve of the group = cumulative net PnL
+        self.peak = max(self.peak, self.net_pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.net_pnl)
+        self.best = net if self.best is None else max(self.best, net)
+        self.worst = net if self.worst is None else min(self.worst, net)
+        self.last_close = str(timestamp_close)
+
+    def summary(self):
+        """Derived figures as a dict (ratios are None while undefined)."""
+        n = self.trades
+        std = math.sqrt(self.m2_return / (n - 1)) if n > 1 else 0.0
+        downside = math.sqrt(self.downside_sq / n) if n else 0.0
+        return {
+            'trades': n,
+            'win_rate': self.wins / n * 100 if n else None,
+            'net_pnl': self.net_pnl,
+            'gross_pnl': self.gross_pnl,
+            'fees': self.fees,
+            'fee_drag': self.fees / abs(self.gross_pnl) * 100 if self.gross_pnl else None,
+            'avg_trade': self.net_pnl / n if n else None,
+            'profit_factor': self.gross_profit / self.gross_loss if self.gross_loss else None,
+            'sharpe': self.mean_return / std if std else None,
+            'sortino': self.mean_return / downside if downside else None,
+            'drawdown': self.peak - self.net_pnl,
+            'max_drawdown': self.max_drawdown,
+            'best': self.best,
+            'worst': self.worst,
+            'last_close': self.last_close,
+        }
+
+
+class TradeStats:
+    """RunningStats per group, keyed 'all', 'symbol:<symbol>' and 'side:<side>'."""
+    def __init__(self):
+        self.groups = {}
+
+    @staticmethod
+    def keys_for(symbol, side):
+        return ('all', f"symbol:{symbol}", f"side:{side}")
+
+    def update(self, symbol, side, pnl, fees, notional, timestamp_close):
+        """Adds a closed trade to its groups. Returns the updated keys."""
+        keys = self.keys_for(symbol, side)
+        for key in keys:
+            stats = self.groups.get(key)
+            if stats is None:
+                stats = self.groups[key] = RunningStats()
+            stats.update(pnl, fees, notional, timestamp_close)
+        return keys
+
+    def get(self, key='all'):
+        return self.groups.get(key) or RunningStats()
+
+    def breakdown(self, kind):
+        """{name: RunningStats} of one kind of group ('symbol' or 'side')."""
+        prefix = kind + ':'
+        return {key[len(prefix):]: stats for key, stats in self.groups.items() if key.startswith(prefix)}
+
+
+# =========================================================================
+# === ENTRY POINT: PERFORMANCE REPORT ===
+# =========================================================================
+
+def _fmt(value, pattern='{:.2f}'):
+    return 'n/a' if value is None else pattern.format(value)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from trade_journal import TradeJournal
+
+    parser = argparse.ArgumentParser(description="Performance report from the running trade statistics.")
+    parser.add_argument('--journal', default='trade_journal.db')
+    parser.add_argument('--by', choices=['symbol', 'side'], help="Add a breakdown per symbol or per side")
+    parser.add_argument('--top', type=int, default=20, help="Rows of the breakdown (sorted by net PnL)")
+    parser.add_argument('--curve', type=int, default=0, help="Also print the last N points of the equity curve")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.journal):
+        raise SystemExit(f"Journal {args.journal} not found.")
+    journal = TradeJournal(args.journal)
+    summary = journal.stats.get('all').summary()
+    print(f"--- PERFORMANCE ({args.journal}) ---")
+    print(f"Trades: {summary['trades']}  (last closed {summary['last_close'] or 'n/a'})")
+    print(f"Win rate: {_fmt(summary['win_rate'])}%")
+    print(f"Net PnL: {summary['net_pnl']:.2f} USDT (gross {summary['gross_pnl']:.2f}, avg per trade {_fmt(summary['avg_trade'], '{:.4f}')})")
+    print(f"Fees: {summary['fees']:.2f} USDT ({_fmt(summary['fee_drag'])}% of gross PnL)")
+    print(f"Profit factor: {_fmt(summary['profit_factor'])}")
+    print(f"Sharpe / Sortino (per trade): {_fmt(summary['sharpe'], '{:.3f}')} / {_fmt(summary['sortino'], '{:.3f}')}")
+    print(f"Drawdown: {summary['drawdown']:.2f} USDT now, {summary['max_drawdown']:.2f} USDT max")
+    print(f"Best / worst trade: {_fmt(summary['best'])} / {_fmt(summary['worst'])} USDT")
+
+    if args.by:
+        groups = sorted(journal.stats.breakdown(args.by).items(), key=lambda item: item[1].net_pnl, reverse=True)
+        print(f"\n{args.by.capitalize():<16} {'trades':>7} {'win %':>7} {'net PnL':>10} {'fees':>8} {'max DD':>8} {'sharpe':>7}")
+        for name, stats in groups[:args.top]:
+            s = stats.summary()
+            print(f"{name:<16} {s['trades']:>7} {_fmt(s['win_rate']):>7} {s['net_pnl']:>10.2f} {s['fees']:>8.2f} {s['max_drawdown']:>8.2f} {_fmt(s['sharpe'], '{:.3f}'):>7}")
+        if len(groups) > args.top:
+            print(f"... {len(groups) - args.top} more")
+
+    if args.curve:
+        print(f"\nEquity curve (last {args.curve} trades):")
+        for timestamp_close, balance in journal.equity_curve(args.curve):
+            print(f"  {timestamp_close}  {balance:.2f}")
+    journal.close()